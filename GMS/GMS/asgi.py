@@ -3,6 +3,10 @@ ASGI config for GMS project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this application (e.g. uvicorn GMS.asgi:application)
+so the live slot stream (customer/appointments/slot-events/) can hold
+connections open without tying up a worker thread per client.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -209,6 +209,28 @@ DATABASES = {
     }
 }
 
+# One cache shared by every process (web workers, run_report_workers, ...).
+# The report, stock-count and availability caches are invalidated by bumping
+# a version key, which only reaches the other processes through a shared
+# backend; the default per-process locmem cache would keep serving their
+# stale entries. Set REDIS_URL to use Redis (needs the redis package);
+# otherwise entries go to the gms_cache table, created once per database
+# with `python manage.py createcachetable`.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'gms_cache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -227,6 +249,27 @@ USE_TZ = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Rendered report PDFs (customer data): kept outside MEDIA_ROOT and only served
+# through the admin-only report_job_download view
+REPORT_FILES_ROOT = BASE_DIR / "private" / "reports"
+
+# Rendered report charts are cached under MEDIA_ROOT/chart-cache, capped at this size
+CHART_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Threads used to render the charts of one report in parallel
+CHART_RENDER_THREADS = 4
+
+# Long list reports are rendered in chunks of this many rows, then merged.
+# The chunks of one report render in parallel in a pool of this many
+# processes (CPU count, at most 4); 1 renders them one after another inside
+# the run_report_workers process. Lower it if several report workers share
+# a small machine: each busy worker can run a full pool.
+PDF_CHUNK_ROWS = 1000
+PDF_RENDER_PROCESSES = min(4, os.cpu_count() or 1)
+
+# Who gets the low-stock digest (send_low_stock_alerts); empty: every active staff member
+LOW_STOCK_ALERT_RECIPIENTS = [email.strip() for email in os.getenv("LOW_STOCK_ALERT_RECIPIENTS", "").split(",") if email.strip()]
+
 # Static
 STATIC_URL = '/static/'
 # STATICFILES_DIRS = [BASE_DIR / "static"]
@@ -234,6 +277,17 @@ STATIC_URL = '/static/'
 # Custom user
 AUTH_USER_MODEL = "customer.Users"
 
+# Slot booking: "lock" (select_for_update) or "claim" (conditional UPDATE)
+SLOT_BOOKING_STRATEGY = os.getenv("SLOT_BOOKING_STRATEGY", "lock")
+
+# How long a customer's slot hold lasts while they fill in the booking form
+SLOT_HOLD_SECONDS = 5 * 60
+
+# Live slot events (SSE): seconds between DB polls that pick up changes from other workers.
+# The stream is only served through GMS.asgi (e.g. uvicorn); under WSGI it answers 204
+# and the booking page polls available_slots instead
+SLOT_EVENTS_POLL_INTERVAL = 5
+
 # Auth redirects
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "dashboard"
@@ -1,6 +1,30 @@
 from django.contrib import admin
 from .models import InventoryCategory, Brand, Part
+from .models import SlotTemplate, SlotTemplateHours, SlotTemplateBreak, ClosedDate
 
 admin.site.register(InventoryCategory)
 admin.site.register(Brand)
-admin.site.register(Part)
\ No newline at end of file
+admin.site.register(Part)
+
+
+class SlotTemplateHoursInline(admin.TabularInline):
+    model = SlotTemplateHours
+    extra = 0
+
+
+class SlotTemplateBreakInline(admin.TabularInline):
+    model = SlotTemplateBreak
+    extra = 0
+
+
+@admin.register(SlotTemplate)
+class SlotTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slot_length', 'is_active']
+    list_filter = ['is_active']
+    inlines = [SlotTemplateHoursInline, SlotTemplateBreakInline]
+
+
+@admin.register(ClosedDate)
+class ClosedDateAdmin(admin.ModelAdmin):
+    list_display = ['date', 'reason']
+    date_hierarchy = 'date'
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AdminConfig(AppConfig):
     name = 'adminpanel'
+
+    def ready(self):
+        # connect signal receivers
+        from . import capacity, part_search, report_cache, stock  # noqa: F401
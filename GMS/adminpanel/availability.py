@@ -0,0 +1,159 @@
+"""
+Per-day slot availability.
+
+The slots of a date (with any hold on them) are read with one indexed
+query and the free ones are cached per date. Anything that
+changes a slot's booked state, adds a slot or places/releases a hold
+must call invalidate_date() for the affected date.
+
+Slots no mechanic is free for (see staff.capacity) are left out. Schedule,
+staff and leave changes affect every date, so they call
+invalidate_all_dates(), which bumps the version baked into every key.
+
+Invalidation only reaches the other processes if the cache is shared by
+all of them (CACHES in settings). With per-process locmem, another worker
+keeps offering a just-booked slot until its entry expires.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from staff.capacity import spare_capacity
+
+from .models import Slot, Service
+
+
+AVAILABILITY_CACHE_TIMEOUT = 60 * 5  # seconds
+VERSION_KEY = "slot-availability:version"
+
+
+def _cache_key(day):
+    version = cache.get_or_set(VERSION_KEY, 1, None)
+    return f"slot-availability:{version}:{day.isoformat()}"
+
+
+def _slot_label(start_time, end_time):
+    return f"{start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')}"
+
+
+def load_free_slots(day):
+    """
+    All unbooked slots of a day that a mechanic is free for, as dicts (id,
+    start_time, end_time, duration, held_by, held_until), ordered by start time.
+    Always reads the database; see free_slots_for_date() for the cached version.
+    """
+    slots = list(
+        Slot.objects
+        .filter(date=day)
+        .order_by("start_time")
+        .values_list(
+            "id", "start_time", "end_time", "duration", "is_booked",
+            "hold__session_key", "hold__expires_at",
+        )
+    )
+    spare = spare_capacity(day, [(slot_id, s, e, booked) for slot_id, s, e, _, booked, _, _ in slots])
+    return [
+        {
+            "id": slot_id,
+            "start_time": start,
+            "end_time": end,
+            "duration": duration,
+            "held_by": held_by,
+            "held_until": held_until,
+        }
+        for slot_id, start, end, duration, is_booked, held_by, held_until in slots
+        if not is_booked and (spare is None or spare[slot_id] > 0)
+    ]
+
+
+def free_slots_for_date(day):
+    """load_free_slots(), served from the cache when possible."""
+    key = _cache_key(day)
+    rows = cache.get(key)
+    if rows is None:
+        rows = load_free_slots(day)
+        cache.set(key, rows, AVAILABILITY_CACHE_TIMEOUT)
+    return rows
+
+
+def find_slot_runs(rows, needed):
+    """
+    Sliding window over sorted free slots: for every slot, the shortest run of
+    back-to-back slots starting there whose total duration covers `needed` minutes.
+    """
+    needed = max(needed, 1)
+    runs = []
+    end = 0
+    total = 0
+    for start in range(len(rows)):
+        if end <= start:
+            end = start
+            total = 0
+        while total < needed and end < len(rows) and (
+            end == start or rows[end - 1]["end_time"] == rows[end]["start_time"]
+        ):
+            total += rows[end]["duration"]
+            end += 1
+        if total >= needed:
+            runs.append(rows[start:end])
+        total -= rows[start]["duration"]
+    return runs
+
+
+def held_by_other(row, session_key, now):
+    """Whether a free-slot row has a live hold placed by a session other than session_key."""
+    return (
+        row["held_until"] is not None
+        and row["held_until"] > now
+        and row["held_by"] != session_key
+    )
+
+
+def available_slots_for_service(day, service_id, session_key=None):
+    """
+    Start slots of the day from which the given service fits into free, contiguous
+    slots. Slots held by another session are skipped; the caller's own holds are not.
+    An invalid service id gives no slots.
+    """
+    try:
+        service_id = int(service_id)
+    except (TypeError, ValueError):
+        return []
+    duration = (
+        Service.objects.filter(pk=service_id).values_list("duration", flat=True).first()
+    )
+    if duration is None:
+        return []
+    now = timezone.now()
+    rows = [row for row in free_slots_for_date(day) if not held_by_other(row, session_key, now)]
+    return [
+        {
+            "id": run[0]["id"],
+            "label": _slot_label(run[0]["start_time"], run[-1]["end_time"]),
+            "slots": [row["id"] for row in run],
+        }
+        for run in find_slot_runs(rows, duration)
+    ]
+
+
+def invalidate_date(day):
+    """Drop the cached availability for a date once the current transaction commits."""
+    key = _cache_key(day)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_dates(days):
+    """invalidate_date() for many dates with a single cache round-trip."""
+    keys = [_cache_key(day) for day in days]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_all_dates():
+    """Drop cached availability for every date (after commit) by bumping the key version."""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, None)
+    transaction.on_commit(bump)
@@ -0,0 +1,124 @@
+"""
+Per-day slot counters (DailyCapacity).
+
+Saving or deleting a Slot instance updates the counters through the
+receivers below. That covers the admin site, forms and queryset
+delete(), which sends post_delete for every row. Counters change with
+F() increments, so concurrent writers never lose an update.
+
+Bulk writes (queryset.update(), bulk_create()) send no signals. Code
+doing them on Slot records the change itself (record_booked(), or
+rebuild_capacity() for a date range) in the same transaction.
+rebuild_capacity() recomputes the table (or a date range of it) from
+Slot in one aggregate query. The rebuild_daily_capacity command runs it
+and can be scheduled (e.g. nightly) to repair counters after raw SQL or
+other writes that bypass this module.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import DailyCapacity, Slot
+
+
+def _bump(day, **deltas):
+    """Add deltas to a day's counters, creating the row on first use."""
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if DailyCapacity.objects.filter(date=day).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyCapacity.objects.create(date=day, **deltas)
+    except IntegrityError:
+        # another transaction created the row first
+        DailyCapacity.objects.filter(date=day).update(**changes)
+
+
+def record_slots_added(day, count=1, booked=0):
+    _bump(day, total=count, booked=booked)
+
+
+def record_slots_removed(day, count=1, booked=0):
+    _bump(day, total=-count, booked=-booked)
+
+
+def record_booked(day, count=1):
+    """count > 0 when slots get booked, < 0 when they are freed."""
+    _bump(day, booked=count)
+
+
+def _range_filter(start_date, end_date, field="date"):
+    lookups = {}
+    if start_date:
+        lookups[f"{field}__gte"] = start_date
+    if end_date:
+        lookups[f"{field}__lte"] = end_date
+    return lookups
+
+
+def rebuild_capacity(start_date=None, end_date=None):
+    """
+    Recompute counters from Slot for a date range (everything if open-ended)
+    with one GROUP BY. Returns the number of days written.
+    """
+    rows = (
+        Slot.objects
+        .filter(**_range_filter(start_date, end_date))
+        .values("date")
+        .annotate(total=Count("id"), booked=Count("id", filter=Q(is_booked=True)))
+        .order_by()
+    )
+    capacities = [DailyCapacity(date=r["date"], total=r["total"], booked=r["booked"]) for r in rows]
+
+    with transaction.atomic():
+        DailyCapacity.objects.filter(**_range_filter(start_date, end_date)).delete()
+        DailyCapacity.objects.bulk_create(capacities, batch_size=1000)
+    return len(capacities)
+
+
+def capacity_totals(start_date=None, end_date=None):
+    """(total, booked) slots over a date range, summed from the per-day rows."""
+    totals = (
+        DailyCapacity.objects
+        .filter(**_range_filter(start_date, end_date))
+        .aggregate(total=Sum("total"), booked=Sum("booked"))
+    )
+    return totals["total"] or 0, totals["booked"] or 0
+
+
+@receiver(pre_save, sender=Slot)
+def _remember_stored_slot(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored (date, is_booked) of a slot about to be updated, for _slot_saved."""
+    instance._capacity_before = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {"date", "is_booked"} & set(update_fields):
+        return
+    instance._capacity_before = (
+        Slot.objects.filter(pk=instance.pk).values_list("date", "is_booked").first()
+    )
+
+
+@receiver(post_save, sender=Slot)
+def _slot_saved(sender, instance, created, **kwargs):
+    if created:
+        record_slots_added(instance.date, booked=int(instance.is_booked))
+        return
+    before = getattr(instance, "_capacity_before", None)
+    if before is None:
+        return  # neither date nor is_booked was saved
+
+    old_date, old_booked = before
+    if old_date != instance.date:
+        record_slots_removed(old_date, booked=int(old_booked))
+        record_slots_added(instance.date, booked=int(instance.is_booked))
+    elif old_booked != instance.is_booked:
+        record_booked(instance.date, 1 if instance.is_booked else -1)
+
+
+@receiver(post_delete, sender=Slot)
+def _slot_deleted(sender, instance, **kwargs):
+    record_slots_removed(instance.date, booked=int(instance.is_booked))
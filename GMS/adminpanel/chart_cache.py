@@ -0,0 +1,139 @@
+"""
+Content-addressed cache for rendered report charts.
+
+A chart is identified by a SHA-256 of (kind, title, labels, values, size),
+so identical numbers always map to the same entry and a changed number
+is simply a different key; nothing ever needs invalidating.
+
+Lookups go through a small in-process LRU first, then a file cache under
+MEDIA_ROOT shared by every worker. The file cache is capped at
+CHART_CACHE_MAX_BYTES; when a write pushes it over, the least recently
+used files (by mtime, refreshed on every hit) are deleted.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+
+MEMORY_ENTRIES = 128
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def chart_key(kind, title, labels, values, size):
+    payload = json.dumps([kind, title, list(labels), list(values), list(size)], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    def __init__(self, directory=None, max_bytes=None, memory_entries=MEMORY_ENTRIES):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "file": 0}
+        self.misses = 0
+
+    @property
+    def directory(self):
+        return Path(self._directory or Path(settings.MEDIA_ROOT) / "chart-cache")
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, "CHART_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+
+    def get_or_render(self, key, render):
+        """Return the cached base64 PNG for key, calling render() on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return self._memory[key]
+
+        path = self.directory / f"{key}.b64"
+        try:
+            image = path.read_text()
+        except OSError:
+            image = None
+
+        if image is not None:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            with self._lock:
+                self.hits["file"] += 1
+        else:
+            image = render()
+            with self._lock:
+                self.misses += 1
+            self._write(path, image)
+
+        self._remember(key, image)
+        return image
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._memory_entries:
+                self._memory.popitem(last=False)
+
+    def _write(self, path, image):
+        # a cache that cannot be written must never break the report
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(image)
+            os.replace(tmp, path)
+            self._evict()
+        except OSError:
+            pass
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".b64"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _mtime, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["file"]
+            return {
+                "memory_hits": self.hits["memory"],
+                "file_hits": self.hits["file"],
+                "misses": self.misses,
+                "hit_rate": round(hits / (hits + self.misses) * 100, 1) if hits + self.misses else 0,
+            }
+
+    def clear(self):
+        """Empty the in-process LRU and reset the counters (the file cache is left alone)."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = {"memory": 0, "file": 0}
+            self.misses = 0
+
+
+chart_cache = ChartCache()
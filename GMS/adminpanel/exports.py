@@ -0,0 +1,127 @@
+"""
+Streaming CSV / JSONL exports.
+
+Rows are read with values_list().iterator(chunk_size=...) and written one
+line at a time into a StreamingHttpResponse, so memory use stays flat no
+matter how many rows the date range covers.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from .models import Slot
+from .report_builders import filter_slots
+from .report_metrics import filtered_appointments, filtered_customers
+
+
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per database round-trip
+LINES_PER_WRITE = 500
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+# kind -> (queryset builder, [(column header, field lookup)])
+EXPORTS = {
+    "appointments": (
+        lambda start, end: filtered_appointments(start, end).order_by("slot__date", "slot__start_time", "id"),
+        [
+            ("id", "id"),
+            ("date", "slot__date"),
+            ("start_time", "slot__start_time"),
+            ("end_time", "slot__end_time"),
+            ("status", "status"),
+            ("customer", "user__name"),
+            ("email", "user__email"),
+            ("vehicle", "vehicle__model"),
+            ("plate_no", "vehicle__plate_no"),
+            ("service", "service__name"),
+            ("price", "service__price"),
+            ("created_at", "created_at"),
+        ],
+    ),
+    "slots": (
+        lambda start, end: filter_slots(Slot.objects.all(), start, end).order_by("date", "start_time", "id"),
+        [
+            ("id", "id"),
+            ("date", "date"),
+            ("start_time", "start_time"),
+            ("end_time", "end_time"),
+            ("duration", "duration"),
+            ("is_booked", "is_booked"),
+        ],
+    ),
+    "customers": (
+        lambda start, end: filtered_customers(start, end).order_by("id"),
+        [
+            ("id", "id"),
+            ("name", "name"),
+            ("email", "email"),
+            ("phone", "phone"),
+            ("address", "address"),
+            ("status", "status"),
+            ("is_verified", "is_verified"),
+            ("date_joined", "date_joined"),
+        ],
+    ),
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def export_rows(kind, start_date, end_date):
+    """(headers, iterator of value tuples) for an export."""
+    build_queryset, columns = EXPORTS[kind]
+    rows = (
+        build_queryset(start_date, end_date)
+        .values_list(*[field for _, field in columns])
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return [header for header, _ in columns], rows
+
+
+def _format_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def csv_lines(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_format_value(v) for v in row])
+
+
+def jsonl_lines(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, map(_format_value, row))), default=str) + "\n"
+
+
+def _batched(lines, size=LINES_PER_WRITE):
+    """Join lines into bigger chunks so the server is not flushing one row at a time."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def streaming_export(kind, fmt, start_date, end_date):
+    headers, rows = export_rows(kind, start_date, end_date)
+    lines = csv_lines(headers, rows) if fmt == "csv" else jsonl_lines(headers, rows)
+
+    response = StreamingHttpResponse(_batched(lines), content_type=FORMATS[fmt])
+    suffix = "_".join(str(d) for d in (start_date, end_date) if d)
+    filename = f"{kind}_{suffix}.{fmt}" if suffix else f"{kind}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Slot, Service, JobVacancy, Part
+from .models import Slot, Service, JobVacancy, Part, SlotTemplate, StockMovement
 from django.forms import DateInput, TimeInput
 from django.contrib.auth.password_validation import validate_password
 from customer.models import Users
@@ -15,6 +15,29 @@ class SlotForm(forms.ModelForm):
             "end_time": TimeInput(attrs={"type": "time", "class": "form-control"}),
         }
 
+class SlotGenerateForm(forms.Form):
+    MAX_DAYS = 366
+
+    template = forms.ModelChoiceField(
+        queryset=SlotTemplate.objects.filter(is_active=True),
+        empty_label="Choose template",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    start_date = forms.DateField(widget=DateInput(attrs={"type": "date", "class": "form-control"}))
+    end_date = forms.DateField(widget=DateInput(attrs={"type": "date", "class": "form-control"}))
+
+    def clean(self):
+        cleaned = super().clean()
+        start = cleaned.get("start_date")
+        end = cleaned.get("end_date")
+
+        if start and end:
+            if end < start:
+                raise forms.ValidationError("End date must not be before start date.")
+            if (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Generate at most {self.MAX_DAYS} days at a time.")
+        return cleaned
+
 class ServiceForm(forms.ModelForm):
     class Meta:
         model = Service
@@ -47,6 +70,43 @@ class PartForm(forms.ModelForm):
         }
 
 
+class PartEditForm(PartForm):
+    """PartForm without quantity: stock changes go through stock movements."""
+
+    class Meta(PartForm.Meta):
+        fields = [field for field in PartForm.Meta.fields if field != "quantity"]
+
+
+class StockMovementForm(forms.Form):
+    kind = forms.ChoiceField(choices=StockMovement.KIND_CHOICES)
+    quantity = forms.IntegerField(help_text="Adjustments may be negative")
+    note = forms.CharField(max_length=255, required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        kind = cleaned.get("kind")
+        quantity = cleaned.get("quantity")
+
+        if quantity is not None:
+            if quantity == 0:
+                raise forms.ValidationError("Quantity must not be zero.")
+            if kind != "adjust" and quantity < 0:
+                raise forms.ValidationError("Only adjustments can be negative.")
+        return cleaned
+
+
+class PartImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX, with the columns of an export")
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        fmt = file.name.rsplit(".", 1)[-1].lower()
+        if fmt not in ("csv", "xlsx"):
+            raise forms.ValidationError("Upload a .csv or .xlsx file.")
+        file.format = fmt
+        return file
+
+
 class JobVacancyForm(forms.ModelForm):
     class Meta:
         model = JobVacancy
@@ -0,0 +1,36 @@
+"""
+Chart, PDF and spreadsheet backends, imported on first use.
+
+matplotlib, xhtml2pdf, pypdf and openpyxl take well over a second to
+import between them, and only the report and parts import/export
+endpoints need them. Going through these accessors keeps them out of
+worker boot and out of every manage.py command that merely imports the
+URLconf.
+"""
+from functools import cache
+
+
+@cache
+def agg():
+    """(Figure, FigureCanvasAgg): matplotlib's object API, without pyplot's global figure registry."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    return Figure, FigureCanvasAgg
+
+
+@cache
+def pisa():
+    from xhtml2pdf import pisa
+    return pisa
+
+
+@cache
+def pdf_writer():
+    from pypdf import PdfWriter
+    return PdfWriter
+
+
+@cache
+def openpyxl():
+    import openpyxl
+    return openpyxl
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from adminpanel.models import Brand, InventoryCategory, Part
+from adminpanel.part_search import search_parts
+
+
+PART_TYPES = [
+    'Oil Filter', 'Air Filter', 'Cabin Filter', 'Fuel Filter', 'Brake Pad', 'Brake Disc', 'Brake Shoe',
+    'Clutch Plate', 'Clutch Cable', 'Spark Plug', 'Glow Plug', 'Timing Belt', 'Fan Belt', 'Water Pump',
+    'Radiator Hose', 'Thermostat', 'Shock Absorber', 'Strut Mount', 'Tie Rod End', 'Ball Joint',
+    'Wheel Bearing', 'CV Joint', 'Wiper Blade', 'Headlight Bulb', 'Battery', 'Alternator', 'Starter Motor',
+    'Ignition Coil', 'Oxygen Sensor', 'Engine Mount',
+]
+MODELS = [
+    'Swift', 'Alto', 'Baleno', 'Dzire', 'i10', 'i20', 'Creta', 'Verna', 'City', 'Amaze', 'Jazz', 'Nexon',
+    'Tiago', 'Altroz', 'Scorpio', 'Bolero', 'XUV500', 'Innova', 'Fortuner', 'Corolla', 'Polo', 'Vento',
+]
+BRANDS = ['Bosch', 'Denso', 'NGK', 'Valeo', 'Mahle', 'Mann', 'Brembo', 'Monroe', 'Gates', 'Exide', 'SKF', 'Lumax']
+DEFAULT_QUERIES = ['bosch', 'brake pad', 'swift', 'oil filter i20', 'ngk spark', 'timing belt gates', 'zz-404-none']
+
+
+class Command(BaseCommand):
+    help = 'Time inventory searches over a large parts table (synthetic parts are rolled back unless --keep)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parts', type=int, default=500_000, help='Seed synthetic parts up to this many rows')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--query', action='append', dest='queries', help='Query to time (repeatable)')
+        parser.add_argument('--max-ms', type=float, help='Fail if any query median exceeds this')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded parts')
+
+    def _seed(self, target):
+        missing = target - Part.objects.count()
+        if missing <= 0:
+            return 0
+
+        categories = [InventoryCategory.objects.get_or_create(category_name=f'Bench {name}')[0] for name in PART_TYPES]
+        brands = [Brand.objects.get_or_create(brand_name=f'Bench {name}')[0] for name in BRANDS]
+        rng = random.Random(42)
+        batch = []
+        for i in range(missing):
+            kind = rng.randrange(len(PART_TYPES))
+            part = Part(
+                name=f'{PART_TYPES[kind]} {rng.choice("ABCDEFGH")}{rng.randrange(100, 1000)}-{i}',
+                compatible_model=rng.choice(MODELS),
+                price=rng.randrange(100, 20000),
+                quantity=rng.randrange(0, 50),
+                category=categories[kind],
+                brand=rng.choice(brands),
+            )
+            part.search_document = part.build_search_document()
+            batch.append(part)
+            if len(batch) == 5000:
+                Part.objects.bulk_create(batch)
+                batch = []
+        Part.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE parts' if connection.vendor == 'postgresql' else 'ANALYZE')
+        return missing
+
+    def _time(self, query, runs):
+        """Seconds for what the inventory page does: count matches and load the first page."""
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            qs = search_parts(Part.objects.select_related('category', 'brand'), query)
+            total = qs.count()
+            list(qs[:10])
+            timings.append(time.perf_counter() - started)
+        return timings, total
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or DEFAULT_QUERIES
+        runs = max(options['runs'], 1)
+        slow = []
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            seeded = self._seed(options['parts'])
+            self.stdout.write(
+                f'{connection.vendor}: {Part.objects.count()} parts '
+                f'({seeded} seeded in {time.perf_counter() - started:.1f} s)\n'
+            )
+
+            self.stdout.write(f'{"query":<22} {"matches":>8} {"median ms":>10} {"p95 ms":>8}')
+            for query in queries:
+                timings, total = self._time(query, runs)
+                ms = sorted(t * 1000 for t in timings)
+                median = statistics.median(ms)
+                self.stdout.write(f'{query:<22} {total:>8} {median:>10.2f} {ms[int(len(ms) * 0.95) - 1 if len(ms) > 1 else 0]:>8.2f}')
+                if options['max_ms'] is not None and median > options['max_ms']:
+                    slow.append(query)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        if slow:
+            raise CommandError(f'Median above --max-ms {options["max_ms"]:.0f} ms for: {", ".join(slow)}')
+        self.stdout.write(self.style.SUCCESS('\nDone.'))
@@ -0,0 +1,77 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# modules that only the report and parts import/export endpoints need (see adminpanel.lazy_backends)
+HEAVY_MODULES = ('matplotlib', 'xhtml2pdf', 'reportlab', 'pypdf', 'openpyxl')
+
+BOOT_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+finished = time.perf_counter()
+print(json.dumps({{
+    "setup": setup_done - started,
+    "urls": finished - setup_done,
+    "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure cold start (django.setup() + URLconf import) in fresh interpreters and list the slowest imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time')
+        parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+        parser.add_argument('--max-ms', type=float, help='Fail if the median cold start exceeds this')
+
+    def _boot(self, *python_flags):
+        result = subprocess.run(
+            [sys.executable, *python_flags, '-c', BOOT_SCRIPT],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Boot failed:\n{result.stderr}')
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        runs = [self._boot()[0] for _ in range(max(options['runs'], 1))]
+        setup_ms = [r['setup'] * 1000 for r in runs]
+        total_ms = [(r['setup'] + r['urls']) * 1000 for r in runs]
+        median = statistics.median(total_ms)
+
+        self.stdout.write(
+            f'django.setup(): median {statistics.median(setup_ms):.0f} ms\n'
+            f'setup + URLconf: median {median:.0f} ms, min {min(total_ms):.0f} ms, '
+            f'max {max(total_ms):.0f} ms ({len(runs)} runs)'
+        )
+
+        _, importtime = self._boot('-X', 'importtime')
+        imports = []
+        for line in importtime.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_us, cumulative_us, name = [part.strip() for part in line.split(':', 1)[1].split('|')]
+            imports.append((int(cumulative_us), int(self_us), name))
+
+        self.stdout.write('\nSlowest imports (cumulative / self ms):')
+        for cumulative_us, self_us, name in sorted(imports, reverse=True)[:options['top']]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {name}')
+
+        heavy = runs[0]['heavy']
+        if heavy:
+            raise CommandError(f'Loaded at startup but only needed by reports: {", ".join(heavy)}')
+        if options['max_ms'] is not None and median > options['max_ms']:
+            raise CommandError(f'Cold start {median:.0f} ms exceeds --max-ms {options["max_ms"]:.0f} ms')
+
+        self.stdout.write(self.style.SUCCESS('\nNo report-only backends loaded at startup.'))
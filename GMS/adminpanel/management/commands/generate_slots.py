@@ -0,0 +1,52 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.models import SlotTemplate
+from adminpanel.slot_generator import generate_slots
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = 'Generate booking slots in bulk from a slot template'
+
+    def add_arguments(self, parser):
+        parser.add_argument('template', help='Slot template name or id')
+        parser.add_argument('--start', required=True, help='First date (YYYY-MM-DD)')
+        end = parser.add_mutually_exclusive_group(required=True)
+        end.add_argument('--end', help='Last date (YYYY-MM-DD)')
+        end.add_argument('--days', type=int, help='Number of days from --start')
+
+    def handle(self, *args, **options):
+        ref = options['template']
+        lookup = {'pk': ref} if ref.isdigit() else {'name': ref}
+        try:
+            template = SlotTemplate.objects.get(**lookup)
+        except SlotTemplate.DoesNotExist:
+            raise CommandError(f"Slot template '{ref}' does not exist.")
+
+        start_date = _parse_date(options['start'])
+        if options['end']:
+            end_date = _parse_date(options['end'])
+        else:
+            end_date = start_date + timedelta(days=options['days'] - 1)
+        if end_date < start_date:
+            raise CommandError('End date must not be before start date.')
+
+        started = time.perf_counter()
+        inserted, skipped = generate_slots(template, start_date, end_date)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{template.name}: {start_date} to {end_date} - '
+                f'inserted {inserted}, skipped {skipped} existing ({elapsed:.2f}s)'
+            )
+        )
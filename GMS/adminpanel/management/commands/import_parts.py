@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.parts_io import IMPORT_BATCH_SIZE, ImportFileError, import_parts
+
+
+class Command(BaseCommand):
+    help = 'Import parts from a CSV or XLSX file (same columns as the inventory export)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.csv or .xlsx file')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Parts written per transaction')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = path.rsplit('.', 1)[-1].lower()
+        if fmt not in ('csv', 'xlsx'):
+            raise CommandError('The file must be a .csv or .xlsx file.')
+
+        try:
+            with open(path, 'rb') as file:
+                result = import_parts(file, fmt, batch_size=max(options['batch_size'], 1))
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for row_number, message in result.errors:
+            self.stderr.write(f'row {row_number}: {message}')
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more')
+
+        summary = f'{result.created} created, {result.updated} updated, {result.unchanged} unchanged, {result.failed} skipped.'
+        self.stdout.write(self.style.WARNING(summary) if result.failed else self.style.SUCCESS(summary))
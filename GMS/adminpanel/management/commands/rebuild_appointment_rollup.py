@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.rollup import rebuild_rollup
+from adminpanel.report_cache import invalidate_reports
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the DailyAppointmentRollup table with Appointment (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD), default: all')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD), default: all')
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollup(_parse_date(options['start']), _parse_date(options['end']))
+        invalidate_reports()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt appointment rollup: {rows} row(s).'))
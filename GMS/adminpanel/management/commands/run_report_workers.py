@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.report_jobs import claim_jobs, fail_job, purge_old_jobs, requeue_stale_jobs
+from adminpanel.report_worker import init_worker, run_job
+
+
+class Command(BaseCommand):
+    help = 'Render queued PDF report jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=min(4, os.cpu_count() or 1),
+            help='Worker processes (default: CPU count, at most 4)',
+        )
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue polls')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument(
+            '--stale-after', type=int, default=15 * 60,
+            help='Requeue jobs left running this many seconds by a crashed worker',
+        )
+        parser.add_argument('--keep-days', type=int, default=7, help='Delete finished jobs older than this')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        poll_interval = options['poll_interval']
+
+        requeued = requeue_stale_jobs(options['stale_after'])
+        purged = purge_old_jobs(options['keep_days'])
+        self.stdout.write(f'Requeued {requeued} stale job(s), purged {purged} old job(s).')
+
+        running = {}  # future -> job id
+        done = failed = 0
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+        )
+        try:
+            while True:
+                free = workers - len(running)
+                if free:
+                    for job_id in claim_jobs(free):
+                        running[pool.submit(run_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                finished, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job_id = running.pop(future)
+                    try:
+                        _, status = future.result()
+                    except BrokenProcessPool:
+                        for other in [job_id, *running.values()]:
+                            fail_job(other, 'Report worker process died.')
+                        raise CommandError('A report worker process died; restart run_report_workers.')
+                    except Exception as e:
+                        fail_job(job_id, e)
+                        status = 'failed'
+
+                    if status == 'done':
+                        done += 1
+                    else:
+                        failed += 1
+                    self.stdout.write(f'Report job {job_id}: {status}')
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {done} report(s), {failed} failed.'))
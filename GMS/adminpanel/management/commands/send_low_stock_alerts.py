@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.stock_alerts import alert_recipients, send_low_stock_alerts
+
+
+class Command(BaseCommand):
+    help = 'Email one digest of the parts that dropped to their minimum stock since the last run (run hourly from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List the parts without marking them or sending email')
+
+    def handle(self, *args, **options):
+        recipients = alert_recipients()
+        if not recipients and not options['dry_run']:
+            raise CommandError('No recipients: set LOW_STOCK_ALERT_RECIPIENTS or give a staff user an email address.')
+
+        parts, restocked = send_low_stock_alerts(recipients, dry_run=options['dry_run'])
+
+        for part in parts:
+            self.stdout.write(f'{part.name}: {part.quantity} left, minimum {part.min_stock_level}')
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: {len(parts)} part(s) would be alerted, {restocked} restocked.')
+        elif parts:
+            self.stdout.write(self.style.SUCCESS(
+                f'Alerted {len(parts)} part(s) to {", ".join(recipients)}; {restocked} restocked part(s) re-armed.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'No new low-stock parts; {restocked} restocked part(s) re-armed.'))
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+def backfill_slot_duration(apps, schema_editor):
+    Slot = apps.get_model("adminpanel", "Slot")
+    slots = list(Slot.objects.only("id", "start_time", "end_time"))
+    for slot in slots:
+        start = slot.start_time.hour * 60 + slot.start_time.minute
+        end = slot.end_time.hour * 60 + slot.end_time.minute
+        slot.duration = max(end - start, 0)
+    Slot.objects.bulk_update(slots, ["duration"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slot',
+            name='duration',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Duration in minutes'),
+        ),
+        migrations.RunPython(backfill_slot_duration, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(fields=['date', 'is_booked', 'duration'], name='slot_date_booked_dur_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:05
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0002_slot_duration_slot_slot_date_booked_dur_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClosedDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('reason', models.CharField(blank=True, max_length=150)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlotTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slot_length', models.PositiveIntegerField(default=60, help_text='Slot length in minutes', validators=[django.core.validators.MinValueValidator(5)])),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlotTemplateBreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], help_text='Leave empty to apply every day', null=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='breaks', to='adminpanel.slottemplate')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlotTemplateHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('open_time', models.TimeField()),
+                ('close_time', models.TimeField()),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hours', to='adminpanel.slottemplate')),
+            ],
+            options={
+                'ordering': ['weekday'],
+                'unique_together': {('template', 'weekday')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0003_closeddate_slottemplate_slottemplatebreak_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(db_index=True, max_length=40)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('slot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hold', to='adminpanel.slot')),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 20:02
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_daily_capacity(apps, schema_editor):
+    Slot = apps.get_model("adminpanel", "Slot")
+    DailyCapacity = apps.get_model("adminpanel", "DailyCapacity")
+    rows = (
+        Slot.objects
+        .values("date")
+        .annotate(total=Count("id"), booked=Count("id", filter=Q(is_booked=True)))
+        .order_by()
+    )
+    DailyCapacity.objects.bulk_create(
+        [DailyCapacity(date=r["date"], total=r["total"], booked=r["booked"]) for r in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0004_slothold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total', models.IntegerField(default=0)),
+                ('booked', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily capacity',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.RunPython(populate_daily_capacity, migrations.RunPython.noop),
+    ]
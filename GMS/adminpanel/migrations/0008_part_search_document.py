@@ -0,0 +1,83 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:34
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+
+POSTGRES_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS parts_search_fts_idx ON parts USING gin (to_tsvector('simple', search_document))",
+    "CREATE INDEX IF NOT EXISTS parts_search_trgm_idx ON parts USING gin (search_document gin_trgm_ops)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS parts_search_trgm_idx",
+    "DROP INDEX IF EXISTS parts_search_fts_idx",
+]
+
+# external-content FTS5 table over parts.search_document, kept in step by triggers
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE parts_fts USING fts5("
+    "search_document, content='parts', content_rowid='part_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER parts_fts_ai AFTER INSERT ON parts BEGIN "
+    "INSERT INTO parts_fts(rowid, search_document) VALUES (new.part_id, new.search_document); END",
+    "CREATE TRIGGER parts_fts_ad AFTER DELETE ON parts BEGIN "
+    "INSERT INTO parts_fts(parts_fts, rowid, search_document) VALUES ('delete', old.part_id, old.search_document); END",
+    "CREATE TRIGGER parts_fts_au AFTER UPDATE OF search_document ON parts BEGIN "
+    "INSERT INTO parts_fts(parts_fts, rowid, search_document) VALUES ('delete', old.part_id, old.search_document); "
+    "INSERT INTO parts_fts(rowid, search_document) VALUES (new.part_id, new.search_document); END",
+    "INSERT INTO parts_fts(parts_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS parts_fts_au",
+    "DROP TRIGGER IF EXISTS parts_fts_ad",
+    "DROP TRIGGER IF EXISTS parts_fts_ai",
+    "DROP TABLE IF EXISTS parts_fts",
+]
+
+
+def backfill_search_document(apps, schema_editor):
+    Part = apps.get_model("adminpanel", "Part")
+    InventoryCategory = apps.get_model("adminpanel", "InventoryCategory")
+    Brand = apps.get_model("adminpanel", "Brand")
+
+    def name_of(model, field, fk):
+        return Coalesce(Subquery(model.objects.filter(pk=OuterRef(fk)).values(field)[:1]), Value(""))
+
+    Part.objects.update(search_document=Concat(
+        "name", Value(" "),
+        Coalesce("compatible_model", Value("")), Value(" "),
+        name_of(InventoryCategory, "category_name", "category_id"), Value(" "),
+        name_of(Brand, "brand_name", "brand_id"),
+        output_field=TextField(),
+    ))
+
+
+def create_search_index(apps, schema_editor):
+    statements = {"postgresql": POSTGRES_INDEXES, "sqlite": SQLITE_FTS}.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {"postgresql": POSTGRES_DROP, "sqlite": SQLITE_DROP}.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0007_dailyappointmentrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
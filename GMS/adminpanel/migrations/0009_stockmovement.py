@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    Part = apps.get_model("adminpanel", "Part")
+    StockMovement = apps.get_model("adminpanel", "StockMovement")
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(part_id=part_id, kind="adjust", change=quantity, quantity_after=quantity, note="Opening balance")
+            for part_id, quantity in Part.objects.filter(quantity__gt=0).values_list("pk", "quantity").iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0008_part_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receive', 'Received'), ('consume', 'Consumed'), ('adjust', 'Adjustment'), ('return', 'Returned')], max_length=10)),
+                ('change', models.IntegerField(help_text='Signed change in quantity')),
+                ('quantity_after', models.PositiveIntegerField()),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='adminpanel.part')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['part', 'created_at'], name='stockmove_part_created_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0009_stockmovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlertRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('alerted', models.PositiveIntegerField(default=0)),
+                ('restocked', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='low_stock_alerted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(condition=models.Q(('low_stock_alerted_at__isnull', True), ('quantity__lte', models.F('min_stock_level'))), fields=['updated_at'], name='parts_low_stock_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(condition=models.Q(('low_stock_alerted_at__isnull', False)), fields=['low_stock_alerted_at'], name='parts_low_stock_alerted_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 22:05
+
+import uuid
+
+import adminpanel.models
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def move_report_files(apps, schema_editor):
+    """Move finished PDFs out of MEDIA_ROOT/reports/ into the private report storage, under new names."""
+    ReportJob = apps.get_model("adminpanel", "ReportJob")
+    storage = adminpanel.models.report_storage()
+    for pk, old_name in ReportJob.objects.exclude(file="").values_list("pk", "file"):
+        if not default_storage.exists(old_name):
+            continue
+        with default_storage.open(old_name, "rb") as f:
+            new_name = storage.save(f"{uuid.uuid4().hex}.pdf", f)
+        ReportJob.objects.filter(pk=pk).update(file=new_name)
+        default_storage.delete(old_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0011_backfill_appointment_rollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='file',
+            field=models.FileField(blank=True, storage=adminpanel.models.report_storage, upload_to=adminpanel.models.report_file_name),
+        ),
+        migrations.RunPython(move_report_files, migrations.RunPython.noop),
+    ]
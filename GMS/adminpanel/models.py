@@ -1,5 +1,9 @@
+import os
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.core.validators import MinValueValidator
 
 
@@ -8,18 +12,158 @@ class Slot(models.Model):
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
+    duration = models.PositiveIntegerField(default=0, editable=False, help_text="Duration in minutes")
     is_booked = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["date", "start_time"]
         unique_together = ("date", "start_time", "end_time")
+        indexes = [
+            # availability lookups: free slots of a day long enough for a service
+            models.Index(fields=["date", "is_booked", "duration"], name="slot_date_booked_dur_idx"),
+        ]
 
     def __str__(self):
         status = "Booked" if self.is_booked else "Available"
         return f"{self.date} {self.start_time}-{self.end_time} ({status})"
+
+    @staticmethod
+    def minutes_between(start_time, end_time):
+        """Whole minutes from start_time to end_time (0 if the range is empty)."""
+        start = start_time.hour * 60 + start_time.minute
+        end = end_time.hour * 60 + end_time.minute
+        return max(end - start, 0)
+
+    def save(self, *args, **kwargs):
+        # duration is stored so availability can be filtered in SQL
+        self.duration = self.minutes_between(self.start_time, self.end_time)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ({"start_time", "end_time"} & set(update_fields)):
+            kwargs["update_fields"] = set(update_fields) | {"duration"}
+        super().save(*args, **kwargs)
     
 
+class DailyCapacity(models.Model):
+    """
+    Slot counters per day, kept in step with Slot by adminpanel.capacity so
+    reports and calendars read one row per day instead of counting slots.
+    """
+    date = models.DateField(unique=True)
+    total = models.IntegerField(default=0)
+    booked = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name_plural = "Daily capacity"
+
+    def __str__(self):
+        return f"{self.date}: {self.booked}/{self.total} booked"
+
+    @property
+    def free(self):
+        return self.total - self.booked
+
+
+class DailyAppointmentRollup(models.Model):
+    """
+    Appointment count and revenue per (slot date, service, status), kept in
+    step with Appointment by adminpanel.rollup so reports group a few hundred
+    rows instead of joining every appointment to its slot.
+    """
+    date = models.DateField()
+    service = models.ForeignKey("Service", on_delete=models.CASCADE, related_name="daily_rollups")
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["date"]
+        unique_together = ("date", "service", "status")
+
+    def __str__(self):
+        return f"{self.date} {self.service_id} {self.status}: {self.count}"
+
+
+class SlotHold(models.Model):
+    """Short-lived claim on a slot while a customer session fills in the booking form."""
+    slot = models.OneToOneField(Slot, on_delete=models.CASCADE, related_name="hold")
+    session_key = models.CharField(max_length=40, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.slot} held until {self.expires_at}"
+
+
+WEEKDAY_CHOICES = [
+    (0, "Monday"),
+    (1, "Tuesday"),
+    (2, "Wednesday"),
+    (3, "Thursday"),
+    (4, "Friday"),
+    (5, "Saturday"),
+    (6, "Sunday"),
+]
+
+
+class SlotTemplate(models.Model):
+    """Opening hours + slot length used to generate slot grids in bulk."""
+    name = models.CharField(max_length=100, unique=True)
+    slot_length = models.PositiveIntegerField(
+        default=60, validators=[MinValueValidator(5)], help_text="Slot length in minutes"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"{self.name} ({self.slot_length} min)"
+
+
+class SlotTemplateHours(models.Model):
+    template = models.ForeignKey(SlotTemplate, on_delete=models.CASCADE, related_name="hours")
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    open_time = models.TimeField()
+    close_time = models.TimeField()
+
+    class Meta:
+        ordering = ["weekday"]
+        unique_together = ("template", "weekday")
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.open_time}-{self.close_time}"
+
+
+class SlotTemplateBreak(models.Model):
+    template = models.ForeignKey(SlotTemplate, on_delete=models.CASCADE, related_name="breaks")
+    weekday = models.PositiveSmallIntegerField(
+        choices=WEEKDAY_CHOICES, null=True, blank=True, help_text="Leave empty to apply every day"
+    )
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        ordering = ["weekday", "start_time"]
+
+    def __str__(self):
+        day = self.get_weekday_display() if self.weekday is not None else "Every day"
+        return f"{day} {self.start_time}-{self.end_time}"
+
+
+class ClosedDate(models.Model):
+    date = models.DateField(unique=True)
+    reason = models.CharField(max_length=150, blank=True)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} {self.reason}".strip()
+
+
 class InventoryCategory(models.Model):
     category_id = models.AutoField(primary_key=True)
     category_name = models.CharField(max_length=100, unique=True)
@@ -62,16 +206,52 @@ class Part(models.Model):
     image = models.ImageField(upload_to="parts/", null=True, blank=True)
     description = models.TextField(blank=True, null=True)
 
+    # name, model, category and brand in one column for the search indexes (see part_search)
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    # set when a low-stock digest included this part, cleared once it is restocked (see stock_alerts)
+    low_stock_alerted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "parts"
         ordering = ["-created_at"]
+        indexes = [
+            # only the low-stock parts no digest has reported yet: a handful of rows
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(quantity__lte=models.F("min_stock_level"), low_stock_alerted_at__isnull=True),
+                name="parts_low_stock_pending_idx",
+            ),
+            models.Index(
+                fields=["low_stock_alerted_at"],
+                condition=models.Q(low_stock_alerted_at__isnull=False),
+                name="parts_low_stock_alerted_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def build_search_document(self):
+        return " ".join(filter(None, [
+            self.name,
+            self.compatible_model,
+            self.category.category_name if self.category else None,
+            self.brand.brand_name if self.brand else None,
+        ]))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.search_document = self.build_search_document()
+        elif {"name", "compatible_model", "category", "brand"} & set(update_fields):
+            self.search_document = self.build_search_document()
+            kwargs["update_fields"] = set(update_fields) | {"search_document"}
+        super().save(*args, **kwargs)
+
     @property
     def stock_status_display(self):
         if self.quantity == 0:
@@ -89,6 +269,51 @@ class Part(models.Model):
         return "success"
 
 
+class StockMovement(models.Model):
+    """
+    One change to a part's stock. Part.quantity is only changed through
+    adminpanel.stock.apply_movements(), which writes these rows.
+    """
+    KIND_CHOICES = [
+        ("receive", "Received"),
+        ("consume", "Consumed"),
+        ("adjust", "Adjustment"),
+        ("return", "Returned"),
+    ]
+
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name="movements")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    change = models.IntegerField(help_text="Signed change in quantity")
+    quantity_after = models.PositiveIntegerField()
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["part", "created_at"], name="stockmove_part_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.part} {self.change:+d} ({self.get_kind_display()})"
+
+
+class LowStockAlertRun(models.Model):
+    """One run of the send_low_stock_alerts command; the latest started_at is the next run's watermark."""
+    started_at = models.DateTimeField()
+    alerted = models.PositiveIntegerField(default=0)
+    restocked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M}: {self.alerted} alerted"
+
+
 class JobVacancy(models.Model):
     CATEGORY_CHOICES = [
         ("mechanic", "Mechanic"),
@@ -158,3 +383,93 @@ class Service(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ReportFileStorage(FileSystemStorage):
+    """
+    Rendered report PDFs, under REPORT_FILES_ROOT. That is outside
+    MEDIA_ROOT, so nothing serves them as media; they are only sent by
+    the report_job_download view, behind the admin check.
+    """
+
+    @property
+    def base_url(self):
+        # no URL at all, so FieldFile.url raises rather than pointing at MEDIA_URL
+        return None
+
+    @property
+    def base_location(self):
+        return str(settings.REPORT_FILES_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+_report_storage = ReportFileStorage()
+
+
+def report_storage():
+    return _report_storage
+
+
+def report_file_name(instance, filename):
+    # unguessable, unlike the job's sequential pk
+    return f"{uuid.uuid4().hex}.pdf"
+
+
+class ReportJob(models.Model):
+    """A PDF report rendered in the background by the run_report_workers command."""
+    KIND_CHOICES = [
+        ("full", "Full Report"),
+        ("slots", "Slots Report"),
+        ("appointments", "Appointments Report"),
+        ("customers", "Customers Report"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    # kind + range; identical requests share one pending/running job
+    dedupe_key = models.CharField(max_length=60, editable=False)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    file = models.FileField(upload_to=report_file_name, storage=report_storage, blank=True)
+    error = models.TextField(blank=True)
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="reportjob_status_created_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="reportjob_one_active_per_key",
+            ),
+        ]
+
+    @staticmethod
+    def make_dedupe_key(kind, start_date, end_date):
+        return f"{kind}:{start_date or ''}:{end_date or ''}"
+
+    def save(self, *args, **kwargs):
+        self.dedupe_key = self.make_dedupe_key(self.kind, self.start_date, self.end_date)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.start_date or '…'} to {self.end_date or '…'}) - {self.status}"
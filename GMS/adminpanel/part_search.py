@@ -0,0 +1,112 @@
+"""
+Ranked inventory search.
+
+Part.search_document holds a part's name, compatible model, category and
+brand in one column, so a search reads one table with no joins.
+Part.save() keeps it current. Renaming or deleting a category or brand
+rebuilds it for the parts concerned (receivers below).
+
+Indexes, created by migration 0008:
+- PostgreSQL: a GIN index on to_tsvector('simple', search_document) for
+  prefix full-text matches, and a pg_trgm GIN index for typo-tolerant
+  word similarity. Results are ranked by ts_rank + word_similarity.
+- SQLite: an FTS5 table (parts_fts) kept in step by triggers. Results
+  are ranked by bm25.
+- Anything else: a plain icontains per word, ordered by newest first.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField, OuterRef, Subquery, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Concat
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Brand, InventoryCategory, Part
+
+
+MAX_TERMS = 8
+
+POSTGRES_MATCH = (
+    "(to_tsvector('simple', parts.search_document) @@ to_tsquery('simple', %s)"
+    " OR %s <%% parts.search_document)"
+)
+POSTGRES_RANK = (
+    "ts_rank(to_tsvector('simple', parts.search_document), to_tsquery('simple', %s))"
+    " + word_similarity(%s, parts.search_document)"
+)
+
+
+def search_terms(query):
+    """Lower-cased words of a query; anything else (operators, quotes) is dropped."""
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def search_parts(queryset, query):
+    """Filter a Part queryset to matches for `query`, best first."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        text = " ".join(terms)
+        return (
+            queryset
+            .filter(RawSQL(POSTGRES_MATCH, [tsquery, text], output_field=BooleanField()))
+            .annotate(search_rank=RawSQL(POSTGRES_RANK, [tsquery, text], output_field=FloatField()))
+            .order_by("-search_rank", "-created_at")
+        )
+
+    if connection.vendor == "sqlite":
+        # joined rather than a pk__in subquery, so bm25() runs once per match
+        match = " ".join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            tables=["parts_fts"],
+            where=["parts_fts.rowid = parts.part_id", "parts_fts MATCH %s"],
+            params=[match],
+            select={"search_rank": "bm25(parts_fts)"},
+            order_by=["search_rank", "-created_at"],  # bm25: lower is better
+        )
+
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset
+
+
+def rebuild_search_documents(queryset=None):
+    """Recompute search_document in SQL (one UPDATE) for the given parts, or all."""
+    def name_of(model, field, fk):
+        return Coalesce(Subquery(model.objects.filter(pk=OuterRef(fk)).values(field)[:1]), Value(""))
+
+    queryset = Part.objects.all() if queryset is None else queryset
+    return queryset.update(search_document=Concat(
+        "name", Value(" "),
+        Coalesce("compatible_model", Value("")), Value(" "),
+        name_of(InventoryCategory, "category_name", "category_id"), Value(" "),
+        name_of(Brand, "brand_name", "brand_id"),
+        output_field=TextField(),
+    ))
+
+
+@receiver(post_save, sender=InventoryCategory)
+def _category_saved(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_search_documents(Part.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Brand)
+def _brand_saved(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_search_documents(Part.objects.filter(brand=instance))
+
+
+@receiver(pre_delete, sender=InventoryCategory)
+@receiver(pre_delete, sender=Brand)
+def _category_or_brand_deleted(sender, instance, **kwargs):
+    # the parts are SET_NULL by the delete itself; rebuild them once it has committed
+    field = "category" if sender is InventoryCategory else "brand"
+    ids = list(Part.objects.filter(**{field: instance}).values_list("pk", flat=True))
+    if ids:
+        transaction.on_commit(lambda: rebuild_search_documents(Part.objects.filter(pk__in=ids)))
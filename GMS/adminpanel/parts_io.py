@@ -0,0 +1,414 @@
+"""
+Bulk import and export of the parts catalogue, as CSV or XLSX.
+
+Both directions use the same columns (PART_COLUMNS), so an export can be
+edited and imported back. A row with a part_id updates that part. A row
+without one is matched on its name, compatible model and brand (case
+insensitive): it updates the one part they match, creates a part if
+none does, and is reported as an error if several do. Importing the
+same file twice therefore does not duplicate its parts.
+
+The import reads the file row by row and works in batches:
+- Categories and brands are resolved from name -> instance maps, built
+  with one query each. Names not seen before are created with one
+  bulk_create per batch.
+- Parts matched by name are read with one query per batch.
+- Parts are written with one bulk_create and one bulk_update per batch.
+  Rows identical to the stored part are skipped, and bulk_update only
+  sets the columns that changed in the batch. Each batch is its own
+  transaction.
+
+Rows that fail validation are skipped and reported with their row number.
+They do not stop the rest of the file.
+
+Quantity is only read for new parts, where it becomes their opening
+stock. Stock of existing parts changes through stock movements (see
+stock.apply_movements), never by overwriting it from a file.
+
+bulk_create() and bulk_update() send no signals, so the import fills in
+search_document itself and calls invalidate_stock_counts().
+"""
+import csv
+import io
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .exports import EXPORT_CHUNK_SIZE, _batched, csv_lines
+from .lazy_backends import openpyxl
+from .models import Brand, InventoryCategory, Part, StockMovement
+from .stock import invalidate_stock_counts
+
+
+IMPORT_BATCH_SIZE = 1000
+UPDATE_BATCH_SIZE = 100  # bulk_update's CASE expressions get slow past this
+MAX_REPORTED_ERRORS = 1000  # rows past this still fail, they are only counted
+
+# (column header, field lookup)
+PART_COLUMNS = [
+    ("part_id", "part_id"),
+    ("name", "name"),
+    ("compatible_model", "compatible_model"),
+    ("category", "category__category_name"),
+    ("brand", "brand__brand_name"),
+    ("price", "price"),
+    ("quantity", "quantity"),
+    ("min_stock_level", "min_stock_level"),
+    ("description", "description"),
+]
+REQUIRED_COLUMNS = {"name", "price"}
+UPDATE_FIELDS = [
+    "name", "compatible_model", "category_id", "brand_id", "price", "min_stock_level", "description",
+    "search_document", "updated_at",
+]
+SEARCH_FIELDS = {"name", "compatible_model", "category_id", "brand_id"}  # make up search_document
+
+FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be imported (unreadable, or missing columns)."""
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)  # [(row number, message)], first MAX_REPORTED_ERRORS
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+# ---------------------------------------------------------------- reading
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # spreadsheets store whole numbers as floats
+    return str(value).strip()
+
+
+def _csv_rows(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        yield 1, next(reader)
+    except StopIteration:
+        return
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read the CSV file: {e}")
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ImportFileError(f"Could not read the CSV file near row {reader.line_num}: {e}")
+        if any(row):
+            yield reader.line_num, row
+
+
+def _xlsx_rows(file):
+    try:
+        workbook = openpyxl().load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Could not read the XLSX file: {e}")
+    try:
+        for number, row in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+            if any(cell not in (None, "") for cell in row):
+                yield number, row
+    finally:
+        workbook.close()
+
+
+def read_rows(file, fmt):
+    """Yield (row number, {column: text}) for each data row of an uploaded file."""
+    rows = _csv_rows(file) if fmt == "csv" else _xlsx_rows(file)
+    try:
+        _number, header = next(rows)
+    except StopIteration:
+        raise ImportFileError("The file is empty.")
+
+    header = [_cell(name).lower() for name in header]
+    missing = REQUIRED_COLUMNS - set(header)
+    if missing:
+        raise ImportFileError(f"Missing column{'s' if len(missing) > 1 else ''}: {', '.join(sorted(missing))}.")
+
+    for number, row in rows:
+        yield number, {name: _cell(value) for name, value in zip(header, row) if name}
+
+
+# ---------------------------------------------------------------- parsing
+
+def _text(row, column, max_length, required=False):
+    value = row.get(column, "")
+    if required and not value:
+        raise ValueError(f"{column} is required.")
+    if len(value) > max_length:
+        raise ValueError(f"{column} is longer than {max_length} characters.")
+    return value or None
+
+
+def _whole_number(row, column, default):
+    value = row.get(column, "")
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number.")
+    if number < 0:
+        raise ValueError(f"{column} cannot be negative.")
+    return number
+
+
+def _price(row):
+    value = row.get("price", "")
+    if not value:
+        raise ValueError("price is required.")
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValueError("price must be a number.")
+    if not price.is_finite() or price < 0:
+        raise ValueError("price must be zero or more.")
+    if price.as_tuple().exponent < -2:
+        raise ValueError("price has more than 2 decimal places.")
+    if price >= 10 ** 8:
+        raise ValueError("price is too large.")
+    return price
+
+
+def parse_row(row):
+    """Validated field values for one row; raises ValueError with a readable message."""
+    return {
+        "part_id": _whole_number(row, "part_id", None),
+        "name": _text(row, "name", 150, required=True),
+        "compatible_model": _text(row, "compatible_model", 150),
+        "category": _text(row, "category", 100),
+        "brand": _text(row, "brand", 100),
+        "price": _price(row),
+        "quantity": _whole_number(row, "quantity", 0),
+        "min_stock_level": _whole_number(row, "min_stock_level", 5),
+        "description": row.get("description") or None,
+    }
+
+
+# ---------------------------------------------------------------- writing
+
+class _NameMap:
+    """Case-insensitive name -> instance map of a category or brand table."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.by_name = {getattr(obj, field).lower(): obj for obj in model.objects.all()}
+
+    def create_missing(self, names):
+        """Create the names not in the table yet, in one INSERT and one SELECT."""
+        new = {}
+        for name in names:
+            if name and name.lower() not in self.by_name:
+                new.setdefault(name.lower(), name)
+        if not new:
+            return
+        self.model.objects.bulk_create(
+            [self.model(**{self.field: name}) for name in new.values()], ignore_conflicts=True
+        )
+        # ids are not returned with ignore_conflicts; read the rows back
+        for obj in self.model.objects.filter(**{f"{self.field}__in": new.values()}):
+            self.by_name[getattr(obj, self.field).lower()] = obj
+
+    def get(self, name):
+        return self.by_name[name.lower()] if name else None
+
+
+def _search_document(values, category, brand):
+    return " ".join(filter(None, [
+        values["name"],
+        values["compatible_model"],
+        category.category_name if category else None,
+        brand.brand_name if brand else None,
+    ]))
+
+
+def _natural_key(name, compatible_model, brand):
+    """What identifies a part in a row without a part_id: name, model and brand name, case insensitive."""
+    return name.lower(), (compatible_model or "").lower(), (brand or "").lower()
+
+
+def _parts_by_natural_key(batch):
+    """natural key -> [existing parts], for the rows of the batch without a part_id."""
+    names = {values["name"].lower() for _, values in batch if not values["part_id"]}
+    matches = defaultdict(list)
+    if names:
+        parts = Part.objects.select_related("brand").alias(lower_name=Lower("name")).filter(lower_name__in=names)
+        for part in parts:
+            key = _natural_key(part.name, part.compatible_model, part.brand.brand_name if part.brand else None)
+            matches[key].append(part)
+    return matches
+
+
+def _write_batch(batch, categories, brands, result, user):
+    """Create and update one batch of parsed rows: [(row number, values)]."""
+    existing = Part.objects.in_bulk([values["part_id"] for _, values in batch if values["part_id"]])
+    by_natural_key = _parts_by_natural_key(batch)
+
+    now = timezone.now()
+    to_create, to_update, changed_fields = [], [], set()
+    with transaction.atomic():
+        categories.create_missing(values["category"] for _, values in batch)
+        brands.create_missing(values["brand"] for _, values in batch)
+
+        for number, values in batch:
+            part_id = values["part_id"]
+            if part_id and part_id not in existing:
+                result.add_error(number, f"No part with part_id {part_id}.")
+                continue
+            if part_id:
+                part = existing[part_id]
+            else:
+                key = _natural_key(values["name"], values["compatible_model"], values["brand"])
+                matched = by_natural_key.get(key, [])
+                if len(matched) > 1:
+                    result.add_error(
+                        number, f"{len(matched)} parts match this name, model and brand; add the part_id to pick one."
+                    )
+                    continue
+                part = matched[0] if matched else None
+            category, brand = categories.get(values["category"]), brands.get(values["brand"])
+
+            new = {
+                "name": values["name"],
+                "compatible_model": values["compatible_model"],
+                "category_id": category.pk if category else None,
+                "brand_id": brand.pk if brand else None,
+                "price": values["price"],
+                "min_stock_level": values["min_stock_level"],
+                "description": values["description"],
+            }
+            if part is not None:
+                changed = {name for name, value in new.items() if getattr(part, name) != value}
+                if not changed:
+                    result.unchanged += 1
+                    continue
+                changed_fields |= changed
+                to_update.append(part)
+            else:
+                part = Part(quantity=values["quantity"])
+                to_create.append(part)
+            for name, value in new.items():
+                setattr(part, name, value)
+            part.search_document = _search_document(values, category, brand)
+            part.updated_at = now
+
+        if to_update:
+            # only the columns that changed: bulk_update's cost grows with rows x columns
+            if changed_fields & SEARCH_FIELDS:
+                changed_fields.add("search_document")
+            fields = [name for name in UPDATE_FIELDS if name in changed_fields or name == "updated_at"]
+            Part.objects.bulk_update(to_update, fields, batch_size=UPDATE_BATCH_SIZE)
+        created = Part.objects.bulk_create(to_create)  # PostgreSQL and SQLite return the new ids
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                part=part, kind="receive", change=part.quantity, quantity_after=part.quantity,
+                note="Opening stock (import)", created_by=user,
+            )
+            for part in created if part.quantity
+        ])
+        invalidate_stock_counts()
+
+    result.created += len(to_create)
+    result.updated += len(to_update)
+
+
+def import_parts(file, fmt, user=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import parts from an uploaded CSV or XLSX file; returns an
+    ImportResult. Raises ImportFileError if the file cannot be read at all.
+    """
+    result = ImportResult()
+    categories = _NameMap(InventoryCategory, "category_name")
+    brands = _NameMap(Brand, "brand_name")
+
+    batch, seen_ids, seen_keys = [], set(), set()
+    for number, row in read_rows(file, fmt):
+        try:
+            values = parse_row(row)
+        except ValueError as e:
+            result.add_error(number, str(e))
+            continue
+        if values["part_id"]:
+            if values["part_id"] in seen_ids:
+                result.add_error(number, f"part_id {values['part_id']} appears more than once.")
+                continue
+            seen_ids.add(values["part_id"])
+        else:
+            key = _natural_key(values["name"], values["compatible_model"], values["brand"])
+            if key in seen_keys:
+                result.add_error(number, f"{values['name']} appears more than once with the same model and brand.")
+                continue
+            seen_keys.add(key)
+
+        batch.append((number, values))
+        if len(batch) >= batch_size:
+            _write_batch(batch, categories, brands, result, user)
+            batch = []
+    if batch:
+        _write_batch(batch, categories, brands, result, user)
+    return result
+
+
+# ---------------------------------------------------------------- export
+
+def export_rows():
+    """(headers, iterator of value tuples) for every part, oldest first."""
+    rows = (
+        Part.objects.order_by("part_id")
+        .values_list(*[lookup for _, lookup in PART_COLUMNS])
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return [header for header, _ in PART_COLUMNS], rows
+
+
+def _xlsx_file(headers, rows):
+    """The rows as an XLSX file, written with openpyxl's constant-memory writer."""
+    workbook = openpyxl().Workbook(write_only=True)
+    sheet = workbook.create_sheet("Parts")
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(list(row))
+
+    file = tempfile.TemporaryFile()
+    workbook.save(file)
+    file.seek(0)
+    return file
+
+
+def export_response(fmt):
+    """Every part as a CSV (streamed) or XLSX download, in the import format."""
+    headers, rows = export_rows()
+    filename = f"parts_{timezone.localdate()}.{fmt}"
+    if fmt == "xlsx":
+        return FileResponse(
+            _xlsx_file(headers, rows), as_attachment=True, filename=filename, content_type=FORMATS[fmt]
+        )
+
+    response = StreamingHttpResponse(_batched(csv_lines(headers, rows)), content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,126 @@
+"""
+Chunked PDF rendering for the list reports.
+
+xhtml2pdf lays out the whole document in memory, so its time and memory
+grow faster than the number of table rows. The slots and customers
+reports are therefore split into PDF_CHUNK_ROWS-row chunks. The first
+chunk is rendered with the report's own template (KPIs, chart, first
+rows), the rest with a "continued" template, and the parts are merged
+with pypdf.
+
+The chunks of one report are rendered in a spawned pool of
+PDF_RENDER_PROCESSES processes (by default the CPU count, at most 4),
+on top of the run_report_workers processes; with 1 they are rendered
+one after another in the worker itself. Pool workers load their rows by
+primary key, so only ids cross the process boundary.
+
+Short reports and the other kinds render in one piece. Each process
+compiles the templates once (Django's cached template loader), and the
+chart PNG comes from chart_cache.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+
+from .lazy_backends import pdf_writer
+from .report_builders import REPORTS
+from .utils import PDFRenderError, render_pdf_bytes
+
+
+# kind -> (context name of the rows, template for the chunks after the first)
+LIST_REPORTS = {
+    "slots": ("slots", "adminpanel/pdf/slots_rows_pdf.html"),
+    "customers": ("customers", "adminpanel/pdf/customers_rows_pdf.html"),
+}
+
+
+def render_processes():
+    """PDF_RENDER_PROCESSES, at least 1 (1: render the chunks in this process)."""
+    return max(getattr(settings, "PDF_RENDER_PROCESSES", 1) or 1, 1)
+
+
+def _pdf_pool(chunks):
+    """
+    A pool for one report. It is not kept around: a long-lived pool's idle
+    children would keep a run_report_workers process from ever exiting.
+    """
+    from .report_worker import init_worker
+    return ProcessPoolExecutor(
+        max_workers=min(render_processes(), chunks),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+    )
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_rows_pdf(template, rows_name, model_label, ordering, pks) -> bytes:
+    """One continuation chunk: the rows with these pks, in report order."""
+    rows = apps.get_model(model_label).objects.filter(pk__in=pks).order_by(*ordering)
+    return render_pdf_bytes(template, {rows_name: rows})
+
+
+def merge_pdfs(parts) -> bytes:
+    writer = pdf_writer()()
+    for part in parts:
+        writer.append(BytesIO(part))
+    buf = BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def render_report_pdf(kind, start_date, end_date) -> bytes:
+    """Render a REPORTS entry to PDF, in chunks if it is a long list. Raises PDFRenderError."""
+    from .report_worker import render_rows_chunk
+
+    template, _filename, build_context = REPORTS[kind]
+    context = build_context(start_date, end_date)
+    if kind not in LIST_REPORTS:
+        return render_pdf_bytes(template, context)
+
+    rows_name, rows_template = LIST_REPORTS[kind]
+    rows = context[rows_name]
+    chunks = _chunks(rows.values_list("pk", flat=True).iterator(), getattr(settings, "PDF_CHUNK_ROWS", 1000))
+    first = next(chunks, [])
+    second = next(chunks, None)
+    if second is None:
+        return render_pdf_bytes(template, context)
+
+    rest = [second, *chunks]
+    ordering = rows.query.order_by
+    label = rows.model._meta.label
+    head_context = {**context, rows_name: rows.filter(pk__in=first)}
+    if render_processes() == 1:
+        parts = [
+            render_pdf_bytes(template, head_context),
+            *(render_rows_pdf(rows_template, rows_name, label, ordering, pks) for pks in rest),
+        ]
+        return merge_pdfs(parts)
+
+    with _pdf_pool(len(rest)) as pool:
+        futures = [
+            pool.submit(render_rows_chunk, rows_template, rows_name, label, ordering, pks)
+            for pks in rest
+        ]
+        try:
+            head = render_pdf_bytes(template, head_context)
+            parts = [head, *(future.result() for future in futures)]
+        except BrokenProcessPool:
+            raise PDFRenderError("A PDF worker process died.")
+        finally:
+            for future in futures:
+                future.cancel()
+    return merge_pdfs(parts)
@@ -0,0 +1,183 @@
+"""
+Template contexts for the PDF reports.
+
+REPORTS maps a report kind to (template, download filename, context
+builder). They are only rendered by run_report_workers, in background
+worker processes; the download views queue a job (see report_jobs).
+
+CHARTS describes each chart as plain labels and values. The reports page
+fetches that as JSON and draws it in the browser; only the PDFs
+rasterise it to PNG.
+"""
+from functools import partial
+
+from .models import Slot
+from .report_charts import make_bar_chart, make_pie_chart, render_charts
+from .report_cache import cached_report_metrics
+from .report_metrics import filtered_appointments, filtered_customers
+
+
+def slot_utilization_data(metrics):
+    return {
+        "type": "pie",
+        "title": "Slot Utilization",
+        "labels": ["Booked", "Available"],
+        "values": [metrics.booked_slots, metrics.available_slots],
+    }
+
+
+def appointment_status_data(metrics):
+    status = metrics.appointment_status
+    return {
+        "type": "bar",
+        "title": "Appointments by Status",
+        "labels": ["Pending", "Confirmed", "Completed", "Cancelled"],
+        "values": [status["pending"], status["confirmed"], status["completed"], status["cancelled"]],
+        "ylabel": "Count",
+    }
+
+
+def appointments_per_day_data(metrics):
+    return {
+        "type": "bar",
+        "title": "Appointments per Day",
+        "labels": [str(day) for day, _ in metrics.daily_appointments],
+        "values": [total for _, total in metrics.daily_appointments],
+        "xlabel": "Date",
+        "ylabel": "Appointments",
+    }
+
+
+def customer_verification_data(metrics):
+    return {
+        "type": "pie",
+        "title": "Customer Verification (in range)",
+        "labels": ["Verified", "Not Verified"],
+        "values": [metrics.verified_customers, metrics.unverified_customers],
+    }
+
+
+# context name -> (chart data builder, report_metrics sections it reads)
+CHARTS = {
+    "slot_pie": (slot_utilization_data, ("slots",)),
+    "status_bar": (appointment_status_data, ("appointments",)),
+    "appt_daily_bar": (appointments_per_day_data, ("daily",)),
+    "customers_verify_pie": (customer_verification_data, ("customers",)),
+}
+
+
+def chart_sections(names):
+    return tuple({section for name in names for section in CHARTS[name][1]})
+
+
+def chart_data(metrics, names):
+    """Labels and values of the named charts, for drawing them in the browser."""
+    return {name: CHARTS[name][0](metrics) for name in names}
+
+
+def chart_png(data):
+    """Rasterise one chart_data() entry to a base64 PNG (cached)."""
+    if data["type"] == "pie":
+        return make_pie_chart(data["labels"], data["values"], data["title"])
+    return make_bar_chart(
+        data["labels"], data["values"], data["title"],
+        xlabel=data.get("xlabel", ""), ylabel=data.get("ylabel", ""),
+    )
+
+
+def report_charts(metrics, names):
+    """Render the named charts of one report concurrently; returns {context name: PNG}."""
+    return render_charts({name: partial(chart_png, data) for name, data in chart_data(metrics, names).items()})
+
+
+def filter_slots(slots_qs, start_date, end_date):
+    if start_date and end_date:
+        return slots_qs.filter(date__range=[start_date, end_date])
+    if start_date:
+        return slots_qs.filter(date__gte=start_date)
+    if end_date:
+        return slots_qs.filter(date__lte=end_date)
+    return slots_qs
+
+
+def full_report_context(start_date, end_date):
+    metrics = cached_report_metrics(start_date, end_date)
+    return {
+        "title": "e-Garage Full Report",
+        "start_date": start_date,
+        "end_date": end_date,
+
+        "total_slots": metrics.total_slots,
+        "booked_slots": metrics.booked_slots,
+        "available_slots": metrics.available_slots,
+        "utilization": metrics.utilization,
+
+        "total_appointments": metrics.total_appointments,
+        "appointment_status": metrics.appointment_status,
+        "revenue": metrics.revenue,
+
+        "customers_in_range": metrics.total_customers,
+
+        **report_charts(metrics, ["slot_pie", "status_bar", "appt_daily_bar", "customers_verify_pie"]),
+
+        "appointments": (
+            filtered_appointments(start_date, end_date)
+            .select_related("user", "vehicle", "slot")
+            .order_by("-created_at")[:25]
+        ),
+    }
+
+
+def slots_report_context(start_date, end_date):
+    metrics = cached_report_metrics(start_date, end_date, sections=("slots",))
+    return {
+        "title": "Slots Report",
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_slots": metrics.total_slots,
+        "booked_slots": metrics.booked_slots,
+        "available_slots": metrics.available_slots,
+        "utilization": metrics.utilization,
+        **report_charts(metrics, ["slot_pie"]),
+        "slots": filter_slots(Slot.objects.all(), start_date, end_date).order_by("-date", "start_time", "pk"),
+    }
+
+
+def appointments_report_context(start_date, end_date):
+    metrics = cached_report_metrics(start_date, end_date, sections=("appointments", "daily"))
+    appointments = (
+        filtered_appointments(start_date, end_date)
+        .select_related("user", "vehicle", "slot")
+        .order_by("-created_at")
+    )
+    return {
+        "title": "Appointments Report",
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_appointments": metrics.total_appointments,
+        "appointment_status": metrics.appointment_status,
+        **report_charts(metrics, ["status_bar", "appt_daily_bar"]),
+        "appointments": appointments[:40],  # keep pdf smaller
+    }
+
+
+def customers_report_context(start_date, end_date):
+    metrics = cached_report_metrics(start_date, end_date, sections=("customers",))
+    return {
+        "title": "Customers Report",
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_customers": metrics.total_customers,
+        "verified_yes": metrics.verified_customers,
+        "verified_no": metrics.unverified_customers,
+        **report_charts(metrics, ["customers_verify_pie"]),
+        "customers": filtered_customers(start_date, end_date).order_by("name", "pk"),
+    }
+
+
+REPORTS = {
+    "full": ("adminpanel/pdf/report_full_pdf.html", "e_garage_full_report.pdf", full_report_context),
+    "slots": ("adminpanel/pdf/slots_report_pdf.html", "slots_report.pdf", slots_report_context),
+    "appointments": ("adminpanel/pdf/appointments_report_pdf.html", "appointments_report.pdf", appointments_report_context),
+    "customers": ("adminpanel/pdf/customers_report_pdf.html", "customers_report.pdf", customers_report_context),
+}
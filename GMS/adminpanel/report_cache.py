@@ -0,0 +1,144 @@
+"""
+Cached report results, keyed by (report, start, end) and a data version.
+
+Saving or deleting a Slot, Appointment or Users row bumps the data
+version once the transaction commits (see the receivers below), so a
+range that includes today or later is recomputed after any change. A
+closed range, one that ends before today, can only change when a row
+dated in the past is edited. Its key uses a separate history version,
+bumped only by such edits, and is kept for a day.
+
+A version starts from the clock (in nanoseconds), not from 1. If the
+cache evicts a version key, the new version is still higher than any
+earlier one, so entries stored under an old version are never read
+again.
+
+get_or_compute() lets one request compute a missing entry while
+concurrent requests for the same key wait for it, so a burst of reloads
+costs one computation.
+
+All of this assumes the cache is shared by every process (see CACHES in
+settings). With a per-process cache such as locmem, a version bump only
+reaches the process that made it, the others keep serving stale reports,
+and each process computes a missing entry on its own.
+
+Bulk writes (queryset.update(), bulk_create()) send no signals, so code
+doing them on these tables calls invalidate_reports() itself.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from customer.models import Appointment, Users
+
+from .models import Slot
+from .report_metrics import SECTIONS, report_metrics
+
+
+REPORT_CACHE_TIMEOUT = 60 * 10  # seconds, for ranges that include today
+HISTORY_CACHE_TIMEOUT = 60 * 60 * 24  # seconds, for closed ranges
+LOCK_TIMEOUT = 60  # seconds; frees the lock if the computing process dies
+WAIT_INTERVAL = 0.05  # seconds between polls while another request computes
+DATA_VERSION_KEY = "report-cache:data-version"
+HISTORY_VERSION_KEY = "report-cache:history-version"
+
+_MISSING = object()
+
+
+def _version(key):
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_reports(days=None):
+    """
+    Expire cached reports once the current transaction commits. Closed
+    ranges are expired too if `days`, the dates the change touched,
+    includes one before today or an unknown (None) date, or is None.
+    """
+    today = timezone.localdate()
+    history = days is None or any(day is None or day < today for day in days)
+
+    def bump():
+        _bump(DATA_VERSION_KEY)
+        if history:
+            _bump(HISTORY_VERSION_KEY)
+    transaction.on_commit(bump)
+
+
+def report_cache_key(kind, start_date, end_date):
+    """(cache key, timeout) for a report over a date range."""
+    if end_date is not None and end_date < timezone.localdate():
+        return f"report-cache:{kind}:{start_date}:{end_date}:h{_version(HISTORY_VERSION_KEY)}", HISTORY_CACHE_TIMEOUT
+    return f"report-cache:{kind}:{start_date}:{end_date}:d{_version(DATA_VERSION_KEY)}", REPORT_CACHE_TIMEOUT
+
+
+def get_or_compute(kind, start_date, end_date, compute):
+    """Cached compute() result for the range; only one caller computes a missing entry."""
+    key, timeout = report_cache_key(kind, start_date, end_date)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock = f"{key}:lock"
+    while not cache.add(lock, 1, LOCK_TIMEOUT):
+        time.sleep(WAIT_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    try:
+        # it may have been stored between our first get() and taking the lock
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock)
+    return value
+
+
+def cached_report_metrics(start_date=None, end_date=None, sections=SECTIONS):
+    """report_metrics() through the cache."""
+    return get_or_compute(
+        f"metrics:{','.join(sorted(sections))}", start_date, end_date,
+        lambda: report_metrics(start_date, end_date, sections),
+    )
+
+
+def _local_date(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _appointment_day(appointment):
+    try:
+        return appointment.slot.date
+    except Slot.DoesNotExist:
+        return None
+
+
+@receiver([post_save, post_delete], sender=Slot)
+def _slot_changed(sender, instance, **kwargs):
+    invalidate_reports([instance.date])
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def _appointment_changed(sender, instance, **kwargs):
+    invalidate_reports([_appointment_day(instance)])
+
+
+@receiver([post_save, post_delete], sender=Users)
+def _user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return  # every login saves last_login; no report shows it
+    invalidate_reports([_local_date(instance.date_joined)])
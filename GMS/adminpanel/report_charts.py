@@ -1,17 +1,36 @@
+"""
+Report charts as base64 PNGs.
+
+Charts are drawn on their own Figure with a FigureCanvasAgg, never
+through pyplot, so there is no global figure state: any number of
+threads can render at once and a figure is freed as soon as it goes out
+of scope. render_charts() renders the charts of one report in parallel.
+"""
 import base64
 import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from io import BytesIO
 
-import matplotlib
-matplotlib.use("Agg")  # server-safe (no GUI)
+from django.conf import settings
 
-import matplotlib.pyplot as plt
+from .chart_cache import chart_cache, chart_key
+from .lazy_backends import agg
+
+
+DEFAULT_SIZE = (6.4, 4.8)  # inches, rendered at dpi=150
+
+
+def new_figure(size=DEFAULT_SIZE):
+    Figure, FigureCanvasAgg = agg()
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    return fig
 
 
 def fig_to_base64(fig) -> str:
     buf = BytesIO()
     fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-    plt.close(fig)
     return base64.b64encode(buf.getvalue()).decode("utf-8")
 
 
@@ -36,7 +55,34 @@ def _safe_numbers(values):
     return safe
 
 
-def make_pie_chart(labels, values, title: str) -> str:
+def render_pie_chart(labels, values, title: str, size=DEFAULT_SIZE) -> str:
+    """Draw a pie chart (uncached); see make_pie_chart()."""
+    fig = new_figure(size)
+    ax = fig.add_subplot()
+    ax.set_title(title)
+    ax.pie(values, labels=labels, autopct="%1.0f%%")
+    return fig_to_base64(fig)
+
+
+def render_bar_chart(labels, values, title: str, xlabel: str = "", ylabel: str = "", size=DEFAULT_SIZE) -> str:
+    """Draw a bar chart (uncached); see make_bar_chart()."""
+    fig = new_figure(size)
+    ax = fig.add_subplot()
+    ax.set_title(title)
+    ax.bar(labels, values)
+
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+
+    ax.tick_params(axis="x", labelrotation=25)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    return fig_to_base64(fig)
+
+
+def make_pie_chart(labels, values, title: str, size=DEFAULT_SIZE) -> str:
     values = _safe_numbers(values)
 
     # If all values are 0, pie chart breaks -> show "No Data"
@@ -44,27 +90,36 @@ def make_pie_chart(labels, values, title: str) -> str:
         labels = ["No Data"]
         values = [1]
 
-    fig = plt.figure()
-    plt.title(title)
-    plt.pie(values, labels=labels, autopct="%1.0f%%")
-    return fig_to_base64(fig)
+    return chart_cache.get_or_render(
+        chart_key("pie", title, labels, values, size),
+        lambda: render_pie_chart(labels, values, title, size),
+    )
 
 
-def make_bar_chart(labels, values, title: str, xlabel: str = "", ylabel: str = "") -> str:
+def make_bar_chart(labels, values, title: str, xlabel: str = "", ylabel: str = "", size=DEFAULT_SIZE) -> str:
     values = _safe_numbers(values)
 
     if not labels:
         labels = ["No Data"]
         values = [0]
 
-    fig = plt.figure()
-    plt.title(title)
-    plt.bar(labels, values)
+    return chart_cache.get_or_render(
+        chart_key("bar", title, [labels, xlabel, ylabel], values, size),
+        lambda: render_bar_chart(labels, values, title, xlabel, ylabel, size),
+    )
+
+
+@cache
+def _chart_pool():
+    return ThreadPoolExecutor(
+        max_workers=getattr(settings, "CHART_RENDER_THREADS", 4), thread_name_prefix="chart"
+    )
 
-    if xlabel:
-        plt.xlabel(xlabel)
-    if ylabel:
-        plt.ylabel(ylabel)
 
-    plt.xticks(rotation=25, ha="right")
-    return fig_to_base64(fig)
\ No newline at end of file
+def render_charts(charts):
+    """
+    Render {name: zero-argument callable} concurrently; returns {name: result}.
+    Used for the several charts of one report.
+    """
+    futures = {name: _chart_pool().submit(build) for name, build in charts.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,100 @@
+"""
+Background PDF report jobs.
+
+submit_report() queues a ReportJob, or returns the pending/running job
+for the same report and date range (a partial unique constraint on
+dedupe_key makes this race-free). The run_report_workers command claims
+pending jobs and renders them in a process pool (see report_worker);
+render_job() is what each worker process runs. Finished PDFs are stored
+under REPORT_FILES_ROOT with random names (see ReportFileStorage), outside
+MEDIA_ROOT; only report_job_download serves them.
+"""
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ReportJob
+
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def submit_report(kind, start_date, end_date, user=None):
+    """Returns (job, created)."""
+    key = ReportJob.make_dedupe_key(kind, start_date, end_date)
+    active = ReportJob.objects.filter(dedupe_key=key, status__in=ACTIVE_STATUSES)
+
+    job = active.first()
+    if job:
+        return job, False
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                kind=kind, start_date=start_date, end_date=end_date, requested_by=user
+            )
+        return job, True
+    except IntegrityError:
+        # an identical job was queued in between
+        return active.get(), False
+
+
+def claim_jobs(limit):
+    """Mark up to `limit` of the oldest pending jobs as running and return their ids."""
+    with transaction.atomic():
+        ids = list(
+            ReportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if ids:
+            ReportJob.objects.filter(id__in=ids).update(status="running", started_at=timezone.now())
+    return ids
+
+
+def fail_job(job_id, error):
+    ReportJob.objects.filter(pk=job_id).update(
+        status="failed", error=str(error)[:2000], finished_at=timezone.now()
+    )
+
+
+def render_job(job_id):
+    """Render one claimed job to a PDF file. Runs inside a worker process."""
+    from .pdf_chunks import render_report_pdf
+
+    job = ReportJob.objects.get(pk=job_id)
+    try:
+        pdf = render_report_pdf(job.kind, job.start_date, job.end_date)
+    except Exception as e:
+        fail_job(job_id, e)
+        return job_id, "failed"
+
+    job.file.save(f"{job.kind}.pdf", ContentFile(pdf), save=False)  # stored under a random name
+    job.status = "done"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["file", "status", "finished_at"])
+    return job_id, "done"
+
+
+def requeue_stale_jobs(timeout):
+    """Put jobs left running longer than `timeout` seconds (crashed worker) back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return (
+        ReportJob.objects
+        .filter(status="running", started_at__lt=cutoff)
+        .update(status="pending", started_at=None)
+    )
+
+
+def purge_old_jobs(days):
+    """Delete finished or failed jobs (and their files) older than `days` days."""
+    cutoff = timezone.now() - timedelta(days=days)
+    old = list(ReportJob.objects.filter(status__in=["done", "failed"], created_at__lt=cutoff))
+    for job in old:
+        if job.file:
+            job.file.delete(save=False)
+    ReportJob.objects.filter(id__in=[job.id for job in old]).delete()
+    return len(old)
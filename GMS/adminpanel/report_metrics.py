@@ -0,0 +1,116 @@
+"""
+Report KPIs for a date range.
+
+Every table is read once: slot totals come from the DailyCapacity
+counters, appointment KPIs and the per-day series from the
+DailyAppointmentRollup rows (a few per day rather than every
+appointment joined to its slot), and customer KPIs from one conditional
+aggregate. Endpoints ask only for the sections they show.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+
+from customer.models import Appointment
+
+from .capacity import capacity_totals
+from .models import DailyAppointmentRollup
+
+
+SECTIONS = ("slots", "appointments", "customers", "daily")
+APPOINTMENT_STATUSES = ("Pending", "Confirmed", "Completed", "Cancelled")
+
+
+@dataclass(frozen=True)
+class ReportMetrics:
+    start_date: date | None
+    end_date: date | None
+
+    total_slots: int = 0
+    booked_slots: int = 0
+
+    total_appointments: int = 0
+    appointment_status: dict = field(default_factory=dict)  # lower-case status -> count
+    revenue: Decimal = Decimal("0")  # price of every appointment that is not cancelled
+
+    total_customers: int = 0
+    verified_customers: int = 0
+
+    daily_appointments: list = field(default_factory=list)  # [(date, count)] by date
+
+    @property
+    def available_slots(self):
+        return self.total_slots - self.booked_slots
+
+    @property
+    def utilization(self):
+        """Booked share of slots in percent, rounded to 2 places."""
+        return round(self.booked_slots / self.total_slots * 100, 2) if self.total_slots else 0
+
+    @property
+    def unverified_customers(self):
+        return self.total_customers - self.verified_customers
+
+
+def _range_filter(field_name, start_date, end_date):
+    lookups = {}
+    if start_date:
+        lookups[f"{field_name}__gte"] = start_date
+    if end_date:
+        lookups[f"{field_name}__lte"] = end_date
+    return lookups
+
+
+def filtered_appointments(start_date=None, end_date=None):
+    """Appointments whose slot falls in the range."""
+    return Appointment.objects.filter(**_range_filter("slot__date", start_date, end_date))
+
+
+def filtered_customers(start_date=None, end_date=None):
+    """Customers who registered in the range."""
+    return get_user_model().objects.filter(
+        role="Customer", **_range_filter("date_joined__date", start_date, end_date)
+    )
+
+
+def report_metrics(start_date=None, end_date=None, sections=SECTIONS):
+    """
+    Compute the requested sections (see SECTIONS) for a date range with
+    one query per section.
+    """
+    values = {}
+
+    if "slots" in sections:
+        values["total_slots"], values["booked_slots"] = capacity_totals(start_date, end_date)
+
+    rollup = DailyAppointmentRollup.objects.filter(**_range_filter("date", start_date, end_date))
+    if "appointments" in sections:
+        totals = rollup.aggregate(
+            total=Sum("count"),
+            revenue=Sum("revenue", filter=~Q(status="Cancelled")),
+            **{s.lower(): Sum("count", filter=Q(status=s)) for s in APPOINTMENT_STATUSES},
+        )
+        values["total_appointments"] = totals.pop("total") or 0
+        values["revenue"] = totals.pop("revenue") or Decimal("0")
+        values["appointment_status"] = {status: count or 0 for status, count in totals.items()}
+
+    if "customers" in sections:
+        totals = filtered_customers(start_date, end_date).aggregate(
+            total=Count("id"),
+            verified=Count("id", filter=Q(is_verified=True)),
+        )
+        values["total_customers"] = totals["total"]
+        values["verified_customers"] = totals["verified"]
+
+    if "daily" in sections:
+        values["daily_appointments"] = list(
+            rollup
+            .values_list("date")
+            .annotate(total=Sum("count"))
+            .order_by("date")
+        )
+
+    return ReportMetrics(start_date=start_date, end_date=end_date, **values)
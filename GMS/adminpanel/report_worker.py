@@ -0,0 +1,23 @@
+"""
+Entry points for the run_report_workers process pool and the chunked PDF
+pool (see pdf_chunks).
+
+Workers are spawned rather than forked, so they never share the parent's
+database connections. A spawned process unpickles these functions before
+Django is set up, so this module must not import models at import time.
+"""
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def run_job(job_id):
+    from .report_jobs import render_job
+    return render_job(job_id)
+
+
+def render_rows_chunk(template, rows_name, model_label, ordering, pks):
+    from .pdf_chunks import render_rows_pdf
+    return render_rows_pdf(template, rows_name, model_label, ordering, pks)
@@ -0,0 +1,92 @@
+"""
+Per-day appointment rollup (DailyAppointmentRollup).
+
+Booking, cancellation and every other appointment status change record
+the change here inside their own transaction, with F() increments like
+adminpanel.capacity. rebuild_rollup() reconciles the table (or a date
+range of it) from Appointment with one INSERT ... SELECT; run it nightly
+with the rebuild_appointment_rollup command. Migration 0011 runs the same
+query once, to fill the table with the appointments made before it.
+
+Revenue is the service price at the time of the change; a later price
+change is picked up by the next rebuild.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from customer.models import Appointment
+
+from .models import DailyAppointmentRollup, Service, Slot
+
+
+def _bump(day, service_id, status, count, revenue):
+    changes = {"count": F("count") + count, "revenue": F("revenue") + revenue}
+    row = DailyAppointmentRollup.objects.filter(date=day, service_id=service_id, status=status)
+    if row.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyAppointmentRollup.objects.create(
+                date=day, service_id=service_id, status=status, count=count, revenue=revenue
+            )
+    except IntegrityError:
+        # another transaction created the row first
+        row.update(**changes)
+
+
+def record_appointment(appointment, count=1):
+    """A new appointment (count=-1 to take one out)."""
+    price = appointment.service.price
+    _bump(appointment.slot.date, appointment.service_id, appointment.status, count, price * count)
+
+
+def record_status_change(appointment, old_status):
+    """Move an appointment from old_status to its current status."""
+    if old_status == appointment.status:
+        return
+    price = appointment.service.price
+    day = appointment.slot.date
+    _bump(day, appointment.service_id, old_status, -1, -price)
+    _bump(day, appointment.service_id, appointment.status, 1, price)
+
+
+def rebuild_rollup(start_date=None, end_date=None):
+    """
+    Recompute the rollup from Appointment for a date range (everything if
+    open-ended) with a single INSERT ... SELECT. Returns the rows written.
+    """
+    qn = connection.ops.quote_name
+    rollup = qn(DailyAppointmentRollup._meta.db_table)
+    appointment = qn(Appointment._meta.db_table)
+    slot = qn(Slot._meta.db_table)
+    service = qn(Service._meta.db_table)
+    columns = ", ".join(qn(c) for c in ("date", "service_id", "status", "count", "revenue"))
+
+    existing = DailyAppointmentRollup.objects.all()
+    where, params = [], []
+    if start_date:
+        existing = existing.filter(date__gte=start_date)
+        where.append("s.date >= %s")
+        params.append(start_date)
+    if end_date:
+        existing = existing.filter(date__lte=end_date)
+        where.append("s.date <= %s")
+        params.append(end_date)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    with transaction.atomic():
+        existing.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {rollup} ({columns})
+                SELECT s.date, a.service_id, a.status, COUNT(*), SUM(sv.price)
+                FROM {appointment} a
+                JOIN {slot} s ON s.id = a.slot_id
+                JOIN {service} sv ON sv.id = a.service_id
+                {where_sql}
+                GROUP BY s.date, a.service_id, a.status
+                """,
+                params,
+            )
+            return cursor.rowcount
@@ -0,0 +1,198 @@
+"""
+Live slot availability events (Server-Sent Events).
+
+Booking code publishes slot booked/freed changes to an in-process broker
+once the transaction commits; every open stream for that date receives
+them. Changes made by other worker processes are picked up by one
+poller thread per process (SlotPoller). Every SLOT_EVENTS_POLL_INTERVAL
+seconds it reads the slots of all dates that have open streams in one
+query, and publishes whatever changed through the same broker. The cost
+of polling therefore grows with the number of dates watched, not the
+number of connections. The thread starts with the first stream and
+exits when the last one closes.
+
+The stream is an async generator that never ends, so it is only served
+through the ASGI application (GMS/asgi.py). Under WSGI, reading it would
+pin a worker thread per open page. The slot_events view answers 204 there
+instead, and the booking page falls back to polling.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from .models import Slot
+
+
+QUEUE_SIZE = 100
+KEEPALIVE = ": keep-alive\n\n"
+
+
+class SlotEventBroker:
+    """Fan-out of slot events to the asyncio queues subscribed to a date."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # date -> {queue: loop}
+
+    def subscribe(self, day):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(day, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, day, queue):
+        with self._lock:
+            queues = self._subscribers.get(day, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(day, None)
+
+    def days(self):
+        """Dates that have at least one open stream."""
+        with self._lock:
+            return set(self._subscribers)
+
+    def publish(self, day, event):
+        """Thread-safe: may be called from sync views running in worker threads."""
+        with self._lock:
+            targets = list(self._subscribers.get(day, {}).items())
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue, event):
+    # a slow client drops events; its next poll resynchronises it
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+broker = SlotEventBroker()
+
+
+def _event(day, changes):
+    return {
+        "date": day.isoformat(),
+        "slots": [{"id": slot_id, "is_booked": is_booked} for slot_id, is_booked in changes.items()],
+    }
+
+
+class SlotPoller:
+    """The one thread per process that polls the watched dates for changes made elsewhere."""
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+        self._known = {}  # date -> {slot id: is_booked}
+        self._recorded = 0  # bumped by record()
+
+    def ensure_running(self):
+        """Start the thread if it is not running; a new date gets its baseline right away."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slot-events-poller", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        poll_interval = getattr(settings, "SLOT_EVENTS_POLL_INTERVAL", 5)
+        try:
+            while True:
+                with self._lock:
+                    if not self._broker.days():
+                        # checked under the lock, so a stream subscribing now starts a new thread
+                        self._thread = None
+                        self._known.clear()
+                        return
+                try:
+                    self.poll()
+                except DatabaseError:
+                    connection.close()  # reconnect on the next poll
+                self._wake.wait(poll_interval)
+                self._wake.clear()
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():  # died: let the next stream restart it
+                    self._thread = None
+            connection.close()
+
+    def poll(self):
+        """
+        Read the slots of every watched date in one query and publish what
+        changed since the last poll. A date seen for the first time only
+        records its baseline.
+        """
+        days = self._broker.days()
+        with self._lock:
+            recorded = self._recorded
+        current = {day: {} for day in days}
+        for day, slot_id, is_booked in Slot.objects.filter(date__in=days).values_list("date", "id", "is_booked"):
+            current[day][slot_id] = is_booked
+
+        events = []
+        with self._lock:
+            if self._recorded != recorded:
+                return  # a change of ours committed during the query; this snapshot may predate it
+            for day, slots in current.items():
+                known = self._known.get(day)
+                if known is not None:
+                    changed = {
+                        slot_id: is_booked for slot_id, is_booked in slots.items() if known.get(slot_id) != is_booked
+                    }
+                    if changed:
+                        events.append((day, _event(day, changed)))
+            self._known = current
+        for day, event in events:
+            self._broker.publish(day, event)
+
+    def record(self, day, changes):
+        """Note changes already published by this process, so the next poll does not repeat them."""
+        with self._lock:
+            self._recorded += 1
+            if day in self._known:
+                self._known[day].update(changes)
+
+
+poller = SlotPoller(broker)
+
+
+def publish_slot_changes(day, changes):
+    """
+    Announce {slot_id: is_booked} changes for a date after the current
+    transaction commits.
+    """
+    event = _event(day, changes)
+
+    def publish():
+        poller.record(day, changes)
+        broker.publish(day, event)
+    transaction.on_commit(publish)
+
+
+def _format(event):
+    return f"event: slots\ndata: {json.dumps(event)}\n\n"
+
+
+async def slot_event_stream(day):
+    """Async generator of SSE messages for one date."""
+    poll_interval = getattr(settings, "SLOT_EVENTS_POLL_INTERVAL", 5)
+    queue = broker.subscribe(day)
+    try:
+        poller.ensure_running()
+        yield f"retry: {int(poll_interval * 1000)}\n\n"
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            yield _format(event)
+    finally:
+        broker.unsubscribe(day, queue)
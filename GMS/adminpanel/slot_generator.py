@@ -0,0 +1,94 @@
+"""
+Bulk slot-grid generation from a SlotTemplate.
+
+Slots for the whole range are built in memory and written with
+bulk_create(ignore_conflicts=True); rows that already exist are skipped
+by the (date, start_time, end_time) unique constraint.
+"""
+from datetime import time, timedelta
+
+from django.db import transaction
+
+from .availability import invalidate_dates
+from .capacity import rebuild_capacity
+from .models import Slot, ClosedDate
+from .report_cache import invalidate_reports
+
+
+BULK_BATCH_SIZE = 1000
+
+
+def _to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def _day_slots(open_min, close_min, length, breaks):
+    """(start, end) minute pairs for one day, stepping past any break a slot would overlap."""
+    start = open_min
+    while start + length <= close_min:
+        end = start + length
+        clash = next((b for b in breaks if start < b[1] and b[0] < end), None)
+        if clash:
+            start = clash[1]
+            continue
+        yield start, end
+        start = end
+
+
+def build_slots(template, start_date, end_date):
+    """Unsaved Slot objects for every open day in [start_date, end_date]."""
+    length = template.slot_length
+    hours = {
+        h.weekday: (_to_minutes(h.open_time), _to_minutes(h.close_time))
+        for h in template.hours.all()
+    }
+    breaks = [
+        (b.weekday, _to_minutes(b.start_time), _to_minutes(b.end_time))
+        for b in template.breaks.all()
+    ]
+    closed = set(
+        ClosedDate.objects.filter(date__range=[start_date, end_date]).values_list("date", flat=True)
+    )
+
+    slots = []
+    day = start_date
+    while day <= end_date:
+        weekday = day.weekday()
+        if day not in closed and weekday in hours:
+            open_min, close_min = hours[weekday]
+            day_breaks = [(s, e) for w, s, e in breaks if w is None or w == weekday]
+            for start, end in _day_slots(open_min, close_min, length, day_breaks):
+                slots.append(Slot(
+                    date=day,
+                    start_time=_to_time(start),
+                    end_time=_to_time(end),
+                    duration=length,
+                ))
+        day += timedelta(days=1)
+    return slots
+
+
+def generate_slots(template, start_date, end_date):
+    """
+    Insert the template's slot grid for a date range.
+    Returns (inserted, skipped) counts.
+    """
+    slots = build_slots(template, start_date, end_date)
+    if not slots:
+        return 0, 0
+
+    in_range = Slot.objects.filter(date__range=[start_date, end_date])
+    with transaction.atomic():
+        before = in_range.count()
+        Slot.objects.bulk_create(slots, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        inserted = in_range.count() - before
+        if inserted:
+            rebuild_capacity(start_date, end_date)
+            invalidate_reports([start_date])
+        invalidate_dates({s.date for s in slots})
+
+    return inserted, len(slots) - inserted
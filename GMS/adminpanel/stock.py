@@ -0,0 +1,148 @@
+"""
+Stock levels: the movement ledger and the stock-status counters.
+
+Part.quantity only changes through apply_movements(), which writes a
+StockMovement row per change. For each part it runs one conditional
+UPDATE ... SET quantity = quantity + n WHERE quantity >= m, so
+concurrent movements never lose an update and stock never goes below
+zero. A batch is applied in one transaction, all or nothing. A part it
+raises above its min_stock_level has its low-stock alert flag cleared
+in that transaction, so a drop before the next send_low_stock_alerts
+run is alerted again (see stock_alerts).
+
+stock_status_counts() gets the total, low-stock and out-of-stock counts
+of a Part queryset in one conditional aggregate. cached_stock_counts()
+caches them for the whole inventory under a versioned key. Any Part save
+or delete bumps the version once it commits, so a count computed
+against the old data can never be stored under the new key. The bump
+only reaches other processes through a shared cache backend (CACHES in
+settings); with per-process locmem, every other worker would show stale
+counts for up to an hour.
+
+Stock changes made with queryset.update() or F() expressions send no
+signals; code making them (apply_movements) calls
+invalidate_stock_counts() itself.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Part, StockMovement
+
+
+STOCK_COUNTS_TIMEOUT = 60 * 60  # seconds; a backstop, invalidation keeps it current
+VERSION_KEY = "stock-status:version"
+
+
+def _cache_key():
+    version = cache.get_or_set(VERSION_KEY, 1, None)
+    return f"stock-status:{version}"
+
+
+def stock_status_counts(queryset=None):
+    """{"total", "low_stock", "out_of_stock"} for the parts, in one query."""
+    queryset = Part.objects.all() if queryset is None else queryset
+    return queryset.aggregate(
+        total=Count("pk"),
+        low_stock=Count("pk", filter=Q(quantity__gt=0, quantity__lte=F("min_stock_level"))),
+        out_of_stock=Count("pk", filter=Q(quantity=0)),
+    )
+
+
+def cached_stock_counts():
+    """stock_status_counts() for every part, cached until stock changes."""
+    key = _cache_key()
+    counts = cache.get(key)
+    if counts is None:
+        counts = stock_status_counts()
+        cache.set(key, counts, STOCK_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate_stock_counts():
+    """Drop the cached counters once the current transaction commits."""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, None)
+    transaction.on_commit(bump)
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def movement_change(kind, quantity):
+    """Signed change for a movement: receive/return add, consume removes, adjust is already signed."""
+    if kind == "adjust":
+        return quantity
+    if quantity <= 0:
+        raise ValueError(f"A {kind} movement needs a positive quantity.")
+    return -quantity if kind == "consume" else quantity
+
+
+def apply_movements(movements, user=None):
+    """
+    Apply [(part_id, kind, quantity, note)] in one transaction; returns
+    the StockMovement rows. Raises InsufficientStock, applying nothing, if
+    any part would drop below zero at any point in the batch.
+    """
+    rows = [(part_id, kind, movement_change(kind, quantity), note) for part_id, kind, quantity, note in movements]
+
+    totals = {}  # part_id -> (net change, lowest running change)
+    for part_id, _kind, change, _note in rows:
+        net, lowest = totals.get(part_id, (0, 0))
+        totals[part_id] = (net + change, min(lowest, net + change))
+
+    now = timezone.now()
+    with transaction.atomic():
+        for part_id in sorted(totals):  # same lock order in every batch
+            net, lowest = totals[part_id]
+            updated = (
+                Part.objects
+                .filter(pk=part_id, quantity__gte=-lowest)
+                .update(quantity=F("quantity") + net, updated_at=now)
+            )
+            if not updated:
+                part = Part.objects.filter(pk=part_id).values_list("name", "quantity").first()
+                if part is None:
+                    raise Part.DoesNotExist(f"Part {part_id} does not exist.")
+                raise InsufficientStock(f"Only {part[1]} of {part[0]} in stock, {-lowest} needed.")
+
+        restocked = [part_id for part_id, (net, _lowest) in totals.items() if net > 0]
+        if restocked:
+            Part.objects.filter(
+                pk__in=restocked, quantity__gt=F("min_stock_level"), low_stock_alerted_at__isnull=False
+            ).update(low_stock_alerted_at=None)
+
+        # the rows are ours until commit, so this reads back our own result
+        running = {
+            part_id: quantity - totals[part_id][0]
+            for part_id, quantity in Part.objects.filter(pk__in=totals).values_list("pk", "quantity")
+        }
+        created = []
+        for part_id, kind, change, note in rows:
+            running[part_id] += change
+            created.append(StockMovement(
+                part_id=part_id, kind=kind, change=change, quantity_after=running[part_id],
+                note=note, created_by=user,
+            ))
+        StockMovement.objects.bulk_create(created)
+        invalidate_stock_counts()
+    return created
+
+
+def apply_movement(part, kind, quantity, note="", user=None):
+    """apply_movements() for one movement; updates part.quantity too."""
+    movement, = apply_movements([(part.pk, kind, quantity, note)], user=user)
+    part.quantity = movement.quantity_after
+    return movement
+
+
+@receiver([post_save, post_delete], sender=Part)
+def _part_changed(sender, **kwargs):
+    invalidate_stock_counts()
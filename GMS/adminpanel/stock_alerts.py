@@ -0,0 +1,137 @@
+"""
+Low-stock digest emails, sent by the send_low_stock_alerts command.
+
+A part is alerted once, when it first drops to its min_stock_level or
+below. Part.low_stock_alerted_at records that. Restocking the part above
+the level through apply_movements() clears it straight away, so the
+next drop alerts again even if both happen between two runs. Each run
+also clears it on parts raised above the level some other way (edits,
+imports).
+
+Each run sends one email listing every part that crossed the threshold
+since the previous run. Two things keep the query cheap:
+- Watermark: only parts updated since the previous run are read. Every
+  stock movement, edit and import sets updated_at, and the start of the
+  latest LowStockAlertRun is the watermark. A part can only cross the
+  threshold through one of those changes.
+- Partial index: parts_low_stock_pending_idx covers only low-stock parts
+  not alerted yet, so the lookup stays small however large the parts
+  table grows.
+
+WATERMARK_OVERLAP re-reads a short window before the watermark. This
+catches transactions that stamped updated_at before the previous run
+but committed after it. The alerted flag stops those parts from being
+reported twice.
+
+The parts are marked and the email is sent in one transaction. If the
+email fails, nothing is marked and the next run tries again. The marked
+rows stay locked while the email is sent. That also keeps two runs at
+the same time from reporting the same part.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import LowStockAlertRun, Part
+
+
+WATERMARK_OVERLAP = timedelta(minutes=10)
+MAX_DIGEST_LINES = 200  # parts listed in one email; the rest are counted
+MARK_BATCH_SIZE = 1000  # ids per UPDATE, well under SQLite's bound-parameter limit
+
+LOW_STOCK = Q(quantity__lte=F("min_stock_level"))
+
+
+def alert_recipients():
+    """LOW_STOCK_ALERT_RECIPIENTS, or every active staff member with an email address."""
+    recipients = getattr(settings, "LOW_STOCK_ALERT_RECIPIENTS", None)
+    if recipients:
+        return list(recipients)
+    return list(
+        get_user_model().objects
+        .filter(Q(is_staff=True) | Q(is_superuser=True), is_active=True)
+        .exclude(email="")
+        .order_by("email")
+        .values_list("email", flat=True)
+    )
+
+
+def pending_alerts(since=None):
+    """Low-stock parts not alerted yet, updated since `since` (all of them if None)."""
+    parts = Part.objects.filter(LOW_STOCK, low_stock_alerted_at__isnull=True)
+    if since is not None:
+        parts = parts.filter(updated_at__gte=since)
+    return parts
+
+
+def digest_email(parts):
+    """(subject, body) listing the parts (ordered by quantity, so out-of-stock ones first)."""
+    listed = parts[:MAX_DIGEST_LINES]
+    out = [part for part in listed if part.quantity == 0]
+    low = [part for part in listed if part.quantity > 0]
+
+    def line(part):
+        details = ", ".join(filter(None, [
+            part.compatible_model,
+            part.category.category_name if part.category else None,
+            part.brand.brand_name if part.brand else None,
+        ]))
+        return (
+            f"- {part.name}{f' ({details})' if details else ''}: "
+            f"{part.quantity} left, minimum {part.min_stock_level}"
+        )
+
+    sections = []
+    if out:
+        sections.append("Out of stock:\n" + "\n".join(map(line, out)))
+    if low:
+        sections.append("Low stock:\n" + "\n".join(map(line, low)))
+    if len(parts) > len(listed):
+        sections.append(f"... and {len(parts) - len(listed)} more.")
+
+    subject = f"Low stock: {len(parts)} part{'s' if len(parts) != 1 else ''} need reordering"
+    body = (
+        "These parts dropped to their minimum stock level since the last check:\n\n"
+        + "\n\n".join(sections)
+        + "\n\nEach part is reported once, until it is restocked above its minimum."
+    )
+    return subject, body
+
+
+def send_low_stock_alerts(recipients, dry_run=False):
+    """
+    Clear the alert flag of restocked parts, then email one digest of the
+    parts that newly dropped to their minimum. Returns (alerted parts,
+    number restocked). With dry_run nothing is written or sent.
+    """
+    started_at = timezone.now()
+    last_run = LowStockAlertRun.objects.order_by("-started_at").values_list("started_at", flat=True).first()
+    since = last_run - WATERMARK_OVERLAP if last_run else None
+
+    with transaction.atomic():
+        restocked = Part.objects.filter(~LOW_STOCK, low_stock_alerted_at__isnull=False)
+        restocked = restocked.count() if dry_run else restocked.update(low_stock_alerted_at=None)
+
+        parts = list(
+            pending_alerts(since)
+            .select_related("category", "brand")
+            .select_for_update(of=("self",))
+            .order_by("quantity", "name")
+        )
+        if dry_run:
+            return parts, restocked
+
+        if parts:
+            ids = [part.pk for part in parts]
+            for i in range(0, len(ids), MARK_BATCH_SIZE):
+                Part.objects.filter(pk__in=ids[i:i + MARK_BATCH_SIZE]).update(low_stock_alerted_at=started_at)
+            subject, body = digest_email(parts)
+            send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, recipients, fail_silently=False)
+
+        LowStockAlertRun.objects.create(started_at=started_at, alerted=len(parts), restocked=restocked)
+    return parts, restocked
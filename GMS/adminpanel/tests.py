@@ -1,3 +1,1017 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gc
+import io
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from importlib import import_module
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps as django_apps
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from pypdf import PdfReader
+
+from customer.models import Appointment, Users, Vehicle
+
+from .models import Brand, DailyCapacity, InventoryCategory, Part, ReportJob, Service, Slot, StockMovement
+from .capacity import rebuild_capacity
+from .chart_cache import ChartCache, chart_key
+from .exports import _batched, csv_lines
+from .models import DailyAppointmentRollup
+from .part_search import search_parts
+from .parts_io import import_parts
+from .pdf_chunks import merge_pdfs, render_report_pdf
+from .report_charts import render_bar_chart, render_pie_chart
+from .report_cache import (
+    DATA_VERSION_KEY, HISTORY_CACHE_TIMEOUT, HISTORY_VERSION_KEY, cached_report_metrics, report_cache_key,
+)
+from .report_jobs import claim_jobs, render_job
+from .report_metrics import report_metrics
+from .rollup import rebuild_rollup
+from .slot_events import SlotEventBroker, SlotPoller, broker, slot_event_stream
+from .stock import InsufficientStock, apply_movement, apply_movements
+from .stock_alerts import send_low_stock_alerts
+
+
+# the query counts below are of the reports' own SQL; with the database
+# cache backend of the settings every cache get/set would be counted too
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ReportMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        service = Service.objects.create(name="Oil change", price=1000, duration=60)
+        customer = Users.objects.create_user("c@example.com", "Customer", "pw", is_verified=True)
+        Users.objects.create_user("d@example.com", "Other", "pw")
+        vehicle = Vehicle.objects.create(user=customer, model="Swift", year=2020, plate_no="BA 1 PA 1")
+
+        for day in (1, 2):
+            for hour, booked, status in ((9, True, "Pending"), (10, True, "Completed"), (11, False, None)):
+                slot = Slot.objects.create(
+                    date=date(2026, 3, day), start_time=time(hour), end_time=time(hour + 1), is_booked=booked
+                )
+                if status:
+                    Appointment.objects.create(
+                        user=customer, vehicle=vehicle, service=service, slot=slot, status=status
+                    )
+        rebuild_capacity()
+        rebuild_rollup()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_query_per_section(self):
+        with self.assertNumQueries(4):
+            metrics = report_metrics(date(2026, 3, 1), date(2026, 3, 31))
+
+        self.assertEqual((metrics.total_slots, metrics.booked_slots), (6, 4))
+        self.assertEqual(metrics.utilization, 66.67)
+        self.assertEqual(metrics.total_appointments, 4)
+        self.assertEqual(metrics.revenue, 4000)
+        self.assertEqual(
+            metrics.appointment_status,
+            {"pending": 2, "confirmed": 0, "completed": 2, "cancelled": 0},
+        )
+        self.assertEqual(metrics.daily_appointments, [(date(2026, 3, 1), 2), (date(2026, 3, 2), 2)])
+
+    def test_range_and_sections(self):
+        with self.assertNumQueries(1):
+            metrics = report_metrics(date(2026, 3, 2), date(2026, 3, 2), sections=("appointments",))
+        self.assertEqual(metrics.total_appointments, 2)
+        self.assertEqual(metrics.total_slots, 0)
+
+        metrics = report_metrics(sections=("customers",))
+        self.assertEqual((metrics.total_customers, metrics.verified_customers), (2, 1))
+
+    def test_reports_page_query_count(self):
+        admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        self.client.force_login(admin)
+        # session + user, four KPI queries, latest appointments
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse("adminpanel:reports"), {"start": "2026-03-01", "end": "2026-03-31"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_appointments"], 4)
+
+    def test_reports_page_cache_follows_data_version(self):
+        admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        self.client.force_login(admin)
+        url, march = reverse("adminpanel:reports"), {"start": "2026-03-01", "end": "2026-03-31"}
+        self.client.get(url, march)
+
+        # session + user only
+        with self.assertNumQueries(2):
+            self.client.get(url, march)
+
+        # a slot after the range leaves the closed March range cached
+        with self.captureOnCommitCallbacks(execute=True):
+            Slot.objects.create(date=date.today() + timedelta(days=1), start_time=time(9), end_time=time(10))
+        with self.assertNumQueries(2):
+            self.client.get(url, march)
+
+        # editing a March appointment does not
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.filter(status="Pending").first().save()
+        with self.assertNumQueries(7):
+            self.client.get(url, march)
+
+    def test_evicted_version_does_not_revive_stale_entries(self):
+        march = (date(2026, 3, 1), date(2026, 3, 31))
+        key, timeout = report_cache_key("metrics", *march)
+        self.assertEqual(timeout, HISTORY_CACHE_TIMEOUT)
+
+        def customers():
+            return cached_report_metrics(*march, sections=("customers",)).total_customers
+
+        self.assertEqual(customers(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Users.objects.create_user(
+                "march@example.com", "March", "pw",
+                date_joined=timezone.make_aware(timezone.datetime(2026, 3, 5, 12)),
+            )
+        self.assertEqual(customers(), 1)
+
+        # the cache drops both version keys but keeps the entries stored under them
+        cache.delete_many([DATA_VERSION_KEY, HISTORY_VERSION_KEY])
+        self.assertNotEqual(report_cache_key("metrics", *march)[0], key)
+        self.assertEqual(customers(), 1)
+
+
+class DailyCapacityTests(TestCase):
+    MARCH_1, MARCH_2 = date(2026, 3, 1), date(2026, 3, 2)
+
+    def counters(self):
+        return {
+            row.date: (row.total, row.booked)
+            for row in DailyCapacity.objects.filter(Q(total__gt=0) | Q(booked__gt=0))
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.counters()
+        rebuild_capacity()
+        self.assertEqual(self.counters(), incremental)
+
+    def slot(self, day, hour, booked=False):
+        return Slot.objects.create(date=day, start_time=time(hour), end_time=time(hour + 1), is_booked=booked)
+
+    def test_instance_saves_and_deletes(self):
+        nine = self.slot(self.MARCH_1, 9)
+        ten = self.slot(self.MARCH_1, 10, booked=True)
+        self.assertEqual(self.counters(), {self.MARCH_1: (2, 1)})
+
+        nine.is_booked = True
+        nine.save()
+        self.assertEqual(self.counters(), {self.MARCH_1: (2, 2)})
+
+        ten.date = self.MARCH_2
+        ten.save()
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 1), self.MARCH_2: (1, 1)})
+
+        ten.delete()
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 1)})
+        self.assertMatchesRebuild()
+
+    def test_unrelated_field_saves_leave_counters_alone(self):
+        slot = self.slot(self.MARCH_1, 9)
+        slot.end_time = time(11)
+        with self.assertNumQueries(1):
+            slot.save(update_fields=["end_time"])
+        slot.save()
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 0)})
+
+    def test_queryset_delete(self):
+        for hour in (9, 10, 11):
+            self.slot(self.MARCH_1, hour, booked=hour == 9)
+        self.slot(self.MARCH_2, 9)
+
+        Slot.objects.filter(date=self.MARCH_1, start_time__gte=time(9), start_time__lt=time(11)).delete()
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 0), self.MARCH_2: (1, 0)})
+        self.assertMatchesRebuild()
+
+    def test_admin_views_count_once(self):
+        admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        self.client.force_login(admin)
+        self.client.post(reverse("adminpanel:add_slot"), {
+            "date": self.MARCH_1, "start_time": "09:00", "end_time": "10:00",
+        })
+        slot = Slot.objects.get()
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 0)})
+
+        self.client.post(reverse("adminpanel:toggle_slot_status", args=[slot.pk]))
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 1)})
+        self.client.post(reverse("adminpanel:toggle_slot_status", args=[slot.pk]))
+        self.assertEqual(self.counters(), {self.MARCH_1: (1, 0)})
+
+
+class AppointmentRollupTests(TestCase):
+    def test_booking_and_cancelling_keep_rollup_in_step(self):
+        from customer.booking import book_appointment, cancel_appointment
+
+        service = Service.objects.create(name="Wash", price=500, duration=60)
+        customer = Users.objects.create_user("c@example.com", "Customer", "pw")
+        vehicle = Vehicle.objects.create(user=customer, model="Swift", year=2020, plate_no="BA 1 PA 1")
+        slots = [
+            Slot.objects.create(date=date(2026, 3, 1), start_time=time(hour), end_time=time(hour + 1))
+            for hour in (9, 10)
+        ]
+        first = Appointment(user=customer, vehicle=vehicle, service=service, slot=slots[0])
+        book_appointment(first)
+        book_appointment(Appointment(user=customer, vehicle=vehicle, service=service, slot=slots[1]))
+        cancel_appointment(first)
+
+        def rows():
+            return sorted(
+                DailyAppointmentRollup.objects.filter(count__gt=0)
+                .values_list("date", "service_id", "status", "count", "revenue")
+            )
+
+        incremental = rows()
+        self.assertEqual(incremental, [
+            (date(2026, 3, 1), service.id, "Cancelled", 1, 500),
+            (date(2026, 3, 1), service.id, "Pending", 1, 500),
+        ])
+        self.assertEqual(rebuild_rollup(), 2)
+        self.assertEqual(rows(), incremental)
+
+    def test_migration_backfills_existing_appointments(self):
+        backfill = import_module("adminpanel.migrations.0011_backfill_appointment_rollup")
+        service = Service.objects.create(name="Wash", price=500, duration=60)
+        customer = Users.objects.create_user("c@example.com", "Customer", "pw")
+        vehicle = Vehicle.objects.create(user=customer, model="Swift", year=2020, plate_no="BA 1 PA 1")
+        for hour, status in ((9, "Completed"), (10, "Completed"), (11, "Cancelled")):
+            slot = Slot.objects.create(date=date(2026, 3, 1), start_time=time(hour), end_time=time(hour + 1))
+            Appointment.objects.create(user=customer, vehicle=vehicle, service=service, slot=slot, status=status)
+        # only bookings made after the rollup table was created were recorded
+        DailyAppointmentRollup.objects.create(
+            date=date(2026, 3, 1), service=service, status="Completed", count=1, revenue=500
+        )
+
+        backfill.backfill_appointment_rollup(django_apps, SimpleNamespace(connection=connection))
+        self.assertEqual(
+            sorted(DailyAppointmentRollup.objects.values_list("date", "status", "count", "revenue")),
+            [(date(2026, 3, 1), "Cancelled", 1, 500), (date(2026, 3, 1), "Completed", 2, 1000)],
+        )
+
+
+class PartSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        filters = InventoryCategory.objects.create(category_name="Filters")
+        brakes = InventoryCategory.objects.create(category_name="Brakes")
+        cls.bosch = Brand.objects.create(brand_name="Bosch")
+        Part.objects.create(name="Oil Filter", compatible_model="Swift", price=450, category=filters, brand=cls.bosch)
+        Part.objects.create(name="Air Filter", compatible_model="City", price=600, category=filters)
+        Part.objects.create(name="Brake Pad", compatible_model="Swift", price=1800, category=brakes, brand=cls.bosch)
+
+    def names(self, query):
+        return [part.name for part in search_parts(Part.objects.all(), query)]
+
+    def test_matches_words_and_prefixes_across_fields(self):
+        self.assertEqual(self.names("oil filter"), ["Oil Filter"])
+        self.assertCountEqual(self.names("filt"), ["Oil Filter", "Air Filter"])
+        self.assertCountEqual(self.names("bosch swift"), ["Oil Filter", "Brake Pad"])
+        self.assertEqual(self.names("brakes"), ["Brake Pad"])  # category name
+        self.assertEqual(self.names('"); brak --'), ["Brake Pad"])  # only the word is kept
+        self.assertEqual(self.names("**"), [])
+
+    def test_renamed_and_deleted_brands_are_reindexed(self):
+        self.bosch.brand_name = "Denso"
+        self.bosch.save()
+        self.assertEqual(self.names("bosch"), [])
+        self.assertCountEqual(self.names("denso"), ["Oil Filter", "Brake Pad"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bosch.delete()
+        self.assertEqual(self.names("denso"), [])
+
+    def test_inventory_page_uses_search(self):
+        admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("adminpanel:inventory"), {"search": "air"})
+        self.assertEqual([part.name for part in response.context["inventory_items"]], ["Air Filter"])
+
+
+class StockCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for quantity in (0, 3, 20):
+            Part.objects.create(name=f"Part {quantity}", price=100, quantity=quantity, min_stock_level=5)
+        cls.admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def part_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, sum('"parts"' in query["sql"] for query in queries.captured_queries)
+
+    def test_dashboard_reads_cached_counters(self):
+        url = reverse("adminpanel:dashboard")
+        self.part_queries(url)
+        response, part_queries = self.part_queries(url)
+        self.assertEqual(part_queries, 1)  # recent inventory only
+        self.assertEqual(
+            (response.context["total_items"], response.context["low_stock_items"], response.context["out_of_stock_items"]),
+            (3, 1, 1),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Part.objects.filter(quantity=3).get().delete()
+        response, part_queries = self.part_queries(url)
+        self.assertEqual(part_queries, 2)
+        self.assertEqual((response.context["total_items"], response.context["low_stock_items"]), (2, 0))
+
+    def test_inventory_page_counts_once(self):
+        response, part_queries = self.part_queries(reverse("adminpanel:inventory") + "?search=part")
+        self.assertEqual(part_queries, 2)  # counts + page
+        self.assertEqual(response.context["out_of_stock_items"], 1)
+        self.assertEqual(response.context["inventory_items"].paginator.count, 3)
+
+
+class StockLedgerTests(TransactionTestCase):
+    THREADS = 8
+    ATTEMPTS = 150  # more consumes than there is stock
+
+    def setUp(self):
+        self.part = Part.objects.create(name="Oil Filter", price=450, quantity=100)
+        self.spare = Part.objects.create(name="Air Filter", price=600, quantity=1)
+
+    def _consume(self, _attempt):
+        try:
+            apply_movement(Part(pk=self.part.pk), "consume", 1)
+            return True
+        except InsufficientStock:
+            return False
+        finally:
+            connections.close_all()
+
+    def test_concurrent_consumes_lose_no_updates(self):
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            results = list(pool.map(self._consume, range(self.ATTEMPTS)))
+
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.quantity, 0)
+        self.assertEqual(results.count(True), 100)
+
+        movements = StockMovement.objects.filter(part=self.part)
+        self.assertEqual(movements.count(), 100)
+        self.assertEqual(sorted(movements.values_list("quantity_after", flat=True)), list(range(100)))
+
+    def test_batch_is_all_or_nothing(self):
+        with self.assertRaises(InsufficientStock):
+            apply_movements([
+                (self.part.pk, "consume", 10, ""),
+                (self.spare.pk, "consume", 1, ""),
+                (self.spare.pk, "consume", 1, ""),
+            ])
+        self.assertEqual(list(Part.objects.order_by("pk").values_list("quantity", flat=True)), [100, 1])
+        self.assertFalse(StockMovement.objects.exists())
+
+        movements = apply_movements([
+            (self.spare.pk, "consume", 1, ""),
+            (self.spare.pk, "receive", 5, "Delivery"),
+            (self.part.pk, "adjust", -3, "Count"),
+        ])
+        self.assertEqual([m.quantity_after for m in movements], [0, 5, 97])
+        self.assertEqual(list(Part.objects.order_by("pk").values_list("quantity", flat=True)), [97, 5])
+
+
+class PartImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        Brand.objects.create(brand_name="Bosch")
+
+    def import_csv(self, text):
+        return import_parts(BytesIO(text.encode()), "csv", batch_size=2)
+
+    def test_import_reports_bad_rows_and_creates_names_once(self):
+        result = self.import_csv(
+            "name,price,quantity,category,brand\n"
+            "Brake Pad,1800,4,Brakes,bosch\n"
+            "Brake Disc,abc,1,Brakes,\n"
+            ",500,,,\n"
+            "Brake Shoe,900,,brakes,Brembo\n"
+        )
+
+        self.assertEqual((result.created, result.failed), (2, 2))
+        self.assertEqual(result.errors, [(3, "price must be a number."), (4, "name is required.")])
+        self.assertEqual(InventoryCategory.objects.count(), 1)
+        self.assertEqual(sorted(Brand.objects.values_list("brand_name", flat=True)), ["Bosch", "Brembo"])
+        pad = Part.objects.get(name="Brake Pad")
+        self.assertEqual((pad.quantity, pad.brand.brand_name), (4, "Bosch"))
+        self.assertEqual(pad.movements.get().change, 4)
+        self.assertEqual(search_parts(Part.objects.all(), "shoe brembo").get().name, "Brake Shoe")
+
+    def test_export_imports_back(self):
+        self.import_csv("name,price,quantity,category\nOil Filter,450,10,Filters\nAir Filter,600,2,Filters\n")
+        self.client.force_login(self.admin)
+        exported = b"".join(self.client.get(reverse("adminpanel:export_inventory", args=["csv"])).streaming_content)
+
+        result = import_parts(BytesIO(exported), "csv")
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 2))
+
+        edited = exported.decode().replace("600.00,2,", "650.00,99,")
+        result = self.import_csv(edited)
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 1, 1))
+        air = Part.objects.get(name="Air Filter")
+        self.assertEqual((air.price, air.quantity), (650, 2))  # quantity of existing parts is not imported
+
+    def test_rows_without_part_id_match_on_name_model_and_brand(self):
+        rows = (
+            "name,compatible_model,brand,price,quantity\n"
+            "Brake Pad,Swift,Bosch,1800,4\n"
+            "Brake Pad,Alto,Bosch,1700,2\n"
+            "Spark Plug,,,300,10\n"
+        )
+        self.assertEqual(self.import_csv(rows).created, 3)
+
+        result = self.import_csv(rows)
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 3))
+        self.assertEqual(Part.objects.count(), 3)
+
+        pad = Part.objects.get(name="Brake Pad", compatible_model="Swift")
+        result = self.import_csv("name,compatible_model,brand,price,quantity\nbrake pad,SWIFT,bosch,1850,40\n")
+        self.assertEqual((result.created, result.updated), (0, 1))
+        pad.refresh_from_db()
+        self.assertEqual((pad.price, pad.quantity), (1850, 4))
+
+    def test_ambiguous_and_repeated_rows_without_part_id_are_rejected(self):
+        Part.objects.create(name="Wiper", price=200)
+        Part.objects.create(name="Wiper", price=250)
+        result = self.import_csv(
+            "name,compatible_model,price\n"
+            "Wiper,,300\n"
+            "Horn,Swift,900\n"
+            "horn,swift,950\n"
+        )
+        self.assertEqual((result.created, result.failed), (1, 2))
+        self.assertEqual(result.errors, [
+            (2, "2 parts match this name, model and brand; add the part_id to pick one."),
+            (4, "horn appears more than once with the same model and brand."),
+        ])
+        self.assertEqual(Part.objects.get(name="Horn").price, 900)
+
+
+class LowStockAlertTests(TestCase):
+    def setUp(self):
+        self.filter = Part.objects.create(name="Oil Filter", price=450, quantity=10, min_stock_level=5)
+        self.pad = Part.objects.create(name="Brake Pad", price=1800, quantity=3, min_stock_level=5)
+        self.belt = Part.objects.create(name="Timing Belt", price=2500, quantity=0, min_stock_level=2)
+
+    def run_alerts(self):
+        mail.outbox.clear()
+        parts, restocked = send_low_stock_alerts(["stores@example.com"])
+        return sorted(part.name for part in parts), restocked
+
+    def test_each_drop_is_alerted_once_in_one_digest(self):
+        self.assertEqual(self.run_alerts(), (["Brake Pad", "Timing Belt"], 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Out of stock:\n- Timing Belt", mail.outbox[0].body)
+
+        self.assertEqual(self.run_alerts(), ([], 0))
+        self.assertEqual(mail.outbox, [])
+
+        apply_movement(self.filter, "consume", 6)
+        self.assertEqual(self.run_alerts(), (["Oil Filter"], 0))
+
+    def test_restocked_part_is_alerted_again(self):
+        self.run_alerts()
+        apply_movement(self.pad, "receive", 10)
+        self.assertIsNone(Part.objects.get(pk=self.pad.pk).low_stock_alerted_at)
+        self.assertEqual(self.run_alerts(), ([], 0))
+
+        apply_movement(self.pad, "consume", 9)
+        self.assertEqual(self.run_alerts(), (["Brake Pad"], 0))
+
+    def test_restock_and_drop_between_two_runs_is_alerted(self):
+        self.run_alerts()
+        apply_movement(self.pad, "receive", 10)
+        apply_movement(self.pad, "consume", 9)
+        self.assertEqual(self.run_alerts(), (["Brake Pad"], 0))
+
+    def test_receiving_while_still_low_keeps_the_flag(self):
+        self.run_alerts()
+        apply_movement(self.pad, "receive", 1)
+        self.assertEqual(self.run_alerts(), ([], 0))
+
+    def test_run_clears_parts_restocked_without_a_movement(self):
+        self.run_alerts()
+        Part.objects.filter(pk=self.pad.pk).update(quantity=20)
+        self.assertEqual(self.run_alerts(), ([], 1))
+
+    def test_parts_unchanged_since_the_watermark_are_not_read(self):
+        self.run_alerts()
+        # low and never alerted, but last touched long before the previous run
+        Part.objects.filter(pk=self.filter.pk).update(quantity=1, updated_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.run_alerts(), ([], 0))
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.media, self.reports = root / "media", root / "private"
+        settings_override = override_settings(MEDIA_ROOT=self.media, REPORT_FILES_ROOT=self.reports)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        self.client.force_login(admin)
+
+    def submit(self, kind="slots", start="2026-03-01", end="2026-03-31"):
+        return self.client.post(reverse("adminpanel:submit_report_job"), {"kind": kind, "start": start, "end": end})
+
+    def status(self, job_id):
+        return self.client.get(reverse("adminpanel:report_job_status", args=[job_id])).json()
+
+    def test_identical_requests_share_one_job(self):
+        first = self.submit()
+        self.assertEqual(first.status_code, 202)
+        again = self.submit()
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()["id"], first.json()["id"])
+
+        self.assertEqual(self.submit(end="2026-03-30").status_code, 202)
+        self.assertEqual(self.submit(kind="customers").status_code, 202)
+        self.assertEqual(ReportJob.objects.count(), 3)
+        self.assertEqual(self.submit(kind="nope").status_code, 400)
+
+    def test_download_link_queues_the_job_instead_of_rendering(self):
+        url = reverse("adminpanel:download_slots_report_pdf")
+        with mock.patch("adminpanel.pdf_chunks.render_report_pdf") as render:
+            response = self.client.get(url, {"start": "2026-03-01", "end": "2026-03-31"})
+            self.client.get(url, {"start": "2026-03-01", "end": "2026-03-31"})
+        render.assert_not_called()
+
+        job = ReportJob.objects.get()
+        self.assertEqual((job.kind, job.start_date, job.status), ("slots", date(2026, 3, 1), "pending"))
+        self.assertRedirects(
+            response, f"{reverse('adminpanel:reports')}?job={job.pk}&start=2026-03-01&end=2026-03-31"
+        )
+        page = self.client.get(response.url)
+        self.assertEqual(page.context["pending_job"], job)
+
+    def test_status_follows_the_job(self):
+        job_id = self.submit().json()["id"]
+        self.assertEqual(self.status(job_id)["status"], "pending")
+
+        self.assertEqual(claim_jobs(5), [job_id])
+        self.assertEqual(claim_jobs(5), [])
+        self.assertEqual(self.status(job_id)["status"], "running")
+        # a running job still absorbs identical requests
+        self.assertEqual(self.submit().json()["id"], job_id)
+
+        with mock.patch("adminpanel.pdf_chunks.render_report_pdf", return_value=b"%PDF-1.4 report"):
+            self.assertEqual(render_job(job_id), (job_id, "done"))
+        data = self.status(job_id)
+        self.assertEqual(data["status"], "done")
+        download = self.client.get(data["download_url"])
+        self.assertEqual(b"".join(download.streaming_content), b"%PDF-1.4 report")
+
+        # once done, the same report is queued afresh
+        self.assertNotEqual(self.submit().json()["id"], job_id)
+
+    def test_failed_render_is_reported(self):
+        from .utils import PDFRenderError
+
+        job_id = self.submit().json()["id"]
+        claim_jobs(1)
+        with mock.patch("adminpanel.pdf_chunks.render_report_pdf", side_effect=PDFRenderError("bad template")):
+            self.assertEqual(render_job(job_id), (job_id, "failed"))
+        self.assertEqual(self.status(job_id), {
+            "id": job_id, "kind": "slots", "status": "failed",
+            "status_url": reverse("adminpanel:report_job_status", args=[job_id]), "error": "bad template",
+        })
+        self.assertEqual(
+            self.client.get(reverse("adminpanel:report_job_download", args=[job_id])).status_code, 404
+        )
+
+    def render_done_job(self):
+        job_id = self.submit().json()["id"]
+        claim_jobs(1)
+        with mock.patch("adminpanel.pdf_chunks.render_report_pdf", return_value=b"%PDF-1.4 report"):
+            render_job(job_id)
+        return ReportJob.objects.get(pk=job_id)
+
+    def test_report_files_are_private_and_unguessable(self):
+        job = self.render_done_job()
+        path = Path(job.file.path)
+        self.assertEqual(path.parent, self.reports)
+        self.assertFalse(self.media.exists())
+        self.assertRegex(path.name, r"^[0-9a-f]{32}\.pdf$")
+        self.assertIsNone(job.file.storage.base_url)
+
+        download = self.client.get(reverse("adminpanel:report_job_download", args=[job.pk]))
+        self.assertEqual(download["Content-Disposition"], 'attachment; filename="slots_report.pdf"')
+        self.assertEqual(b"".join(download.streaming_content), b"%PDF-1.4 report")
+
+        self.client.logout()
+        response = self.client.get(reverse("adminpanel:report_job_download", args=[job.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_download_of_a_missing_file_is_not_found(self):
+        job = self.render_done_job()
+        url = reverse("adminpanel:report_job_download", args=[job.pk])
+        job.file.delete(save=False)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        ReportJob.objects.filter(pk=job.pk).update(file="")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ChartCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.renders = []
+
+    def cache(self, **kwargs):
+        return ChartCache(directory=self.directory, **kwargs)
+
+    def get(self, cache, values):
+        key = chart_key("bar", "Chart", ["a", "b"], values, (6, 4))
+
+        def render():
+            self.renders.append(values)
+            return f"png:{values}"
+        return cache.get_or_render(key, render)
+
+    def test_same_content_hits_and_changed_content_misses(self):
+        charts = self.cache()
+        self.assertEqual(self.get(charts, [1, 2]), "png:[1, 2]")
+        self.assertEqual(self.get(charts, [1, 2]), "png:[1, 2]")
+        self.assertEqual(self.get(charts, [1, 3]), "png:[1, 3]")
+        self.assertEqual(self.renders, [[1, 2], [1, 3]])
+        self.assertEqual(charts.stats(), {"memory_hits": 1, "file_hits": 0, "misses": 2, "hit_rate": 33.3})
+
+        self.assertEqual(
+            chart_key("bar", "Chart", ["a"], [1], (6, 4)), chart_key("bar", "Chart", ["a"], [1], (6, 4))
+        )
+        self.assertNotEqual(
+            chart_key("bar", "Chart", ["a"], [1], (6, 4)), chart_key("pie", "Chart", ["a"], [1], (6, 4))
+        )
+
+    def test_file_cache_is_shared_between_processes(self):
+        self.get(self.cache(), [1, 2])
+        other = self.cache()  # a fresh in-process LRU, as in another worker
+        self.assertEqual(self.get(other, [1, 2]), "png:[1, 2]")
+        self.assertEqual(self.renders, [[1, 2]])
+        self.assertEqual(other.stats()["file_hits"], 1)
+
+        other.clear()
+        self.assertEqual(other.stats()["file_hits"], 0)
+        self.get(other, [1, 2])
+        self.assertEqual(other.stats()["file_hits"], 1)
+
+    def test_least_recently_used_files_are_evicted(self):
+        charts = self.cache(max_bytes=30, memory_entries=0)
+        an_hour_ago = (timezone.now() - timedelta(hours=1)).timestamp()
+        for i, values in enumerate(([1], [2], [3], [4])):  # 7 bytes each
+            self.get(charts, values)
+            path = Path(self.directory) / f"{chart_key('bar', 'Chart', ['a', 'b'], values, (6, 4))}.b64"
+            os.utime(path, (an_hour_ago + i, an_hour_ago + i))
+        self.get(charts, [1])  # a hit makes [1] the most recently used
+        self.get(charts, [5])  # over 30 bytes: [2] is the oldest now
+
+        self.assertLessEqual(sum(f.stat().st_size for f in Path(self.directory).iterdir()), 30)
+        self.renders.clear()
+        for values in ([1], [3], [4], [5]):
+            self.get(charts, values)
+        self.assertEqual(self.renders, [])
+        self.get(charts, [2])
+        self.assertEqual(self.renders, [[2]])
+
+    def test_unwritable_directory_still_renders(self):
+        blocker = Path(self.directory) / "file"
+        blocker.write_text("")
+        charts = ChartCache(directory=blocker / "charts")
+        self.assertEqual(self.get(charts, [1]), "png:[1]")
+        self.assertEqual(self.get(charts, [1]), "png:[1]")
+        self.assertEqual(self.renders, [[1]])
+
+
+class ReportChartDataTests(TestCase):
+    URL = "adminpanel:report_chart_data"
+    MARCH = {"start": "2026-03-01", "end": "2026-03-31"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        for hour in (9, 10):
+            Slot.objects.create(date=date(2026, 3, 2), start_time=time(hour), end_time=time(hour + 1))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def get(self, etag=None, **params):
+        headers = {"if_none_match": etag} if etag else {}
+        return self.client.get(reverse(self.URL), {**self.MARCH, **params}, headers=headers)
+
+    def test_etag_round_trip(self):
+        first = self.get(charts="slot_pie")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+
+        unchanged = self.get(etag, charts="slot_pie")
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.headers["ETag"], etag)
+
+        # a booking in the range changes the numbers, so the old ETag no longer matches
+        with self.captureOnCommitCallbacks(execute=True):
+            slot = Slot.objects.first()
+            slot.is_booked = True
+            slot.save()
+        changed = self.get(etag, charts="slot_pie")
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+        self.assertEqual(changed.json()["slot_pie"]["values"], [1, 1])
+
+    def test_json_shape(self):
+        response = self.get()
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertNotIn(b'": ', response.content)  # compact separators
+        self.assertNotIn(b", ", response.content)
+
+        data = response.json()
+        self.assertEqual(list(data), ["slot_pie", "status_bar", "appt_daily_bar", "customers_verify_pie"])
+        self.assertEqual(data["slot_pie"], {
+            "type": "pie", "title": "Slot Utilization", "labels": ["Booked", "Available"], "values": [0, 2],
+        })
+        self.assertEqual(data["status_bar"]["values"], [0, 0, 0, 0])
+        self.assertEqual(data["appt_daily_bar"]["xlabel"], "Date")
+        for chart in data.values():
+            self.assertEqual(len(chart["labels"]), len(chart["values"]))
+
+        picked = self.get(charts="status_bar,slot_pie").json()
+        self.assertEqual(sorted(picked), ["slot_pie", "status_bar"])
+        self.assertEqual(self.get(charts="slot_pie,nope").status_code, 400)
+
+    def test_if_none_match(self):
+        etag = self.get(charts="slot_pie").headers["ETag"]
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+
+        for header in (etag, f'"stale", {etag}', f"W/{etag}", "*"):
+            response = self.get(header, charts="slot_pie")
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response.content, b"")
+
+        self.assertEqual(self.get('"stale"', charts="slot_pie").status_code, 200)
+        # the ETag covers the chart selection and the range
+        self.assertEqual(self.get(etag, charts="status_bar").status_code, 200)
+        self.assertEqual(self.get(etag, charts="slot_pie", end="2026-03-01").status_code, 200)
+
+
+# serial unless a test says otherwise: spawned processes cannot see the test database
+@override_settings(PDF_CHUNK_ROWS=25, PDF_RENDER_PROCESSES=1)
+class ChunkedReportPdfTests(TransactionTestCase):
+    CUSTOMERS = 60  # chunks of 25, 25 and 10 rows
+
+    def setUp(self):
+        cache.clear()
+        # inserted in reverse, so primary key order is not the report's name order
+        Users.objects.bulk_create([
+            Users(email=f"c{i:03}@example.com", name=f"Customer {i:03}") for i in reversed(range(self.CUSTOMERS))
+        ])
+
+    def render(self):
+        with mock.patch("adminpanel.pdf_chunks.merge_pdfs", wraps=merge_pdfs) as merge:
+            pdf = render_report_pdf("customers", None, None)
+        (parts,), _ = merge.call_args
+        return PdfReader(BytesIO(pdf)), [PdfReader(BytesIO(part)) for part in parts]
+
+    def assertMergedInOrder(self, document, parts):
+        self.assertEqual(len(parts), 3)
+        self.assertEqual(len(document.pages), sum(len(part.pages) for part in parts))
+
+        pages = [page.extract_text() for page in document.pages]
+        self.assertIn("Customers Report", pages[0])
+        self.assertEqual(sum("Customers List (continued)" in page for page in pages), 2)
+        continued = len(parts[0].pages)
+        self.assertIn("Customers List (continued)", pages[continued])
+        self.assertIn("Customer 025", pages[continued])
+
+        text = "\n".join(pages)
+        positions = [text.find(f"Customer {i:03}") for i in range(self.CUSTOMERS)]
+        self.assertNotIn(-1, positions)
+        self.assertEqual(positions, sorted(positions))
+        return pages
+
+    def test_chunks_are_merged_in_report_order(self):
+        self.assertMergedInOrder(*self.render())
+
+    def test_pooled_chunks_match_serial_output(self):
+        serial = [page.extract_text() for page in self.render()[0].pages]
+
+        # threads stand in for the spawned processes
+        pool = mock.patch("adminpanel.pdf_chunks._pdf_pool", lambda chunks: ThreadPoolExecutor(max_workers=2))
+        with self.settings(PDF_RENDER_PROCESSES=2), pool:
+            pooled = self.assertMergedInOrder(*self.render())
+        self.assertEqual(pooled, serial)
+
+
+class StreamingExportTests(TestCase):
+    TRICKY_NAME = 'Shrestha, "Raj"\nKathmandu'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create_superuser("admin@example.com", "Admin", "pw")
+        cls.tricky = Users.objects.create_user(
+            "tricky@example.com", cls.TRICKY_NAME, "pw", address="Ward 4, Lalitpur",
+            date_joined=timezone.make_aware(timezone.datetime(2026, 3, 5, 12, 30)),
+        )
+        Users.objects.bulk_create([
+            Users(email=f"c{i:04}@example.com", name=f"Customer {i:04}") for i in range(1200)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def export(self, kind, fmt, **params):
+        response = self.client.get(reverse("adminpanel:export_report", args=[kind, fmt]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, [chunk.decode() for chunk in response.streaming_content]
+
+    def test_csv_lines_header_and_escaping(self):
+        headers = ["id", "name", "date"]
+        lines = list(csv_lines(headers, [(1, 'a,"b"\nc', date(2026, 3, 1)), (2, None, None)]))
+        self.assertEqual(lines[0], "id,name,date\r\n")
+        self.assertEqual(lines[1], '1,"a,""b""\nc",2026-03-01\r\n')
+        self.assertEqual(lines[2], "2,,\r\n")
+
+    def test_batched_joins_lines(self):
+        self.assertEqual(list(_batched(["a", "b", "c", "d", "e"], size=2)), ["ab", "cd", "e"])
+        self.assertEqual(list(_batched([], size=2)), [])
+
+    def test_csv_stream_in_several_chunks(self):
+        with mock.patch("adminpanel.exports.EXPORT_CHUNK_SIZE", 100):
+            response, chunks = self.export("customers", "csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="customers.csv"')
+
+        # header + 1201 customers, joined LINES_PER_WRITE lines at a time
+        self.assertEqual(len(chunks), 3)
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        self.assertEqual(rows[0], ["id", "name", "email", "phone", "address", "status", "is_verified", "date_joined"])
+        self.assertEqual(len(rows), 1202)
+        self.assertEqual(len({row[0] for row in rows[1:]}), 1201)
+
+        tricky = next(row for row in rows if row[2] == "tricky@example.com")
+        self.assertEqual(tricky[1], self.TRICKY_NAME)
+        self.assertEqual(tricky[4], "Ward 4, Lalitpur")
+        self.assertEqual(tricky[7], self.tricky.date_joined.isoformat())
+
+    def test_jsonl_stream(self):
+        response, chunks = self.export("customers", "jsonl", start="2026-03-01", end="2026-03-31")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="customers_2026-03-01_2026-03-31.jsonl"'
+        )
+        lines = "".join(chunks).splitlines()
+        self.assertEqual(len(lines), 1)  # embedded newlines are escaped
+        self.assertEqual(json.loads(lines[0]), {
+            "id": self.tricky.pk, "name": self.TRICKY_NAME, "email": "tricky@example.com", "phone": "",
+            "address": "Ward 4, Lalitpur", "status": "Active", "is_verified": False,
+            "date_joined": self.tricky.date_joined.isoformat(),
+        })
+
+        _response, chunks = self.export("customers", "jsonl")
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(sum(chunk.count("\n") for chunk in chunks), 1201)
+
+    def test_unknown_export(self):
+        for kind, fmt in (("parts", "csv"), ("customers", "xml")):
+            response = self.client.get(reverse("adminpanel:export_report", args=[kind, fmt]))
+            self.assertEqual(response.status_code, 404)
+
+
+class SlotEventTests(TestCase):
+    MARCH_1, MARCH_2 = date(2026, 3, 1), date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.slots = {
+            (day, hour): Slot.objects.create(date=day, start_time=time(hour), end_time=time(hour + 1))
+            for day in (cls.MARCH_1, cls.MARCH_2) for hour in (9, 10)
+        }
+
+    def book(self, day, hour):
+        Slot.objects.filter(pk=self.slots[day, hour].pk).update(is_booked=True)
+        return self.slots[day, hour].pk
+
+    def test_one_query_polls_every_stream(self):
+        events_broker = SlotEventBroker()
+        poller = SlotPoller(events_broker)
+
+        @sync_to_async
+        def poll_queries():
+            with CaptureQueriesContext(connection) as queries:
+                poller.poll()
+            return len(queries)
+
+        async def scenario():
+            queues = [events_broker.subscribe(day) for day in (self.MARCH_1, self.MARCH_1, self.MARCH_2)]
+            await sync_to_async(poller.poll)()  # baseline: nothing published
+            booked = await sync_to_async(self.book)(self.MARCH_1, 10)
+            self.assertEqual(await poll_queries(), 1)
+
+            first, second = [await asyncio.wait_for(queue.get(), 1) for queue in queues[:2]]
+            self.assertEqual(first, {"date": "2026-03-01", "slots": [{"id": booked, "is_booked": True}]})
+            self.assertEqual(second, first)
+            self.assertTrue(queues[2].empty())
+
+            await sync_to_async(poller.poll)()  # no change since
+            self.assertTrue(all(queue.empty() for queue in queues))
+
+        async_to_sync(scenario)()
+
+    def test_changes_published_here_are_not_repeated_by_the_poll(self):
+        events_broker = SlotEventBroker()
+        poller = SlotPoller(events_broker)
+
+        async def scenario():
+            queue = events_broker.subscribe(self.MARCH_2)
+            await sync_to_async(poller.poll)()
+            booked = await sync_to_async(self.book)(self.MARCH_2, 9)
+            poller.record(self.MARCH_2, {booked: True})
+            await sync_to_async(poller.poll)()
+            await asyncio.sleep(0)
+            self.assertTrue(queue.empty())
+
+        async_to_sync(scenario)()
+
+    def test_poller_thread_exits_without_streams(self):
+        poller = SlotPoller(SlotEventBroker())
+        poller.ensure_running()
+        thread = poller._thread
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(poller._thread)
+
+    @override_settings(SLOT_EVENTS_POLL_INTERVAL=0.05)
+    def test_stream_relays_broker_events(self):
+        async def scenario():
+            with mock.patch("adminpanel.slot_events.poller") as poller:
+                stream = slot_event_stream(self.MARCH_1)
+                self.assertEqual(await anext(stream), "retry: 50\n\n")
+                poller.ensure_running.assert_called_once_with()
+
+                self.assertEqual(await anext(stream), ": keep-alive\n\n")
+                event = {"date": "2026-03-01", "slots": [{"id": 1, "is_booked": False}]}
+                broker.publish(self.MARCH_1, event)
+                self.assertEqual(await anext(stream), f"event: slots\ndata: {json.dumps(event)}\n\n")
+
+                await stream.aclose()
+            self.assertNotIn(self.MARCH_1, broker.days())
+
+        async_to_sync(scenario)()
+
+
+class ChartRenderingStressTests(SimpleTestCase):
+    CHARTS = 100
+
+    def _render(self, i):
+        if i % 2:
+            return render_pie_chart(["Booked", "Available"], [i, 100], f"Chart {i}")
+        return render_bar_chart([f"Day {d}" for d in range(7)], [i + d for d in range(7)], f"Chart {i}", ylabel="Count")
+
+    def test_parallel_rendering_matches_serial_output(self):
+        expected = {i: self._render(i) for i in range(0, self.CHARTS, 25)}
+
+        gc.collect()
+        tracemalloc.start()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            charts = list(pool.map(self._render, range(self.CHARTS)))
+        gc.collect()
+        retained, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        for i, chart in enumerate(charts):
+            self.assertTrue(base64.b64decode(chart).startswith(b"\x89PNG\r\n\x1a\n"), i)
+        for i, chart in expected.items():
+            self.assertEqual(chart, charts[i], i)
+        self.assertEqual(len(set(charts)), self.CHARTS)
+
+        # figures are not kept in any registry: what is left is (roughly) the output strings
+        output = sum(len(chart) for chart in charts)
+        self.assertLess(retained, output + 10 * 1024 * 1024)
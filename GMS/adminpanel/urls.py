@@ -1,12 +1,13 @@
 from django.urls import path
 
 from .views import (download_appointments_report_pdf, download_customers_report_pdf, download_slots_report_pdf,download_full_report_pdf,
-                    inventory, add_inventory_item,edit_inventory_item,delete_inventory_item,item_details,
+                    inventory, add_inventory_item,edit_inventory_item,delete_inventory_item,item_details,record_stock_movement,import_inventory,export_inventory,
                     jobs,create_job,categories, add_category, delete_category,
                     brands, add_brand, delete_brand,
-                    admin_dashboard, slot_calendar, add_slot,toggle_slot_status,
-                    users_list, reports,
-                    admin_service_list,admin_add_service,admin_delete_service,admin_edit_service, create_user)
+                    admin_dashboard, slot_calendar, slot_calendar_month, add_slot, generate_slots, toggle_slot_status,
+                    users_list, reports, report_chart_data, submit_report_job, report_job_status, report_job_download, export_report,
+                    admin_service_list,admin_add_service,admin_delete_service,admin_edit_service, create_user,
+                    appointments_list, assign_mechanic)
 app_name = "adminpanel"
 
 urlpatterns = [
@@ -14,9 +15,12 @@ urlpatterns = [
     # Inventory
     path("inventory/", inventory, name="inventory"),
     path("inventory/add/", add_inventory_item, name="add_inventory_item"),
+    path("inventory/import/", import_inventory, name="import_inventory"),
+    path("inventory/export.<str:fmt>", export_inventory, name="export_inventory"),
     path("inventory/<int:part_id>/edit/", edit_inventory_item, name="edit_inventory_item"),
     path("inventory/<int:part_id>/delete/", delete_inventory_item, name="delete_inventory_item"),
     path("inventory/<int:part_id>/", item_details, name="item_details"),
+    path("inventory/<int:part_id>/stock/", record_stock_movement, name="record_stock_movement"),
 
     # Jobs
     path("jobs/", jobs, name="jobs"),
@@ -37,7 +41,9 @@ urlpatterns = [
     path("", admin_dashboard, name="dashboard"),
 
     path("calendar/", slot_calendar, name="slot_calendar"),
+    path("calendar/month/", slot_calendar_month, name="slot_calendar_month"),
     path("add-slot/", add_slot, name="add_slot"),
+    path("generate-slots/", generate_slots, name="generate_slots"),
     path("toggle-slot/<int:slot_id>/", toggle_slot_status, name="toggle_slot_status"),
     path("users/",users_list, name="users_list"),
 
@@ -45,11 +51,16 @@ urlpatterns = [
     path("users-add/",create_user, name="create_user"),
 
     path("reports/", reports, name="reports"),
+    path("reports/charts.json", report_chart_data, name="report_chart_data"),
     path("reports/full/pdf/", download_full_report_pdf, name="download_full_report_pdf"),
 
     path("reports/slots/pdf/", download_slots_report_pdf, name="download_slots_report_pdf"),
     path("reports/customers/pdf/", download_customers_report_pdf, name="download_customers_report_pdf"),
     path("reports/appointments/pdf/", download_appointments_report_pdf, name="download_appointments_report_pdf"),
+    path("reports/export/<str:kind>.<str:fmt>", export_report, name="export_report"),
+    path("reports/jobs/", submit_report_job, name="submit_report_job"),
+    path("reports/jobs/<int:job_id>/", report_job_status, name="report_job_status"),
+    path("reports/jobs/<int:job_id>/download/", report_job_download, name="report_job_download"),
 
     # List all services
     path('services/', admin_service_list, name='admin_service_list'),
@@ -58,6 +69,6 @@ urlpatterns = [
     path('services/delete/<int:pk>/', admin_delete_service, name='admin_delete_service'),
 
 
-    path("appointments/", views.appointments_list, name="appointments"),
-    path("appointments/<int:appointment_id>/assign/", views.assign_mechanic, name="assign_mechanic"),
+    path("appointments/", appointments_list, name="appointments"),
+    path("appointments/<int:appointment_id>/assign/", assign_mechanic, name="assign_mechanic"),
 ]
\ No newline at end of file
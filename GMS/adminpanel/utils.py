@@ -1,17 +1,36 @@
+from io import BytesIO
+
 from django.http import HttpResponse
 from django.template.loader import get_template
-from xhtml2pdf import pisa
 
+from .lazy_backends import pisa
 
-def render_to_pdf(template_src: str, context: dict, filename: str = "report.pdf") -> HttpResponse:
-    template = get_template(template_src)
-    html = template.render(context)
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+class PDFRenderError(Exception):
+    pass
 
-    status = pisa.CreatePDF(html, dest=response)
+
+def render_pdf_bytes(template_src: str, context: dict) -> bytes:
+    """Render a template to PDF and return the document. Raises PDFRenderError."""
+    html = get_template(template_src).render(context)
+    buf = BytesIO()
+    status = pisa().CreatePDF(html, dest=buf)
     if status.err:
+        raise PDFRenderError(f"xhtml2pdf reported {status.err} error(s) rendering {template_src}")
+    return buf.getvalue()
+
+
+def render_to_pdf(template_src: str, context: dict, filename: str = "report.pdf") -> HttpResponse:
+    return pdf_response(lambda: render_pdf_bytes(template_src, context), filename)
+
+
+def pdf_response(render, filename: str = "report.pdf") -> HttpResponse:
+    """Attachment response for render(), a callable returning PDF bytes."""
+    try:
+        pdf = render()
+    except PDFRenderError:
         return HttpResponse("Error generating PDF", status=500)
 
-    return response
\ No newline at end of file
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
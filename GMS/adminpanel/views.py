@@ -3,21 +3,40 @@ from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from datetime import date, datetime, timedelta
-from django.http import HttpResponseForbidden
+import hashlib
+import json
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.http import require_POST
 from django.contrib.auth import authenticate, login, logout
 from django.core.paginator import Paginator
-from django.db.models import Count, F, Q
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .utils import render_to_pdf
-from .models import Slot, Service
-from .forms import SlotForm, ServiceForm, AdminUserCreateForm
-from .forms import JobVacancyForm, PartForm
+from .part_search import search_parts
+from .parts_io import FORMATS as PART_FORMATS, ImportFileError, export_response, import_parts
+from .stock import InsufficientStock, apply_movement, cached_stock_counts, stock_status_counts
+from .availability import invalidate_date
+from .rollup import record_status_change
+from .report_metrics import filtered_appointments
+from .report_cache import cached_report_metrics, get_or_compute
+from .report_builders import CHARTS, REPORTS, chart_data, chart_sections
+from .report_jobs import submit_report
+from .exports import EXPORTS, FORMATS as EXPORT_FORMATS, streaming_export
+from .slot_events import publish_slot_changes
+from .models import Slot, Service, DailyCapacity, ReportJob
+from .forms import SlotForm, SlotGenerateForm, ServiceForm, AdminUserCreateForm
+from .slot_generator import generate_slots as generate_slot_grid
+from .forms import JobVacancyForm, PartEditForm, PartForm, PartImportForm, StockMovementForm
 from .models import JobVacancy, Part
 from .models import InventoryCategory, Brand
 
 from customer.models import Appointment
-from .report_charts import make_pie_chart, make_bar_chart
+from customer.waitlist import record_freed_slots
+from .chart_cache import chart_cache
 
 from datetime import datetime
 from django.db.models.functions import TruncDate
@@ -57,40 +76,118 @@ def create_user(request):
         "form": form
     })
 
+SLOT_PAGE_SIZE = 50
+
+
+def calendar_window(request):
+    """(view, first day, last day) of the visible calendar range. Month view by default."""
+    view = "week" if request.GET.get("view") == "week" else "month"
+    anchor = parse_date(request.GET.get("start")) or timezone.localdate()
+
+    if view == "week":
+        start = anchor - timedelta(days=anchor.weekday())
+        end = start + timedelta(days=6)
+        prev_start, next_start = start - timedelta(days=7), end + timedelta(days=1)
+    else:
+        start = anchor.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        prev_start, next_start = (start - timedelta(days=1)).replace(day=1), end + timedelta(days=1)
+    return view, start, end, prev_start, next_start
+
+
+def slot_cursor(slot):
+    """Keyset cursor for the position right after `slot` in (date, start_time, id) order."""
+    return f"{slot.date:%Y-%m-%d},{slot.start_time:%H:%M:%S},{slot.id}"
+
+
+def parse_slot_cursor(value):
+    try:
+        day, start, slot_id = value.split(",")
+        return (
+            datetime.strptime(day, "%Y-%m-%d").date(),
+            datetime.strptime(start, "%H:%M:%S").time(),
+            int(slot_id),
+        )
+    except (AttributeError, ValueError):
+        return None
+
+
 @login_required
 @user_passes_test(is_admin)
 def slot_calendar(request):
-    """Show calendar and slots for selected date or all slots"""
-    selected_date = request.GET.get("date")
-    selected_date_obj = None
-    
-    if selected_date:
-        try:
-            selected_date_obj = datetime.strptime(selected_date, "%Y-%m-%d").date()
-            # Filter by specific date
-            slots = Slot.objects.filter(date=selected_date_obj).order_by("start_time")
-        except Exception:
-            # If date parsing fails, show all slots
-            slots = Slot.objects.all().order_by("date", "start_time")
-    else:
-        # No date selected, show all slots
-        slots = Slot.objects.all().order_by("date", "start_time")
-    
+    """Show slots for a selected date, or a month/week window paged by keyset"""
+    selected_date_obj = parse_date(request.GET.get("date"))
+
+    if selected_date_obj:
+        slots = list(Slot.objects.filter(date=selected_date_obj).order_by("start_time"))
+        return render(request, "adminpanel/slot_calendar.html", {
+            "selected_date": selected_date_obj,
+            "slots": slots,
+            "slot_count": len(slots),
+            "showing_all": False,
+        })
+
+    view, start, end, prev_start, next_start = calendar_window(request)
+    slots_qs = Slot.objects.filter(date__range=[start, end]).order_by("date", "start_time", "id")
+
+    cursor = parse_slot_cursor(request.GET.get("after"))
+    if cursor:
+        day, start_time, slot_id = cursor
+        slots_qs = slots_qs.filter(
+            Q(date__gt=day)
+            | Q(date=day, start_time__gt=start_time)
+            | Q(date=day, start_time=start_time, id__gt=slot_id)
+        )
+
+    # one extra row tells us whether there is a next page, without a COUNT(*)
+    page = list(slots_qs[:SLOT_PAGE_SIZE + 1])
+    slots = page[:SLOT_PAGE_SIZE]
+
     context = {
-        "selected_date": selected_date_obj,
+        "selected_date": None,
         "slots": slots,
-        "showing_all": selected_date_obj is None,
+        "slot_count": len(slots),
+        "showing_all": True,
+        "view": view,
+        "window_start": start,
+        "window_end": end,
+        "prev_start": prev_start,
+        "next_start": next_start,
+        "is_paged": cursor is not None,
+        "next_cursor": slot_cursor(slots[-1]) if len(page) > SLOT_PAGE_SIZE else None,
     }
     return render(request, "adminpanel/slot_calendar.html", context)
 
+
+@login_required
+@user_passes_test(is_admin)
+def slot_calendar_month(request):
+    """Per-day total/booked/free slot counts for ?month=YYYY-MM, read from DailyCapacity"""
+    try:
+        first = datetime.strptime(request.GET.get("month") or "", "%Y-%m").date()
+    except ValueError:
+        first = timezone.localdate().replace(day=1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+    days = [
+        {"date": row.date.isoformat(), "total": row.total, "booked": row.booked, "free": row.free}
+        for row in DailyCapacity.objects.filter(date__range=[first, last], total__gt=0)
+    ]
+    return JsonResponse({"month": f"{first:%Y-%m}", "days": days})
+
 @login_required
 @user_passes_test(is_admin)
 def toggle_slot_status(request, slot_id):
     """Toggle slot status between available and booked"""
     if request.method == "POST":
-        slot = Slot.objects.get(id=slot_id)
-        slot.is_booked = not slot.is_booked
-        slot.save()
+        with transaction.atomic():
+            slot = Slot.objects.select_for_update().get(id=slot_id)
+            slot.is_booked = not slot.is_booked
+            slot.save()
+            invalidate_date(slot.date)
+            publish_slot_changes(slot.date, {slot.id: slot.is_booked})
+            if not slot.is_booked:
+                record_freed_slots([(slot.id, slot.date)])
         
         status = "booked" if slot.is_booked else "available"
         messages.success(request, f"Slot status changed to {status}.")
@@ -113,7 +210,9 @@ def add_slot(request):
             slot = form.save(commit=False)
             slot.created_by = request.user
             try:
-                slot.save()
+                with transaction.atomic():
+                    slot.save()
+                    invalidate_date(slot.date)
                 messages.success(request, "Slot added successfully.")
                 return redirect(reverse("adminpanel:slot_calendar") + f"?date={slot.date}")
             except Exception as e:
@@ -122,6 +221,23 @@ def add_slot(request):
         form = SlotForm()
     return render(request, "adminpanel/add_slot.html", {"form": form})
 
+@login_required
+@user_passes_test(is_admin)
+def generate_slots(request):
+    """Generate a slot grid for a date range from a slot template"""
+    if request.method == "POST":
+        form = SlotGenerateForm(request.POST)
+        if form.is_valid():
+            start_date = form.cleaned_data["start_date"]
+            inserted, skipped = generate_slot_grid(
+                form.cleaned_data["template"], start_date, form.cleaned_data["end_date"]
+            )
+            messages.success(request, f"Generated {inserted} slot(s), skipped {skipped} existing.")
+            return redirect(reverse("adminpanel:slot_calendar") + f"?date={start_date}")
+    else:
+        form = SlotGenerateForm()
+    return render(request, "adminpanel/generate_slots.html", {"form": form})
+
 @login_required
 @user_passes_test(is_admin)
 # def customers(request):
@@ -165,317 +281,183 @@ def get_date_range(request):
     return start_date, end_date
 
 
-def filter_slots(slots_qs, start_date, end_date):
-    if start_date and end_date:
-        return slots_qs.filter(date__range=[start_date, end_date])
-    if start_date:
-        return slots_qs.filter(date__gte=start_date)
-    if end_date:
-        return slots_qs.filter(date__lte=end_date)
-    return slots_qs
-
-
-def filter_appointments(app_qs, start_date, end_date):
-    if start_date and end_date:
-        return app_qs.filter(slot__date__range=[start_date, end_date])
-    if start_date:
-        return app_qs.filter(slot__date__gte=start_date)
-    if end_date:
-        return app_qs.filter(slot__date__lte=end_date)
-    return app_qs
-
-
-def filter_customers(customers_qs, start_date, end_date):
-    # Customers registered within range
-    if start_date and end_date:
-        return customers_qs.filter(date_joined__date__range=[start_date, end_date])
-    if start_date:
-        return customers_qs.filter(date_joined__date__gte=start_date)
-    if end_date:
-        return customers_qs.filter(date_joined__date__lte=end_date)
-    return customers_qs
-
-
-from django.db.models import Count
-
-def appointments_per_day_chart(appointments_qs):
-    daily = (
-        appointments_qs
-        .values("slot__date")
-        .annotate(total=Count("id"))
-        .order_by("slot__date")
-    )
-
-    labels = [str(row["slot__date"]) for row in daily]
-    values = [row["total"] for row in daily]
-
-    return make_bar_chart(labels, values, "Appointments per Day", xlabel="Date", ylabel="Appointments")
-
-
 @login_required
 @user_passes_test(is_admin)
 def reports(request):
     """
-    Web page: date range + charts + buttons for all PDFs.
+    Web page: date range + KPIs + buttons for all PDFs. The charts are
+    fetched from report_chart_data and drawn client-side.
     """
-    User = get_user_model()
     start_date, end_date = get_date_range(request)
-
-    slots = filter_slots(Slot.objects.all(), start_date, end_date)
-    appointments = filter_appointments(
-        Appointment.objects.select_related("user", "vehicle", "slot").all(),
-        start_date,
-        end_date,
-    )
-    customers_in_range = filter_customers(User.objects.filter(role="Customer"), start_date, end_date)
-
-    # Slot KPIs
-    total_slots = slots.count()
-    booked_slots = slots.filter(is_booked=True).count()
-    available_slots = total_slots - booked_slots
-    utilization = (booked_slots / total_slots * 100) if total_slots else 0
-
-    # Appointment KPIs
-    total_appointments = appointments.count()
-    appointment_status = appointments.aggregate(
-        pending=Count("id", filter=Q(status="Pending")),
-        confirmed=Count("id", filter=Q(status="Confirmed")),
-        completed=Count("id", filter=Q(status="Completed")),
-        cancelled=Count("id", filter=Q(status="Cancelled")),
-    )
-
-    # Charts for web + pdf
-    slot_pie = make_pie_chart(["Booked", "Available"], [booked_slots, available_slots], "Slot Utilization")
-    status_bar = make_bar_chart(
-        ["Pending", "Confirmed", "Completed", "Cancelled"],
-        [
-            appointment_status["pending"],
-            appointment_status["confirmed"],
-            appointment_status["completed"],
-            appointment_status["cancelled"],
-        ],
-        "Appointments by Status",
-        ylabel="Count",
-    )
-
-    appt_daily_bar = appointments_per_day_chart(appointments)
-
-    # Customers chart: verified vs not verified (within range)
-    verified_yes = customers_in_range.filter(is_verified=True).count()
-    verified_no = customers_in_range.filter(is_verified=False).count()
-    customers_verify_pie = make_pie_chart(
-        ["Verified", "Not Verified"], [verified_yes, verified_no], "Customer Verification (in range)"
+    metrics = cached_report_metrics(start_date, end_date)
+    latest_appointments = get_or_compute(
+        "latest-appointments", start_date, end_date,
+        lambda: list(
+            filtered_appointments(start_date, end_date)
+            .select_related("user", "vehicle", "slot")
+            .order_by("-created_at")[:10]
+        ),
     )
+    job_id = request.GET.get("job", "")  # set by report_pdf_response: poll this job
 
     context = {
         "start_date": start_date,
         "end_date": end_date,
 
-        "total_slots": total_slots,
-        "booked_slots": booked_slots,
-        "available_slots": available_slots,
-        "utilization": round(utilization, 2),
+        "total_slots": metrics.total_slots,
+        "booked_slots": metrics.booked_slots,
+        "available_slots": metrics.available_slots,
+        "utilization": metrics.utilization,
 
-        "total_appointments": total_appointments,
-        "appointment_status": appointment_status,
+        "total_appointments": metrics.total_appointments,
+        "appointment_status": metrics.appointment_status,
+        "revenue": metrics.revenue,
 
-        "customers_in_range": customers_in_range.count(),
+        "customers_in_range": metrics.total_customers,
 
-        # charts
-        "slot_pie": slot_pie,
-        "status_bar": status_bar,
-        "appt_daily_bar": appt_daily_bar,
-        "customers_verify_pie": customers_verify_pie,
-
-        "latest_appointments": appointments.order_by("-created_at")[:10],
+        "latest_appointments": latest_appointments,
+        "chart_cache_stats": chart_cache.stats(),
+        "pending_job": ReportJob.objects.filter(pk=job_id).first() if job_id.isdigit() else None,
     }
 
     return render(request, "adminpanel/reports.html", context)
 
 
-# -----------------------
-# FULL REPORT PDF (CHARTS)
-# -----------------------
 @login_required
 @user_passes_test(is_admin)
-def download_full_report_pdf(request):
-    User = get_user_model()
-    start_date, end_date = get_date_range(request)
-
-    slots = filter_slots(Slot.objects.all(), start_date, end_date)
-    appointments = filter_appointments(
-        Appointment.objects.select_related("user", "vehicle", "slot").all(),
-        start_date,
-        end_date,
-    )
-    customers_in_range = filter_customers(User.objects.filter(role="Customer"), start_date, end_date)
-
-    total_slots = slots.count()
-    booked_slots = slots.filter(is_booked=True).count()
-    available_slots = total_slots - booked_slots
-    utilization = (booked_slots / total_slots * 100) if total_slots else 0
-
-    appointment_status = appointments.aggregate(
-        pending=Count("id", filter=Q(status="Pending")),
-        confirmed=Count("id", filter=Q(status="Confirmed")),
-        completed=Count("id", filter=Q(status="Completed")),
-        cancelled=Count("id", filter=Q(status="Cancelled")),
-    )
-
-    slot_pie = make_pie_chart(["Booked", "Available"], [booked_slots, available_slots], "Slot Utilization")
-    status_bar = make_bar_chart(
-        ["Pending", "Confirmed", "Completed", "Cancelled"],
-        [
-            appointment_status["pending"],
-            appointment_status["confirmed"],
-            appointment_status["completed"],
-            appointment_status["cancelled"],
-        ],
-        "Appointments by Status",
-        ylabel="Count",
-    )
-    appt_daily_bar = appointments_per_day_chart(appointments)
-
-    verified_yes = customers_in_range.filter(is_verified=True).count()
-    verified_no = customers_in_range.filter(is_verified=False).count()
-    customers_verify_pie = make_pie_chart(
-        ["Verified", "Not Verified"], [verified_yes, verified_no], "Customer Verification (in range)"
-    )
+def report_chart_data(request):
+    """
+    Chart labels and values as compact JSON (?charts=a,b picks charts).
+    Sent with an ETag so an unchanged range revalidates with a 304.
+    """
+    names = [n for n in request.GET.get("charts", "").split(",") if n] or list(CHARTS)
+    if any(name not in CHARTS for name in names):
+        return JsonResponse({"error": "Unknown chart."}, status=400)
 
-    context = {
-        "title": "e-Garage Full Report",
-        "start_date": start_date,
-        "end_date": end_date,
+    start_date, end_date = get_date_range(request)
+    metrics = cached_report_metrics(start_date, end_date, sections=chart_sections(names))
+    body = json.dumps(chart_data(metrics, names), cls=DjangoJSONEncoder, separators=(",", ":"))
 
-        "total_slots": total_slots,
-        "booked_slots": booked_slots,
-        "available_slots": available_slots,
-        "utilization": round(utilization, 2),
+    etag = quote_etag(hashlib.sha256(body.encode()).hexdigest()[:32])
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response.headers["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-        "total_appointments": appointments.count(),
-        "appointment_status": appointment_status,
 
-        "customers_in_range": customers_in_range.count(),
+# -----------------------
+# REPORT PDFS (CHARTS)
+# -----------------------
+def report_pdf_response(kind, request):
+    """
+    Queue the PDF as a ReportJob (or join the identical one already queued)
+    and go back to the reports page, which polls the job and downloads it.
+    PDFs are never rendered in the request.
+    """
+    start_date, end_date = get_date_range(request)
+    job, created = submit_report(kind, start_date, end_date, request.user)
+    if created:
+        messages.success(request, "Report queued. The download starts when it is ready.")
+    else:
+        messages.info(request, "This report is already being prepared.")
 
-        "slot_pie": slot_pie,
-        "status_bar": status_bar,
-        "appt_daily_bar": appt_daily_bar,
-        "customers_verify_pie": customers_verify_pie,
+    params = {"job": job.pk}
+    if start_date:
+        params["start"] = start_date.isoformat()
+    if end_date:
+        params["end"] = end_date.isoformat()
+    return redirect(f"{reverse('adminpanel:reports')}?{urlencode(params)}")
 
-        "appointments": appointments.order_by("-created_at")[:25],
-    }
 
-    return render_to_pdf("adminpanel/pdf/report_full_pdf.html", context, filename="e_garage_full_report.pdf")
+@login_required
+@user_passes_test(is_admin)
+def download_full_report_pdf(request):
+    return report_pdf_response("full", request)
 
 
-# -----------------------
-# SLOTS PDF (CHARTS)
-# -----------------------
 @login_required
 @user_passes_test(is_admin)
 def download_slots_report_pdf(request):
-    start_date, end_date = get_date_range(request)
-    slots = filter_slots(Slot.objects.all(), start_date, end_date).order_by("-date", "start_time")
+    return report_pdf_response("slots", request)
 
-    total_slots = slots.count()
-    booked_slots = slots.filter(is_booked=True).count()
-    available_slots = total_slots - booked_slots
-    utilization = (booked_slots / total_slots * 100) if total_slots else 0
 
-    slot_pie = make_pie_chart(["Booked", "Available"], [booked_slots, available_slots], "Slot Utilization")
+@login_required
+@user_passes_test(is_admin)
+def download_appointments_report_pdf(request):
+    return report_pdf_response("appointments", request)
 
-    context = {
-        "title": "Slots Report",
-        "start_date": start_date,
-        "end_date": end_date,
-        "total_slots": total_slots,
-        "booked_slots": booked_slots,
-        "available_slots": available_slots,
-        "utilization": round(utilization, 2),
-        "slot_pie": slot_pie,
-        "slots": slots,
-    }
 
-    return render_to_pdf("adminpanel/pdf/slots_report_pdf.html", context, filename="slots_report.pdf")
+@login_required
+@user_passes_test(is_admin)
+def download_customers_report_pdf(request):
+    return report_pdf_response("customers", request)
 
 
 # -----------------------
-# APPOINTMENTS PDF (CHARTS)
+# STREAMING EXPORTS (CSV / JSONL)
 # -----------------------
 @login_required
 @user_passes_test(is_admin)
-def download_appointments_report_pdf(request):
+def export_report(request, kind, fmt):
+    if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export.")
     start_date, end_date = get_date_range(request)
-    appointments = filter_appointments(
-        Appointment.objects.select_related("user", "vehicle", "slot").all(),
-        start_date,
-        end_date,
-    ).order_by("-created_at")
-
-    appointment_status = appointments.aggregate(
-        pending=Count("id", filter=Q(status="Pending")),
-        confirmed=Count("id", filter=Q(status="Confirmed")),
-        completed=Count("id", filter=Q(status="Completed")),
-        cancelled=Count("id", filter=Q(status="Cancelled")),
-    )
+    return streaming_export(kind, fmt, start_date, end_date)
 
-    status_bar = make_bar_chart(
-        ["Pending", "Confirmed", "Completed", "Cancelled"],
-        [
-            appointment_status["pending"],
-            appointment_status["confirmed"],
-            appointment_status["completed"],
-            appointment_status["cancelled"],
-        ],
-        "Appointments by Status",
-        ylabel="Count",
-    )
 
-    appt_daily_bar = appointments_per_day_chart(appointments)
-
-    context = {
-        "title": "Appointments Report",
-        "start_date": start_date,
-        "end_date": end_date,
-        "total_appointments": appointments.count(),
-        "appointment_status": appointment_status,
-        "status_bar": status_bar,
-        "appt_daily_bar": appt_daily_bar,
-        "appointments": appointments[:40],  # keep pdf smaller
+# -----------------------
+# BACKGROUND REPORT JOBS
+# -----------------------
+def report_job_json(job):
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "status_url": reverse("adminpanel:report_job_status", args=[job.id]),
     }
-
-    return render_to_pdf("adminpanel/pdf/appointments_report_pdf.html", context, filename="appointments_report.pdf")
+    if job.status == "done":
+        data["download_url"] = reverse("adminpanel:report_job_download", args=[job.id])
+    elif job.status == "failed":
+        data["error"] = job.error
+    return data
 
 
-# -----------------------
-# CUSTOMERS PDF (CHARTS)
-# -----------------------
 @login_required
 @user_passes_test(is_admin)
-def download_customers_report_pdf(request):
-    User = get_user_model()
-    start_date, end_date = get_date_range(request)
+@require_POST
+def submit_report_job(request):
+    """Queue a PDF report (or join the identical one already queued)."""
+    kind = request.POST.get("kind")
+    if kind not in REPORTS:
+        return JsonResponse({"error": "Unknown report."}, status=400)
+    start_date = parse_date(request.POST.get("start"))
+    end_date = parse_date(request.POST.get("end"))
 
-    customers = filter_customers(User.objects.filter(role="Customer"), start_date, end_date).order_by("name")
+    job, created = submit_report(kind, start_date, end_date, request.user)
+    return JsonResponse(report_job_json(job), status=202 if created else 200)
 
-    verified_yes = customers.filter(is_verified=True).count()
-    verified_no = customers.filter(is_verified=False).count()
-    customers_verify_pie = make_pie_chart(
-        ["Verified", "Not Verified"], [verified_yes, verified_no], "Customer Verification (in range)"
-    )
 
-    context = {
-        "title": "Customers Report",
-        "start_date": start_date,
-        "end_date": end_date,
-        "total_customers": customers.count(),
-        "verified_yes": verified_yes,
-        "verified_no": verified_no,
-        "customers_verify_pie": customers_verify_pie,
-        "customers": customers,
-    }
+@login_required
+@user_passes_test(is_admin)
+def report_job_status(request, job_id):
+    job = get_object_or_404(ReportJob, pk=job_id)
+    return JsonResponse(report_job_json(job))
+
 
-    return render_to_pdf("adminpanel/pdf/customers_report_pdf.html", context, filename="customers_report.pdf")
+@login_required
+@user_passes_test(is_admin)
+def report_job_download(request, job_id):
+    job = get_object_or_404(ReportJob, pk=job_id, status="done")
+    if not job.file:
+        raise Http404("The report has no file.")
+    try:
+        pdf = job.file.open("rb")
+    except FileNotFoundError:
+        raise Http404("The report file is gone; request the report again.")
+    _template, filename, _build = REPORTS[job.kind]
+    return FileResponse(pdf, as_attachment=True, filename=filename, content_type="application/pdf")
 
 
 
@@ -520,9 +502,7 @@ def is_admin(user):
 @user_passes_test(is_admin)
 def admin_dashboard(request):
     # Inventory stats
-    total_items = Part.objects.count()
-    low_stock_items = Part.objects.filter(quantity__gt=0, quantity__lte=F("min_stock_level")).count()
-    out_of_stock_items = Part.objects.filter(quantity=0).count()
+    stock = cached_stock_counts()
 
     # Recent inventory for table
     recent_inventory = Part.objects.all().order_by("-created_at")[:5]
@@ -553,9 +533,9 @@ def admin_dashboard(request):
 
     context = {
         "page_title": "Dashboard",
-        "total_items": total_items,
-        "low_stock_items": low_stock_items,
-        "out_of_stock_items": out_of_stock_items,
+        "total_items": stock["total"],
+        "low_stock_items": stock["low_stock"],
+        "out_of_stock_items": stock["out_of_stock"],
         "recent_inventory": recent_inventory,
         # "total_jobs": total_jobs,
         # "recent_jobs": recent_jobs,
@@ -569,6 +549,14 @@ def admin_dashboard(request):
 
 
 # -------- Inventory (needed for your dashboard links) --------
+class KnownCountPaginator(Paginator):
+    """Paginator given the total up front, so it does not run its own COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
 @login_required
 @user_passes_test(is_admin)
 def inventory(request):
@@ -576,16 +564,13 @@ def inventory(request):
     qs = Part.objects.select_related("category", "brand").all()
 
     if search_query:
-            qs = qs.filter(
-        Q(name__icontains=search_query) |
-        Q(compatible_model__icontains=search_query) |
-        Q(category__category_name__icontains=search_query) |
-        Q(brand__brand_name__icontains=search_query)
-    )
-
-    out_of_stock_items = qs.filter(quantity=0).count()
+        qs = search_parts(qs, search_query)
+        stock = stock_status_counts(qs)
+    else:
+        stock = cached_stock_counts()
+    out_of_stock_items = stock["out_of_stock"]
 
-    paginator = Paginator(qs, 10)
+    paginator = KnownCountPaginator(qs, 10, count=stock["total"])
     page_number = request.GET.get("page")
     inventory_items = paginator.get_page(page_number)
 
@@ -601,13 +586,49 @@ def inventory(request):
     )
 
 
+@login_required
+@user_passes_test(is_admin)
+def import_inventory(request):
+    result = None
+    if request.method == "POST":
+        form = PartImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                result = import_parts(upload, upload.format, user=request.user)
+            except ImportFileError as e:
+                form.add_error("file", str(e))
+    else:
+        form = PartImportForm()
+
+    return render(
+        request,
+        "adminpanel/import_inventory.html",
+        {"page_title": "Inventory", "form": form, "result": result},
+    )
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_inventory(request, fmt):
+    if fmt not in PART_FORMATS:
+        raise Http404("Unknown export format.")
+    return export_response(fmt)
+
+
 @login_required
 @user_passes_test(is_admin)
 def add_inventory_item(request):
     if request.method == "POST":
         form = PartForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                part = form.save(commit=False)
+                opening = part.quantity
+                part.quantity = 0
+                part.save()
+                if opening:
+                    apply_movement(part, "receive", opening, note="Opening stock", user=request.user)
             return redirect("adminpanel:inventory")
     else:
         form = PartForm()
@@ -621,12 +642,13 @@ def edit_inventory_item(request, part_id):
     item = get_object_or_404(Part, part_id=part_id)
 
     if request.method == "POST":
-        form = PartForm(request.POST, request.FILES, instance=item)
+        form = PartEditForm(request.POST, request.FILES, instance=item)
         if form.is_valid():
-            form.save()
+            # never write quantity back: a stock movement may have changed it meanwhile
+            form.save(commit=False).save(update_fields=[*PartEditForm.Meta.fields, "updated_at"])
             return redirect("adminpanel:inventory")
     else:
-        form = PartForm(instance=item)
+        form = PartEditForm(instance=item)
 
     return render(
         request,
@@ -657,7 +679,35 @@ def delete_inventory_item(request, part_id):
 @user_passes_test(is_admin)
 def item_details(request, part_id):
     item = get_object_or_404(Part.objects.select_related("category", "brand"), part_id=part_id)
-    return render(request, "adminpanel/item_details.html", {"page_title": "Inventory", "item": item})
+    return render(request, "adminpanel/item_details.html", {
+        "page_title": "Inventory",
+        "item": item,
+        "movement_form": StockMovementForm(),
+        "movements": item.movements.select_related("created_by")[:20],
+    })
+
+
+@login_required
+@user_passes_test(is_admin)
+@require_POST
+def record_stock_movement(request, part_id):
+    item = get_object_or_404(Part, part_id=part_id)
+    form = StockMovementForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+        return redirect("adminpanel:item_details", part_id=part_id)
+
+    try:
+        movement = apply_movement(
+            item, form.cleaned_data["kind"], form.cleaned_data["quantity"],
+            note=form.cleaned_data["note"], user=request.user,
+        )
+    except InsufficientStock as e:
+        messages.error(request, str(e))
+    else:
+        messages.success(request, f"Stock updated: {movement.change:+d}, now {movement.quantity_after}.")
+    return redirect("adminpanel:item_details", part_id=part_id)
 
 
 # -------- Jobs (Vacancy) --------
@@ -831,9 +881,12 @@ def assign_mechanic(request, appointment_id):
         mechanic = get_object_or_404(mechanics, pk=mechanic_id)
 
         # assign mechanic
+        old_status = appt.status
         appt.mechanic = mechanic          # make sure Appointment has mechanic FK
         appt.status = "assigned"          # optional: if you have status field
-        appt.save()
+        with transaction.atomic():
+            appt.save()
+            record_status_change(appt, old_status)
 
         messages.success(request, f"Mechanic assigned: {mechanic.get_full_name() or mechanic.username}")
         return redirect("adminpanel:appointments")
@@ -0,0 +1,242 @@
+"""
+Appointment booking against the slot grid.
+
+A service longer than one slot is booked on a run of back-to-back free
+slots starting at the slot the customer picked. Two strategies reserve
+the run:
+
+- "lock": one ordered select_for_update over the run, then an UPDATE.
+  Rows are always locked in the same order, so bookings cannot deadlock.
+- "claim": a single UPDATE ... WHERE is_booked = false, checked by its
+  row count. No separate locking read, so contended bookings fail fast
+  instead of queueing on the row lock.
+
+While the customer fills in the form, the run can be held for a few
+minutes (SlotHold, keyed by session). Other sessions neither see nor
+book held slots; expired holds are swept by release_expired_holds().
+
+Slots freed by a cancellation or an expired hold are queued for the
+waitlist (see customer.waitlist).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from adminpanel.availability import invalidate_date, invalidate_dates
+from adminpanel.capacity import record_booked
+from adminpanel.models import Slot, SlotHold
+from adminpanel.rollup import record_appointment, record_status_change
+from adminpanel.slot_events import publish_slot_changes
+from staff.capacity import spare_capacity
+
+from .models import Appointment
+from .waitlist import record_freed_slots
+
+
+class SlotUnavailable(Exception):
+    """The selected slot (or one it needs) can no longer be booked."""
+
+
+def _held_by_others(session_key):
+    """Q matching slots with a live hold that belongs to another session."""
+    held = Q(hold__expires_at__gt=timezone.now())
+    if session_key:
+        held &= ~Q(hold__session_key=session_key)
+    return held
+
+
+def slot_run_ids(first_slot, needed, session_key=None):
+    """
+    Ids of the contiguous free slots starting at first_slot that together cover
+    `needed` minutes, or None if there is no such run. Slots held by another
+    session do not count as free.
+    """
+    rows = (
+        Slot.objects
+        .filter(date=first_slot.date, is_booked=False, start_time__gte=first_slot.start_time)
+        .exclude(_held_by_others(session_key))
+        .order_by("start_time", "end_time")
+        .values_list("id", "start_time", "end_time", "duration")
+    )
+    run_ids = []
+    total = 0
+    prev_end = None
+    for slot_id, start, end, duration in rows:
+        if not run_ids:
+            if slot_id != first_slot.pk:
+                continue
+        elif start != prev_end:
+            break
+        run_ids.append(slot_id)
+        total += duration
+        prev_end = end
+        if total >= max(needed, 1):
+            return run_ids
+    return None
+
+
+def _lock_run(run_ids):
+    """Lock strategy: lock every slot of the run, check it, then mark it booked."""
+    booked = list(
+        Slot.objects
+        .select_for_update()
+        .filter(id__in=run_ids)
+        .order_by("date", "start_time", "id")
+        .values_list("is_booked", flat=True)
+    )
+    if len(booked) != len(run_ids) or any(booked):
+        raise SlotUnavailable("This slot is already booked. Please choose another.")
+    Slot.objects.filter(id__in=run_ids).update(is_booked=True)
+
+
+def _claim_run(run_ids):
+    """
+    Claim strategy: a single conditional UPDATE ... WHERE is_booked = false.
+    If it did not claim every slot of the run, the surrounding transaction
+    is rolled back so a partial claim never sticks.
+    """
+    claimed = Slot.objects.filter(id__in=run_ids, is_booked=False).update(is_booked=True)
+    if claimed != len(run_ids):
+        raise SlotUnavailable("This slot is already booked. Please choose another.")
+
+
+def _over_capacity(day, run_ids):
+    """Whether the (already reserved) run needs more mechanics than are on duty."""
+    slots = list(Slot.objects.filter(date=day).values_list("id", "start_time", "end_time", "is_booked"))
+    spare = spare_capacity(day, slots)
+    return spare is not None and any(spare[slot_id] < 0 for slot_id in run_ids)
+
+
+BOOKING_STRATEGIES = {
+    "lock": _lock_run,
+    "claim": _claim_run,
+}
+
+
+def book_appointment(appointment, strategy=None, session_key=None):
+    """
+    Book the run of slots the appointment's service needs, starting at
+    appointment.slot, and save the appointment. Raises SlotUnavailable.
+
+    strategy is "lock" (select_for_update) or "claim" (conditional UPDATE);
+    it defaults to settings.SLOT_BOOKING_STRATEGY. Holds placed by
+    session_key on the run are converted into the booking.
+    """
+    strategy = strategy or getattr(settings, "SLOT_BOOKING_STRATEGY", "lock")
+    try:
+        reserve = BOOKING_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown booking strategy: {strategy}")
+
+    first_slot = appointment.slot
+
+    with transaction.atomic():
+        run_ids = slot_run_ids(first_slot, appointment.service.duration, session_key)
+        if run_ids is None:
+            raise SlotUnavailable("This slot is no longer available for the selected service. Please choose another.")
+
+        reserve(run_ids)
+        # a hold taken by someone else between the read above and the reserve
+        others = SlotHold.objects.filter(slot_id__in=run_ids, expires_at__gt=timezone.now())
+        if others.exclude(session_key=session_key).exists():
+            raise SlotUnavailable("This slot is being booked by someone else. Please choose another.")
+        if _over_capacity(first_slot.date, run_ids):
+            raise SlotUnavailable("No mechanic is free for this time. Please choose another slot.")
+
+        appointment.save()
+        appointment.slots.set(run_ids)
+        record_appointment(appointment)
+        SlotHold.objects.filter(slot_id__in=run_ids).delete()
+        record_booked(first_slot.date, len(run_ids))
+        invalidate_date(first_slot.date)
+        publish_slot_changes(first_slot.date, dict.fromkeys(run_ids, True))
+
+    return run_ids
+
+
+def hold_slots(first_slot, service, session_key):
+    """
+    Hold the run of slots `service` needs from first_slot for SLOT_HOLD_SECONDS,
+    replacing any earlier hold of the same session. Returns (slot ids, expiry).
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=getattr(settings, "SLOT_HOLD_SECONDS", 300))
+
+    with transaction.atomic():
+        released = release_holds(session_key)
+        run_ids = slot_run_ids(first_slot, service.duration, session_key)
+        if run_ids is None:
+            raise SlotUnavailable("This slot is no longer available for the selected service. Please choose another.")
+
+        SlotHold.objects.filter(slot_id__in=run_ids, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                SlotHold.objects.bulk_create([
+                    SlotHold(slot_id=slot_id, session_key=session_key, expires_at=expires_at)
+                    for slot_id in run_ids
+                ])
+        except IntegrityError:
+            raise SlotUnavailable("This slot is being booked by someone else. Please choose another.")
+
+        invalidate_dates(released | {first_slot.date})
+
+    return run_ids, expires_at
+
+
+def release_holds(session_key):
+    """Drop every hold of a session. Returns the set of dates that had holds."""
+    holds = SlotHold.objects.filter(session_key=session_key)
+    days = set(holds.values_list("slot__date", flat=True))
+    if days:
+        holds.delete()
+        invalidate_dates(days)
+    return days
+
+
+def release_expired_holds(now=None):
+    """
+    Set-based sweep: delete every expired hold with one DELETE.
+    Returns (number released, dates affected).
+    """
+    expired = SlotHold.objects.filter(expires_at__lte=now or timezone.now())
+    with transaction.atomic():
+        slots = list(expired.values_list("slot_id", "slot__date"))
+        days = {day for _, day in slots}
+        released, _ = expired.delete()
+        invalidate_dates(days)
+        record_freed_slots(slots)
+    return released, days
+
+
+def cancel_appointment(appointment):
+    """
+    Cancel a Pending or Confirmed appointment and free its slots.
+    Returns False if it was already completed or cancelled.
+    """
+    with transaction.atomic():
+        appointment = Appointment.objects.select_for_update().get(pk=appointment.pk)
+        if appointment.status not in ("Pending", "Confirmed"):
+            return False
+        old_status = appointment.status
+        appointment.status = "Cancelled"
+        appointment.save(update_fields=["status"])
+        record_status_change(appointment, old_status)
+
+        day = appointment.slot.date
+        slot_ids = list(appointment.slots.values_list("id", flat=True)) or [appointment.slot_id]
+        freed_ids = list(
+            Slot.objects.select_for_update()
+            .filter(id__in=slot_ids, is_booked=True)
+            .order_by("date", "start_time", "id")
+            .values_list("id", flat=True)
+        )
+        if freed_ids:
+            Slot.objects.filter(id__in=freed_ids).update(is_booked=False)
+            record_booked(day, -len(freed_ids))
+            invalidate_date(day)
+            publish_slot_changes(day, dict.fromkeys(freed_ids, False))
+            record_freed_slots((slot_id, day) for slot_id in freed_ids)
+    return True
@@ -4,6 +4,7 @@ from django.contrib.auth.password_validation import validate_password
 from .models import *
 from adminpanel.models import Slot, Service
 from django.utils.dateparse import parse_date
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -202,4 +203,37 @@ class AppointmentCreateForm(forms.ModelForm):
 
             if date_obj:
                 qs = Slot.objects.filter(date=date_obj, is_booked=False).order_by("start_time")
-                self.fields["slot"].queryset = qs
\ No newline at end of file
+                self.fields["slot"].queryset = qs
+
+class WaitlistForm(forms.ModelForm):
+    MAX_WINDOW_DAYS = 31
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ["vehicle", "service", "date_from", "date_to"]
+        widgets = {
+            "date_from": forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+            "date_to": forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        self.fields["date_to"].required = False
+        self.fields["service"].queryset = Service.objects.filter(is_active=True)
+        if user:
+            self.fields["vehicle"].queryset = Vehicle.objects.filter(user=user)
+
+    def clean(self):
+        cleaned = super().clean()
+        start = cleaned.get("date_from")
+        end = cleaned.get("date_to") or start
+        if start and end:
+            if start < timezone.localdate():
+                self.add_error("date_from", "The waitlist window cannot start in the past.")
+            elif end < start:
+                self.add_error("date_to", "End date must be on or after the start date.")
+            elif (end - start).days >= self.MAX_WINDOW_DAYS:
+                self.add_error("date_to", f"Waitlist for at most {self.MAX_WINDOW_DAYS} days at a time.")
+            cleaned["date_to"] = end
+        return cleaned
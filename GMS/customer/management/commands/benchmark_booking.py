@@ -0,0 +1,142 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as dtime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from adminpanel.models import DailyCapacity, Slot, Service
+from customer.booking import BOOKING_STRATEGIES, SlotUnavailable, book_appointment
+from customer.models import Appointment, Vehicle
+
+User = get_user_model()
+
+BENCH_EMAIL = 'booking-benchmark@example.invalid'
+BENCH_DATE = date(2999, 1, 1)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent bookings at a few slots and compare booking strategies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200, help='Booking attempts per strategy')
+        parser.add_argument('--slots', type=int, default=5, help='Number of contended slots')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent booking threads')
+        parser.add_argument(
+            '--strategy', choices=[*BOOKING_STRATEGIES, 'all'], default='all',
+            help='Strategy to benchmark (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        strategies = list(BOOKING_STRATEGIES) if options['strategy'] == 'all' else [options['strategy']]
+
+        user, _ = User.objects.get_or_create(
+            email=BENCH_EMAIL, defaults={'name': 'Booking Benchmark', 'is_active': False}
+        )
+        vehicle, _ = Vehicle.objects.get_or_create(
+            user=user, plate_no='BENCH-0', defaults={'model': 'Benchmark', 'year': 2000}
+        )
+        service = Service.objects.create(name='Booking benchmark', price=0, duration=60, is_active=False)
+
+        try:
+            for offset, strategy in enumerate(strategies):
+                day = BENCH_DATE + timedelta(days=offset)
+                Slot.objects.bulk_create([
+                    Slot(date=day, start_time=dtime(h), end_time=dtime(h + 1), duration=60)
+                    for h in range(options['slots'])
+                ])
+                slot_ids = list(Slot.objects.filter(date=day).values_list('id', flat=True))
+                result = self._run(strategy, slot_ids, user, vehicle, service, options)
+                self._report(strategy, result)
+        finally:
+            Appointment.objects.filter(service=service).delete()
+            Slot.objects.filter(date__gte=BENCH_DATE).delete()
+            DailyCapacity.objects.filter(date__gte=BENCH_DATE).delete()
+            service.delete()
+            user.delete()
+
+    def _run(self, strategy, slot_ids, user, vehicle, service, options):
+        latencies = []
+        outcomes = {'booked': 0, 'conflict': 0, 'error': 0}
+        lock = threading.Lock()
+
+        def attempt(i):
+            appt = Appointment(
+                user=user, vehicle=vehicle, service=service,
+                slot=Slot.objects.get(pk=slot_ids[i % len(slot_ids)]),
+            )
+            started = time.perf_counter()
+            try:
+                book_appointment(appt, strategy=strategy)
+                outcome = 'booked'
+            except SlotUnavailable:
+                outcome = 'conflict'
+            except Exception:
+                outcome = 'error'
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] += 1
+
+        def worker(indices):
+            try:
+                for i in indices:
+                    attempt(i)
+            finally:
+                connection.close()
+
+        threads = max(1, options['threads'])
+        batches = [range(t, options['bookings'], threads) for t in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, batches))
+        wall = time.perf_counter() - started
+
+        double_booked = sum(
+            row['n'] - 1
+            for row in (
+                Appointment.slots.through.objects
+                .filter(slot_id__in=slot_ids)
+                .values('slot_id')
+                .annotate(n=Count('id'))
+                .filter(n__gt=1)
+            )
+        )
+
+        return {
+            'wall': wall,
+            'latencies': latencies,
+            'outcomes': outcomes,
+            'double_booked': double_booked,
+        }
+
+    def _report(self, strategy, result):
+        latencies = result['latencies']
+        outcomes = result['outcomes']
+        throughput = len(latencies) / result['wall'] if result['wall'] else 0
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Strategy: {strategy}'))
+        self.stdout.write(
+            f"  attempts: {len(latencies)}  booked: {outcomes['booked']}  "
+            f"conflicts: {outcomes['conflict']}  errors: {outcomes['error']}"
+        )
+        self.stdout.write(f'  throughput: {throughput:.1f} bookings/s ({result["wall"]:.2f}s wall)')
+        self.stdout.write(
+            f'  latency p50: {_percentile(latencies, 50) * 1000:.1f} ms  '
+            f'p99: {_percentile(latencies, 99) * 1000:.1f} ms  '
+            f'mean: {statistics.fmean(latencies) * 1000 if latencies else 0:.1f} ms'
+        )
+        style = self.style.SUCCESS if result['double_booked'] == 0 else self.style.ERROR
+        self.stdout.write(style(f"  double bookings: {result['double_booked']}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from customer.waitlist import PROMOTION_BATCH_SIZE, expire_waitlist, promote_waitlist
+
+
+class Command(BaseCommand):
+    help = 'Book freed slots for waitlisted customers, in batches (run every minute from cron or a scheduler)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=PROMOTION_BATCH_SIZE,
+            help='Freed slots processed per transaction',
+        )
+
+    def handle(self, *args, **options):
+        expired = expire_waitlist()
+        processed, promoted = promote_waitlist(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} freed slot(s): booked {promoted} waitlisted customer(s), '
+            f'expired {expired} old waitlist entry(ies).'
+        ))
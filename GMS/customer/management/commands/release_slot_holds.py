@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from customer.booking import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Release expired slot holds (run every minute from cron or a scheduler)'
+
+    def handle(self, *args, **kwargs):
+        released, days = release_expired_holds()
+        self.stdout.write(
+            self.style.SUCCESS(f'Released {released} expired hold(s) on {len(days)} date(s).')
+        )
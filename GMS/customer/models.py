@@ -97,11 +97,17 @@ class Appointment(models.Model):
         related_name="appointments"
     )
     # appointment_date = models.DateField()
-    slot = models.OneToOneField(   # One slot can be booked once
+    slot = models.ForeignKey(   # first slot of the booked run
         "adminpanel.Slot",
         on_delete=models.PROTECT,
         related_name="appointments"
     )
+    # every slot the appointment occupies (more than one for long services)
+    slots = models.ManyToManyField(
+        "adminpanel.Slot",
+        related_name="booked_appointments",
+        blank=True
+    )
     notes = models.TextField(blank=True)
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
@@ -111,4 +117,68 @@ class Appointment(models.Model):
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.vehicle} - {self.slot.date} {self.slot.start_time}"
\ No newline at end of file
+        return f"{self.vehicle} - {self.slot.date} {self.slot.start_time}"
+
+class WaitlistEntry(models.Model):
+    STATUS_CHOICES = (
+        ("Waiting", "Waiting"),
+        ("Promoted", "Promoted"),
+        ("Cancelled", "Cancelled"),
+        ("Expired", "Expired"),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries"
+    )
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries"
+    )
+    service = models.ForeignKey(
+        "adminpanel.Service",
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries"
+    )
+    # any slot between these dates (inclusive) is acceptable
+    date_from = models.DateField()
+    date_to = models.DateField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Waiting")
+    appointment = models.OneToOneField(
+        Appointment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="waitlist_entry"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]   # FIFO
+        indexes = [
+            models.Index(fields=["status", "date_from", "date_to"], name="waitlist_status_window_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.service} ({self.date_from} to {self.date_to})"
+
+
+class FreedSlot(models.Model):
+    """A slot that became free and has not been offered to the waitlist yet."""
+    slot = models.ForeignKey(
+        "adminpanel.Slot",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    date = models.DateField(db_index=True)
+    freed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["freed_at", "id"]
+
+    def __str__(self):
+        return f"{self.slot} freed at {self.freed_at}"
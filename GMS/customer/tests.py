@@ -1,3 +1,331 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from adminpanel.models import Service, Slot, SlotHold
+
+from .booking import SlotUnavailable, book_appointment, cancel_appointment, release_expired_holds
+from .models import Appointment, FreedSlot, Users, Vehicle, WaitlistEntry
+from .views import slot_events
+from .waitlist import expire_waitlist, promote_waitlist, record_freed_slots
+
+
+def make_customer(email):
+    user = Users.objects.create_user(email, email.split("@")[0].title(), "pw", is_verified=True)
+    vehicle = Vehicle.objects.create(user=user, model="Swift", year=2020, plate_no=email[:10])
+    return user, vehicle
+
+
+def make_slots(day, *hours):
+    """One-hour slots starting at the given hours."""
+    return [Slot.objects.create(date=day, start_time=time(hour), end_time=time(hour + 1)) for hour in hours]
+
+
+class SlotRequestValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _vehicle = make_customer("c@example.com")
+        cls.service = Service.objects.create(name="Oil change", price=1000, duration=60)
+        cls.slot, = make_slots(timezone.localdate() + timedelta(days=3), 9)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_available_slots_rejects_a_non_numeric_service(self):
+        url = reverse("available_slots")
+        day = self.slot.date.isoformat()
+
+        response = self.client.get(url, {"date": day, "service": "abc"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["slots"], [])
+
+        response = self.client.get(url, {"date": day, "service": self.service.pk})
+        self.assertEqual([slot["id"] for slot in response.json()["slots"]], [self.slot.pk])
+
+    def test_hold_slot_rejects_non_numeric_ids(self):
+        url = reverse("hold_slot")
+        for data in ({"slot": "x", "service": self.service.pk}, {"slot": self.slot.pk, "service": "1.5"}, {}):
+            response = self.client.post(url, data)
+            self.assertEqual(response.status_code, 400, data)
+            self.assertFalse(response.json()["held"])
+
+
+class SlotEventsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _vehicle = make_customer("c@example.com")
+
+    def call(self, request):
+        async def auser():
+            return self.user
+        request.user, request.auser = self.user, auser
+        # run in a thread so a view that blocks fails the test instead of hanging it
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(async_to_sync(slot_events), request).result(timeout=5)
+
+    def test_wsgi_request_gets_no_content(self):
+        response = self.call(RequestFactory().get(reverse("slot_events"), {"date": "2026-03-02"}))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_asgi_request_gets_the_stream(self):
+        response = self.call(AsyncRequestFactory().get(reverse("slot_events"), {"date": "2026-03-02"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        bad = self.call(AsyncRequestFactory().get(reverse("slot_events"), {"date": "soon"}))
+        self.assertEqual(bad.status_code, 400)
+
+
+class RunBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.vehicle = make_customer("c@example.com")
+        cls.service = Service.objects.create(name="Clutch overhaul", price=6000, duration=120)
+        cls.day = timezone.localdate() + timedelta(days=3)
+
+    def book(self, slot, **kwargs):
+        appointment = Appointment(user=self.user, vehicle=self.vehicle, service=self.service, slot=slot)
+        return appointment, book_appointment(appointment, **kwargs)
+
+    def booked(self):
+        return list(Slot.objects.filter(is_booked=True).order_by("start_time").values_list("start_time__hour", flat=True))
+
+    def test_long_service_books_back_to_back_slots(self):
+        nine, ten, _eleven = make_slots(self.day, 9, 10, 11)
+        appointment, run_ids = self.book(nine)
+
+        self.assertEqual(run_ids, [nine.pk, ten.pk])
+        self.assertEqual(sorted(appointment.slots.values_list("pk", flat=True)), [nine.pk, ten.pk])
+        self.assertEqual(self.booked(), [9, 10])
+
+    def test_run_broken_by_a_gap_is_refused(self):
+        nine, _eleven = make_slots(self.day, 9, 11)
+        with self.assertRaises(SlotUnavailable):
+            self.book(nine)
+        self.assertEqual(self.booked(), [])
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_run_broken_by_a_booked_slot_is_refused(self):
+        nine, ten, _eleven = make_slots(self.day, 9, 10, 11)
+        Slot.objects.filter(pk=ten.pk).update(is_booked=True)
+        with self.assertRaises(SlotUnavailable):
+            self.book(nine)
+        self.assertEqual(self.booked(), [10])
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_later_slot_taken_after_the_run_was_read_rolls_back(self):
+        nine, ten = make_slots(self.day, 9, 10)
+        Slot.objects.filter(pk=ten.pk).update(is_booked=True)
+        for strategy in ("lock", "claim"):
+            with self.subTest(strategy=strategy):
+                # the run was found free, then another booking took its second slot
+                with mock.patch("customer.booking.slot_run_ids", return_value=[nine.pk, ten.pk]):
+                    with self.assertRaises(SlotUnavailable):
+                        self.book(nine, strategy=strategy)
+                self.assertEqual(self.booked(), [10])
+                self.assertFalse(Appointment.objects.exists())
+
+    def test_cancelling_frees_every_slot_of_the_run(self):
+        nine, _ten, _eleven = make_slots(self.day, 9, 10, 11)
+        appointment, _run_ids = self.book(nine)
+
+        self.assertTrue(cancel_appointment(appointment))
+        self.assertEqual(self.booked(), [])
+        self.assertEqual(Appointment.objects.get().status, "Cancelled")
+        self.assertFalse(cancel_appointment(appointment))
+
+
+class BookingContentionTests(TransactionTestCase):
+    ROUNDS = 5
+
+    def setUp(self):
+        self.customers = [make_customer(f"c{i}@example.com") for i in range(2)]
+        self.service = Service.objects.create(name="Clutch overhaul", price=6000, duration=120)
+        self.day = timezone.localdate() + timedelta(days=3)
+
+    def race(self, strategy, first_slots):
+        """Book from each of first_slots at the same moment, one thread per customer."""
+        barrier = threading.Barrier(len(first_slots))
+
+        def book(i):
+            user, vehicle = self.customers[i]
+            appointment = Appointment(user=user, vehicle=vehicle, service=self.service, slot=first_slots[i])
+            barrier.wait()
+            try:
+                book_appointment(appointment, strategy=strategy)
+                return True
+            except SlotUnavailable:
+                return False
+            except OperationalError:
+                if connection.vendor != "sqlite":
+                    raise
+                return False  # SQLite refuses a second writer instead of queueing it
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=len(first_slots)) as pool:
+            return list(pool.map(book, range(len(first_slots))))
+
+    def test_exactly_one_of_two_bookings_for_the_same_run_wins(self):
+        for offset, strategy in enumerate(("lock", "claim")):
+            day = self.day + timedelta(days=offset)
+            for hour in range(8, 8 + 2 * self.ROUNDS, 2):
+                with self.subTest(strategy=strategy, hour=hour):
+                    nine, ten = make_slots(day, hour, hour + 1)
+
+                    results = self.race(strategy, [nine, nine])
+                    self.assertEqual(results.count(True), 1)
+                    appointment = Appointment.objects.get(slot=nine)
+                    self.assertEqual(appointment.slots.count(), 2)
+                    self.assertEqual(Slot.objects.filter(pk__in=[nine.pk, ten.pk], is_booked=True).count(), 2)
+
+    def test_overlapping_runs_leave_no_partial_claim(self):
+        for offset, strategy in enumerate(("lock", "claim")):
+            with self.subTest(strategy=strategy):
+                day = self.day + timedelta(days=offset)
+                nine, ten, eleven = make_slots(day, 9, 10, 11)
+
+                # 9-11 and 10-12 share the 10:00 slot
+                results = self.race(strategy, [nine, ten])
+                self.assertEqual(results.count(True), 1)
+                booked = set(Slot.objects.filter(date=day, is_booked=True).values_list("pk", flat=True))
+                self.assertIn(booked, [{nine.pk, ten.pk}, {ten.pk, eleven.pk}])
+                self.assertEqual(Appointment.objects.filter(slot__date=day).count(), 1)
+
+
+class SlotHoldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.holder, cls.holder_vehicle = make_customer("holder@example.com")
+        cls.other, cls.other_vehicle = make_customer("other@example.com")
+        cls.service = Service.objects.create(name="Clutch overhaul", price=6000, duration=120)
+        cls.day = timezone.localdate() + timedelta(days=3)
+
+    def setUp(self):
+        cache.clear()
+        self.nine, self.ten, self.eleven = make_slots(self.day, 9, 10, 11)
+        self.client.force_login(self.holder)
+        self.other_client = Client()
+        self.other_client.force_login(self.other)
+
+    def hold(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("hold_slot"), {"slot": self.nine.pk, "service": self.service.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["slots"], [self.nine.pk, self.ten.pk])
+        return self.client.session.session_key
+
+    def start_slots(self, client):
+        response = client.get(reverse("available_slots"), {"date": self.day.isoformat(), "service": self.service.pk})
+        return [slot["id"] for slot in response.json()["slots"]]
+
+    def test_held_run_is_hidden_from_other_sessions_only(self):
+        self.hold()
+        self.assertEqual(self.start_slots(self.client), [self.nine.pk, self.ten.pk])
+        # 11:00 alone is too short for the service; everything before it is held
+        self.assertEqual(self.start_slots(self.other_client), [])
+
+        response = self.other_client.post(reverse("hold_slot"), {"slot": self.ten.pk, "service": self.service.pk})
+        self.assertEqual(response.status_code, 409)
+
+    def test_hold_turns_into_the_booking(self):
+        session_key = self.hold()
+
+        taken = Appointment(user=self.other, vehicle=self.other_vehicle, service=self.service, slot=self.nine)
+        with self.assertRaises(SlotUnavailable):
+            book_appointment(taken, session_key="someone-else")
+
+        appointment = Appointment(user=self.holder, vehicle=self.holder_vehicle, service=self.service, slot=self.nine)
+        self.assertEqual(book_appointment(appointment, session_key=session_key), [self.nine.pk, self.ten.pk])
+        self.assertFalse(SlotHold.objects.exists())
+        self.assertEqual(Slot.objects.filter(is_booked=True).count(), 2)
+
+    def test_expired_holds_are_swept_and_queued_for_the_waitlist(self):
+        self.hold()
+        WaitlistEntry.objects.create(
+            user=self.other, vehicle=self.other_vehicle, service=self.service, date_from=self.day, date_to=self.day
+        )
+
+        self.assertEqual(release_expired_holds(), (0, set()))
+        self.assertEqual(self.start_slots(self.other_client), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            released, days = release_expired_holds(now=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual((released, days), (2, {self.day}))
+        self.assertFalse(SlotHold.objects.exists())
+        self.assertEqual(sorted(FreedSlot.objects.values_list("slot_id", flat=True)), [self.nine.pk, self.ten.pk])
+        self.assertEqual(self.start_slots(self.other_client), [self.nine.pk, self.ten.pk])
+
+
+class WaitlistPromotionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.booker, cls.booker_vehicle = make_customer("booker@example.com")
+        cls.first, cls.first_vehicle = make_customer("first@example.com")
+        cls.second, cls.second_vehicle = make_customer("second@example.com")
+        cls.service = Service.objects.create(name="Oil change", price=1000, duration=60)
+        cls.day = timezone.localdate() + timedelta(days=3)
+
+    def wait(self, user, vehicle, date_from, date_to):
+        return WaitlistEntry.objects.create(
+            user=user, vehicle=vehicle, service=self.service, date_from=date_from, date_to=date_to
+        )
+
+    def test_freed_slot_goes_to_the_earliest_entry(self):
+        slot, = make_slots(self.day, 9)
+        first = self.wait(self.first, self.first_vehicle, self.day, self.day)
+        second = self.wait(self.second, self.second_vehicle, self.day - timedelta(days=1), self.day + timedelta(days=1))
+
+        self.assertEqual(record_freed_slots([(slot.pk, self.day)]), 1)
+        self.assertEqual(promote_waitlist(), (1, 1))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.appointment.slot), ("Promoted", slot))
+        self.assertEqual(second.status, "Waiting")
+        self.assertEqual([message.to for message in mail.outbox], [["first@example.com"]])
+        self.assertFalse(FreedSlot.objects.exists())
+
+    def test_slots_outside_every_window_are_not_queued(self):
+        slot, = make_slots(self.day, 9)
+        entry = self.wait(self.first, self.first_vehicle, self.day + timedelta(days=1), self.day + timedelta(days=5))
+
+        self.assertEqual(record_freed_slots([(slot.pk, self.day)]), 0)
+        self.assertEqual(promote_waitlist(), (0, 0))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, "Waiting")
+
+    def test_cancellation_promotes_the_waiting_customer(self):
+        slot, = make_slots(self.day, 9)
+        appointment = Appointment(user=self.booker, vehicle=self.booker_vehicle, service=self.service, slot=slot)
+        book_appointment(appointment)
+        entry = self.wait(self.first, self.first_vehicle, self.day, self.day)
+
+        cancel_appointment(appointment)
+        self.assertEqual(promote_waitlist(), (1, 1))
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, "Promoted")
+        self.assertEqual(entry.appointment.slot, slot)
+        self.assertTrue(Slot.objects.get(pk=slot.pk).is_booked)
+
+    def test_entries_whose_window_has_passed_expire(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        old = self.wait(self.first, self.first_vehicle, yesterday - timedelta(days=3), yesterday)
+        current = self.wait(self.second, self.second_vehicle, yesterday, self.day)
+
+        self.assertEqual(expire_waitlist(), 1)
+        old.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual((old.status, current.status), ("Expired", "Waiting"))
@@ -55,4 +55,9 @@ urlpatterns = [
     path("appointments/", my_appointments, name="my_appointments"),
     path("appointments/create/", create_appointment, name="create_appointment"),
     path("appointments/available-slots/", available_slots, name="available_slots"),
+    path("appointments/slot-events/", slot_events, name="slot_events"),
+    path("appointments/hold-slot/", hold_slot, name="hold_slot"),
+    path("appointments/<int:pk>/cancel/", cancel_appointment, name="cancel_appointment"),
+    path("waitlist/join/", join_waitlist, name="join_waitlist"),
+    path("waitlist/<int:pk>/leave/", leave_waitlist, name="leave_waitlist"),
 ]
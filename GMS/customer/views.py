@@ -10,11 +10,14 @@ from django.urls import reverse
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseBadRequest
+from django.views.decorators.http import require_GET, require_POST
+from django.utils.dateparse import parse_date
 from adminpanel.models import Slot, Service
-from django.db import transaction
-from datetime import datetime, timedelta
+from adminpanel.availability import available_slots_for_service
+from adminpanel.slot_events import slot_event_stream
+from .booking import book_appointment, cancel_appointment as cancel_booking, hold_slots, SlotUnavailable
 
 User = get_user_model()
 
@@ -299,26 +302,20 @@ def create_appointment(request):
         if service_id:
             form.fields["service"].initial = service_id
 
-            print("POST date:", request.POST.get("date"), "slot:", request.POST.get("slot"))
         if form.is_valid():
-            with transaction.atomic():
-                appt = form.save(commit=False)
-                appt.user = request.user
-
-                # lock slot to prevent double booking
-                slot = Slot.objects.select_for_update().get(id=appt.slot_id)
-
-                # extra safety: ensure slot matches selected date
-                selected_date = form.cleaned_data["date"]
-                if slot.date != selected_date:
-                    form.add_error("slot", "Selected slot does not match the selected date.")
-                elif slot.is_booked:
-                    form.add_error("slot", "This slot is already booked. Please choose another.")
-                else:
-                    slot.is_booked = True
-                    slot.save()
+            appt = form.save(commit=False)
+            appt.user = request.user
 
-                    appt.save()
+            # extra safety: ensure slot matches selected date
+            selected_date = form.cleaned_data["date"]
+            if appt.slot.date != selected_date:
+                form.add_error("slot", "Selected slot does not match the selected date.")
+            else:
+                try:
+                    book_appointment(appt, session_key=request.session.session_key)
+                except SlotUnavailable as e:
+                    form.add_error("slot", str(e))
+                else:
                     messages.success(request, "Appointment booked successfully!")
                     return redirect("create_appointment")
     else:
@@ -328,33 +325,85 @@ def create_appointment(request):
     return render(request, "create_appointment.html", {"form": form})
 
 
+def _parse_id(value):
+    """A positive integer id from request data, or None."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
 @login_required
 @require_GET
 def available_slots(request):
     date = request.GET.get("date")
     service_id = request.GET.get("service")
-    if not date:
+    if not date or not service_id:
         return JsonResponse({"slots": []})
-    
-    service = Service.objects.get(id=service_id)
 
-    slots = Slot.objects.filter(date=date, is_booked=False).order_by("start_time")
+    try:
+        day = parse_date(date)
+    except ValueError:
+        day = None
+    if day is None:
+        return JsonResponse({"slots": []})
+
+    service_id = _parse_id(service_id)
+    if service_id is None:
+        return JsonResponse({"slots": [], "error": "Invalid service."}, status=400)
+
+    slots = available_slots_for_service(day, service_id, request.session.session_key)
+    return JsonResponse({"slots": slots})
+
 
-    valid_slots = []
+@login_required
+@require_POST
+def hold_slot(request):
+    """Hold the chosen slot (and the run the service needs) for this session."""
+    slot_id = _parse_id(request.POST.get("slot"))
+    service_id = _parse_id(request.POST.get("service"))
+    slot = Slot.objects.filter(pk=slot_id, is_booked=False).first() if slot_id else None
+    service = Service.objects.filter(pk=service_id, is_active=True).first() if service_id else None
+    if slot is None or service is None:
+        return JsonResponse({"held": False, "error": "Please choose a service and an available slot."}, status=400)
+
+    if not request.session.session_key:
+        request.session.save()
+
+    try:
+        slot_ids, expires_at = hold_slots(slot, service, request.session.session_key)
+    except SlotUnavailable as e:
+        return JsonResponse({"held": False, "error": str(e)}, status=409)
 
-    for slot in slots:
-        duration = (
-            datetime.combine(slot.date, slot.end_time) -
-            datetime.combine(slot.date, slot.start_time)
-        ).total_seconds() / 60
+    return JsonResponse({"held": True, "slots": slot_ids, "expires_at": expires_at.isoformat()})
 
-        if duration >= service.duration:
-            valid_slots.append({
-                "id": slot.id,
-                "label": f"{slot.start_time.strftime('%I:%M %p')} - {slot.end_time.strftime('%I:%M %p')}"
-            })
+@login_required
+@require_GET
+async def slot_events(request):
+    """
+    Server-Sent Events stream of slot booked/freed changes for ?date=.
+
+    The stream never ends, so it is only served through the ASGI
+    application. Under WSGI it would hold a worker thread per open page;
+    there the view answers 204, which tells the browser not to reconnect,
+    and the page polls available_slots instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    day = None
+    try:
+        day = parse_date(request.GET.get("date") or "")
+    except ValueError:
+        pass
+    if day is None:
+        return HttpResponseBadRequest("A valid date is required.")
 
-    return JsonResponse({"slots": valid_slots})
+    response = StreamingHttpResponse(slot_event_stream(day), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 @login_required
 def my_appointments(request):
@@ -364,7 +413,53 @@ def my_appointments(request):
         .select_related("vehicle", "service", "slot")
         .order_by("-created_at")
     )
-    return render(request, "my_appointments.html", {"appointments": appointments})
+    waitlist = (
+        WaitlistEntry.objects
+        .filter(user=request.user, status="Waiting")
+        .select_related("vehicle", "service")
+    )
+    return render(request, "my_appointments.html", {"appointments": appointments, "waitlist": waitlist})
+
+
+@login_required
+@require_POST
+def cancel_appointment(request, pk):
+    appointment = get_object_or_404(Appointment, pk=pk, user=request.user)
+    if cancel_booking(appointment):
+        messages.success(request, "Appointment cancelled.")
+    else:
+        messages.error(request, "This appointment can no longer be cancelled.")
+    return redirect("my_appointments")
+
+
+@login_required
+@require_POST
+def join_waitlist(request):
+    """Wait for a slot in a date window when the chosen date is full."""
+    form = WaitlistForm(request.POST, user=request.user)
+    if form.is_valid():
+        entry = form.save(commit=False)
+        entry.user = request.user
+        entry.save()
+        messages.success(request, "You are on the waitlist. We will email you as soon as a slot opens up.")
+        return redirect("my_appointments")
+
+    for errors in form.errors.values():
+        messages.error(request, errors[0])
+    return redirect("create_appointment")
+
+
+@login_required
+@require_POST
+def leave_waitlist(request, pk):
+    updated = (
+        WaitlistEntry.objects
+        .filter(pk=pk, user=request.user, status="Waiting")
+        .update(status="Cancelled")
+    )
+    if updated:
+        messages.success(request, "Removed from the waitlist.")
+    return redirect("my_appointments")
 
 def logout_view(request):
     logout(request)
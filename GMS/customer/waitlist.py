@@ -0,0 +1,164 @@
+"""
+Slot waitlist.
+
+Customers who find a date full join the waitlist for a date window.
+Whenever slots become free (an admin frees a slot, an appointment is
+cancelled, a hold expires) record_freed_slots() queues them in FreedSlot,
+but only for dates somebody is waiting for.
+
+promote_waitlist() drains that queue in batches. Each batch runs in one
+transaction: the freed dates are offered to the waiting entries in FIFO
+order and every entry is booked on the earliest run of slots its service
+fits into. The notification emails of a batch are sent together over one
+connection once the batch has committed.
+"""
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.utils import timezone
+
+from adminpanel.availability import find_slot_runs, held_by_other, load_free_slots
+
+from .models import Appointment, FreedSlot, WaitlistEntry
+
+
+PROMOTION_BATCH_SIZE = 100
+
+
+def record_freed_slots(freed):
+    """
+    Queue freed slots, given as (slot_id, date) pairs, for the promotion worker.
+    Slots on dates nobody waits for are not queued. Returns the number queued.
+    """
+    freed = [(slot_id, day) for slot_id, day in freed if day >= timezone.localdate()]
+    if not freed:
+        return 0
+    days = {day for _, day in freed}
+    windows = list(
+        WaitlistEntry.objects
+        .filter(status="Waiting", date_from__lte=max(days), date_to__gte=min(days))
+        .values_list("date_from", "date_to")
+    )
+    queued = [
+        FreedSlot(slot_id=slot_id, date=day)
+        for slot_id, day in freed
+        if any(start <= day <= end for start, end in windows)
+    ]
+    FreedSlot.objects.bulk_create(queued)
+    return len(queued)
+
+
+def expire_waitlist(today=None):
+    """Close entries whose whole window is in the past. Returns how many."""
+    return (
+        WaitlistEntry.objects
+        .filter(status="Waiting", date_to__lt=today or timezone.localdate())
+        .update(status="Expired")
+    )
+
+
+def _book_first_run(entry, day, rows, now):
+    """Book the entry on the earliest free run of `day` that fits its service."""
+    from .booking import SlotUnavailable, book_appointment
+
+    free = [row for row in rows if not held_by_other(row, None, now)]
+    for run in find_slot_runs(free, entry.service.duration):
+        appointment = Appointment(
+            user=entry.user,
+            vehicle=entry.vehicle,
+            service=entry.service,
+            slot_id=run[0]["id"],
+            notes="Booked from the waitlist.",
+        )
+        try:
+            book_appointment(appointment)
+        except SlotUnavailable:
+            continue
+        return appointment
+    return None
+
+
+def promote_batch(batch_size=PROMOTION_BATCH_SIZE):
+    """
+    Process up to batch_size queued freed slots in one transaction.
+    Returns (freed slots processed, promoted entries).
+    """
+    now = timezone.now()
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        batch = list(
+            FreedSlot.objects
+            .select_for_update(skip_locked=True)
+            .order_by("freed_at", "id")
+            .values_list("id", "date")[:batch_size]
+        )
+        if not batch:
+            return 0, []
+        days = sorted({day for _, day in batch if day >= today})
+
+        entries = []
+        if days:
+            entries = list(
+                WaitlistEntry.objects
+                .select_for_update(skip_locked=True, of=("self",))
+                .filter(status="Waiting", date_from__lte=days[-1], date_to__gte=days[0])
+                .select_related("user", "vehicle", "service")
+                .order_by("created_at", "id")
+            )
+
+        promoted = []
+        for day in days:
+            waiting = [
+                e for e in entries
+                if e.status == "Waiting" and e.date_from <= day <= e.date_to
+            ]
+            if not waiting:
+                continue
+            rows = load_free_slots(day)
+            for entry in waiting:
+                if not rows:
+                    break
+                appointment = _book_first_run(entry, day, rows, now)
+                if appointment is None:
+                    continue
+                entry.status = "Promoted"
+                entry.appointment = appointment
+                entry.promoted_at = now
+                entry.save(update_fields=["status", "appointment", "promoted_at"])
+                promoted.append(entry)
+                rows = load_free_slots(day)
+
+        FreedSlot.objects.filter(id__in=[freed_id for freed_id, _ in batch]).delete()
+
+    return len(batch), promoted
+
+
+def _promotion_email(entry):
+    slot = entry.appointment.slot
+    message = (
+        f"Hi {entry.user.name},\n\n"
+        f"A slot opened up and your waitlisted {entry.service.name} "
+        f"for {entry.vehicle} has been booked:\n\n"
+        f"{slot.date} at {slot.start_time.strftime('%I:%M %p')}\n\n"
+        f"If you can no longer make it, please cancel the appointment "
+        f"from My Appointments so the slot goes to the next customer."
+    )
+    return ("Your waitlisted appointment is booked", message, settings.DEFAULT_FROM_EMAIL, [entry.user.email])
+
+
+def promote_waitlist(batch_size=PROMOTION_BATCH_SIZE):
+    """
+    Drain the freed-slot queue batch by batch, emailing each batch's promoted
+    customers in bulk. Returns (freed slots processed, entries promoted).
+    """
+    processed = promoted_total = 0
+    while True:
+        freed, promoted = promote_batch(batch_size)
+        if not freed:
+            break
+        processed += freed
+        promoted_total += len(promoted)
+        if promoted:
+            send_mass_mail([_promotion_email(entry) for entry in promoted], fail_silently=False)
+    return processed, promoted_total
@@ -0,0 +1,119 @@
+"""
+Mechanic capacity per slot.
+
+Active schedules of Mechanic-role staff minus approved leave give, for
+every slot, how many mechanics are on duty for its whole time window;
+receptionists and other staff on the rota do not add capacity. Schedules, leave and
+slots are each fetched with a single query for the requested range; the
+interval arithmetic is done in memory over plain tuples.
+
+If no active schedule exists at all, capacity is not enforced (None is
+returned) so a garage that does not use staff schedules keeps booking
+purely on slot availability.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from .models import Schedule, LeaveRequest
+
+
+DAY_INDEX = {name: index for index, (name, _label) in enumerate(Schedule.DAY_CHOICES)}
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _shift_covers(shift_start, shift_end, start, end):
+    """Whether a shift starting on the slot's day covers the [start, end) minute window of the slot."""
+    if shift_start < shift_end:
+        return shift_start <= start and end <= shift_end
+    # overnight shift (e.g. 22:00-06:00): on the day it starts it runs until midnight
+    return start >= shift_start
+
+
+def _carryover_covers(shift_start, shift_end, start, end):
+    """Whether the previous day's overnight shift covers [start, end) after midnight."""
+    return shift_start >= shift_end and end <= shift_end
+
+
+def load_duty(start_date, end_date):
+    """
+    (shifts by weekday index -> [(staff_id, start_min, end_min)],
+     date -> set of staff ids on approved leave) for a date range.
+    Leave starts a day early: an overnight shift from the day before
+    still covers the first morning of the range.
+    """
+    shifts = defaultdict(list)
+    schedule_rows = (
+        Schedule.objects
+        .filter(is_active=True, staff__status="Active", staff__user__role__iexact="Mechanic")
+        .values_list("staff_id", "day_of_week", "start_time", "end_time")
+    )
+    for staff_id, day_name, start, end in schedule_rows:
+        shifts[DAY_INDEX[day_name]].append((staff_id, _minutes(start), _minutes(end)))
+
+    on_leave = defaultdict(set)
+    start_date -= timedelta(days=1)
+    leave_rows = (
+        LeaveRequest.objects
+        .filter(status="Approved", start_date__lte=end_date, end_date__gte=start_date)
+        .values_list("staff_id", "start_date", "end_date")
+    )
+    for staff_id, leave_start, leave_end in leave_rows:
+        day = max(leave_start, start_date)
+        while day <= min(leave_end, end_date):
+            on_leave[day].add(staff_id)
+            day += timedelta(days=1)
+
+    return shifts, on_leave
+
+
+def slot_headcounts(slots, shifts, on_leave):
+    """
+    slots: iterable of (slot_id, date, start_time, end_time).
+    Returns {slot_id: number of distinct mechanics on duty for the whole slot}.
+
+    The hours after midnight belong to the overnight shifts that started
+    the day before, so they count against that day's schedule and leave.
+    """
+    counts = {}
+    for slot_id, day, start_time, end_time in slots:
+        start, end = _minutes(start_time), _minutes(end_time)
+        away = on_leave.get(day, ())
+        on_duty = {
+            staff_id
+            for staff_id, shift_start, shift_end in shifts.get(day.weekday(), ())
+            if staff_id not in away and _shift_covers(shift_start, shift_end, start, end)
+        }
+        previous = day - timedelta(days=1)
+        away = on_leave.get(previous, ())
+        on_duty.update(
+            staff_id
+            for staff_id, shift_start, shift_end in shifts.get(previous.weekday(), ())
+            if staff_id not in away and _carryover_covers(shift_start, shift_end, start, end)
+        )
+        counts[slot_id] = len(on_duty)
+    return counts
+
+
+def spare_capacity(day, slots):
+    """
+    slots: every slot of `day` as (slot_id, start_time, end_time, is_booked).
+    Returns {slot_id: mechanics on duty minus booked slots overlapping it}, or
+    None when no schedules are set up. A free slot can take a booking while its
+    spare capacity is above 0; a booked slot is over capacity below 0.
+    """
+    shifts, on_leave = load_duty(day, day)
+    if not shifts:
+        return None
+
+    heads = slot_headcounts(((slot_id, day, s, e) for slot_id, s, e, _ in slots), shifts, on_leave)
+    booked = [(_minutes(s), _minutes(e)) for _, s, e, is_booked in slots if is_booked]
+
+    spare = {}
+    for slot_id, start_time, end_time, _ in slots:
+        start, end = _minutes(start_time), _minutes(end_time)
+        concurrent = sum(1 for b_start, b_end in booked if b_start < end and start < b_end)
+        spare[slot_id] = heads[slot_id] - concurrent
+    return spare
@@ -1,3 +1,71 @@
+from datetime import date, time
+
 from django.test import TestCase
 
-# Create your tests here.
+from customer.models import Users
+
+from .capacity import spare_capacity
+from .models import LeaveRequest, Schedule, Staff
+
+
+MONDAY = date(2026, 3, 2)
+TUESDAY = date(2026, 3, 3)
+
+
+class OvernightCapacityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.night = cls.mechanic("night@example.com", "M-1")
+        cls.day = cls.mechanic("day@example.com", "M-2")
+        Schedule.objects.create(
+            staff=cls.night, day_of_week="Monday", shift="Evening", start_time=time(22), end_time=time(6)
+        )
+        for day_name in ("Monday", "Tuesday"):
+            Schedule.objects.create(
+                staff=cls.day, day_of_week=day_name, shift="Full Day", start_time=time(9), end_time=time(18)
+            )
+
+    @staticmethod
+    def staff_member(email, employee_id, role):
+        user = Users.objects.create_user(email, employee_id, "pw", role=role)
+        return Staff.objects.create(user=user, employee_id=employee_id, hire_date=date(2025, 1, 1))
+
+    @classmethod
+    def mechanic(cls, email, employee_id):
+        return cls.staff_member(email, employee_id, "Mechanic")
+
+    def spare(self, day, *hours):
+        return [spare_capacity(day, [(hour, time(hour), time(hour + 1), False)])[hour] for hour in hours]
+
+    def leave(self, staff, start, end):
+        LeaveRequest.objects.create(
+            staff=staff, leave_type="Casual", start_date=start, end_date=end, reason="-", status="Approved"
+        )
+
+    def test_after_midnight_counts_against_the_previous_day(self):
+        self.assertEqual(self.spare(MONDAY, 2, 10, 22), [0, 1, 1])
+        self.assertEqual(self.spare(TUESDAY, 2, 10, 22), [1, 1, 0])
+
+    def test_leave_on_the_start_day_removes_the_whole_overnight_shift(self):
+        self.leave(self.night, MONDAY, MONDAY)
+        self.assertEqual(self.spare(MONDAY, 22), [0])
+        self.assertEqual(self.spare(TUESDAY, 2), [0])
+
+    def test_leave_on_the_next_day_keeps_the_shift_started_before_it(self):
+        self.leave(self.night, TUESDAY, TUESDAY)
+        self.leave(self.day, TUESDAY, TUESDAY)
+        self.assertEqual(self.spare(TUESDAY, 2, 10), [1, 0])
+        self.assertEqual(self.spare(MONDAY, 10, 22), [1, 1])
+
+    def test_pending_leave_is_ignored(self):
+        LeaveRequest.objects.create(
+            staff=self.night, leave_type="Sick", start_date=MONDAY, end_date=TUESDAY, reason="-"
+        )
+        self.assertEqual(self.spare(TUESDAY, 2), [1])
+
+    def test_non_mechanic_staff_on_duty_add_no_capacity(self):
+        desk = self.staff_member("desk@example.com", "A-1", "Admin")
+        Schedule.objects.create(
+            staff=desk, day_of_week="Tuesday", shift="Full Day", start_time=time(9), end_time=time(18)
+        )
+        self.assertEqual(self.spare(TUESDAY, 10), [1])
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
 from django.utils import timezone
+from adminpanel.availability import invalidate_all_dates
 from .models import Staff, StaffRole, Schedule, LeaveRequest
 from .forms import (
     StaffLoginForm, StaffCreationForm, StaffUpdateForm, 
@@ -202,6 +203,7 @@ def staff_update(request, pk):
         if user_form.is_valid() and staff_form.is_valid():
             user_form.save()
             staff_form.save()
+            invalidate_all_dates()
             messages.success(request, 'Staff information updated successfully!')
             return redirect('staff_detail', pk=staff.pk)
     else:
@@ -235,6 +237,7 @@ def staff_delete(request, pk):
         user = staff.user
         staff.delete()
         user.delete()
+        invalidate_all_dates()
         messages.success(request, 'Staff member deleted successfully!')
         return redirect('staff_list')
     
@@ -285,6 +288,7 @@ def schedule_create(request):
         form = ScheduleForm(request.POST)
         if form.is_valid():
             form.save()
+            invalidate_all_dates()
             messages.success(request, 'Schedule created successfully!')
             return redirect('schedule_list')
     else:
@@ -310,6 +314,7 @@ def schedule_update(request, pk):
         form = ScheduleForm(request.POST, instance=schedule)
         if form.is_valid():
             form.save()
+            invalidate_all_dates()
             messages.success(request, 'Schedule updated successfully!')
             return redirect('schedule_list')
     else:
@@ -333,6 +338,7 @@ def schedule_delete(request, pk):
     
     if request.method == 'POST':
         schedule.delete()
+        invalidate_all_dates()
         messages.success(request, 'Schedule deleted successfully!')
         return redirect('schedule_list')
     
@@ -421,6 +427,7 @@ def leave_request_approve(request, pk):
         leave_request.approved_by = request.user
         leave_request.approved_at = timezone.now()
         leave_request.save()
+        invalidate_all_dates()
         messages.success(request, 'Leave request approved!')
         return redirect('leave_request_list')
     
@@ -447,6 +454,7 @@ def leave_request_reject(request, pk):
         leave_request.approved_at = timezone.now()
         leave_request.rejection_reason = rejection_reason
         leave_request.save()
+        invalidate_all_dates()
         messages.success(request, 'Leave request rejected.')
         return redirect('leave_request_list')
     
@@ -473,6 +481,7 @@ def leave_request_delete(request, pk):
     
     if request.method == 'POST':
         leave_request.delete()
+        invalidate_all_dates()
         messages.success(request, 'Leave request deleted successfully!')
         return redirect('leave_request_list')
     